@@ -1,15 +1,94 @@
 import scrape_regatta_results as scraper
+import batch_crawler
+import scoring
+from snapshots import get_snapshots
+import argparse
+import os
 import sys
-import pandas as pd
 import traceback
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape regattanetwork results to CSV/Excel/JSON")
+    parser.add_argument('url', nargs='?', help="Regatta results URL (prompted for if omitted)")
+    parser.add_argument('--file', help="Batch mode: file with one regatta_id or URL per line")
+    parser.add_argument('--ids', help="Batch mode: regatta_id range/list, e.g. 29000-29100,29234")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent scrapes in batch mode")
+    parser.add_argument('--rate', type=float, default=2.0, help="Max requests per second per host")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per regatta with exponential backoff")
+    parser.add_argument('--output', default='batch_results', help="Base file name for batch exports")
+    parser.add_argument('--formats', type=lambda value: value.split(','), default=None,
+                        help="Comma-separated export formats: csv,excel,json,parquet,arrow")
+    parser.add_argument('--check-scores', action='store_true',
+                        help="Re-score every fleet from the race results and flag totals/positions that disagree")
+    parser.add_argument('--changes-only', action='store_true',
+                        help="Export only rows added/changed/removed since the previous scrape of each regatta")
+    return parser.parse_args()
+
+def check_scores(results_df):
+    checked = scoring.recompute_standings(results_df)
+    flagged = checked[checked['Points_Mismatch'] | checked['Position_Mismatch']]
+    if flagged.empty:
+        print(f"\n✅ Scores check out for all {len(checked)} entries")
+    else:
+        print(f"\n⚠️ {len(flagged)} of {len(checked)} entries disagree with the recomputed standings:")
+        print(flagged[['Regatta_Name', 'Category', 'Position', 'Computed_Position', 'Sail_Number',
+                       'Results', 'Total_Points', 'Computed_Points']].to_string(index=False))
+    return checked
+
+def export(results_df, args, formats, basename=None):
+    """Export the full frame, or with --changes-only just the delta since each regatta's last export"""
+    if not args.changes_only:
+        print("\nExporting results...")
+        return scraper.export_results(results_df, formats, basename=basename)
+
+    snapshots = get_snapshots()
+    delta = snapshots.diff_by(results_df, 'Regatta_Name', snapshot_id=lambda name: f"export:{name}")
+    print(f"\nChanges since the last scrape: {delta.describe()}")
+    if delta.empty:
+        print("Nothing to export")
+        return {}
+
+    print("\nExporting changes...")
+    exported = scraper.export_results(delta.frame(), formats,
+                                      basename=f"{basename}_changes" if basename else "changes")
+    if exported and not any('error' in result for result in exported.values()):
+        snapshots.commit(delta)  # ✅ after a failed export the same changes go out again next time
+    return exported
+
+def run_batch(args):
+    entries = []
+    if args.file:
+        entries.extend(batch_crawler.read_url_file(args.file))
+    if args.ids:
+        try:
+            entries.extend(batch_crawler.parse_id_range(args.ids))
+        except ValueError as e:
+            sys.exit(f"❌ Invalid --ids: {e}")
+
+    results_df, summary = batch_crawler.crawl(entries, workers=args.workers,
+                                              rate_per_host=args.rate, retries=args.retries)
+
+    if not results_df.empty:
+        results_df = scraper.clean_results(results_df)
+        if args.check_scores:
+            results_df = check_scores(results_df)
+        export(results_df, args, args.formats, basename=args.output)
+
+    batch_crawler.print_summary(summary)
+
 def main():
+    args = parse_args()
+    if args.file or args.ids:
+        args.formats = args.formats or ['csv', 'json']
+        run_batch(args)
+        return
+
     print("Regatta Results Scraper")
     print("-" * 30)
     
     # Get URL from user if not provided as argument
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
+    if args.url:
+        url = args.url
         print(f"Using provided URL: {url}")
     else:
         url = input("Please enter the regatta URL: ")
@@ -17,6 +96,12 @@ def main():
             url = "https://www.regattanetwork.com/clubmgmt/applet_regatta_results.php?regatta_id=29234&media_format=1"
             print(f"Using default URL: {url}")
     
+    # ✅ A mistyped or unreachable URL fails here instead of falling back to the browser.
+    # A fresh page-cache hit needs no request at all; otherwise the scrape reuses the validation response.
+    if not scraper.get_cache().has_fresh(url) and not scraper.validate_url(url):
+        print("\nThe URL could not be reached, please check it and try again")
+        return
+
     try:
         # Scrape results
         print("\nScraping results...")
@@ -41,17 +126,18 @@ def main():
                 category_results = results_df[results_df['Category'] == category]
                 print(f"Found {len(category_results)} entries")
                 print(category_results.to_string(index=False))
+
+            if args.check_scores:
+                results_df = check_scores(results_df)
             
             # Export in different formats
-            print("\nExporting results...")
-            scraper.export_results(results_df, 'csv')
-            scraper.export_results(results_df, 'excel')
-            scraper.export_results(results_df, 'json')
+            exported = export(results_df, args, args.formats or ['csv', 'excel', 'json'])
             
-            print("\nResults have been saved as:")
-            print("- output/regatta_results.csv")
-            print("- output/regatta_results.xlsx")
-            print("- output/regatta_results.json")
+            if exported:
+                print("\nResults have been saved as:")
+            for fmt, result in exported.items():
+                if 'path' in result:
+                    print(f"- {os.path.relpath(result['path'])}")
         else:
             print("\nNo results were found in the data")
         
@@ -61,7 +147,8 @@ def main():
         traceback.print_exc()
     
     print("\nDone!")
-    input("Press Enter to exit...")
+    if not args.url:
+        input("Press Enter to exit...")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,215 @@
+import re
+from datetime import date
+from sqlalchemy import case, delete, func, insert, literal, select
+from models import BoatStat, ClubStat, Entry, Fleet, FleetSeries, Regatta, SkipperStat
+from normalize import clear_fleets, load_results
+
+CHUNK = 500
+
+entries = Entry.__table__
+fleets = Fleet.__table__
+regattas = Regatta.__table__
+skipper_stats = SkipperStat.__table__
+club_stats = ClubStat.__table__
+boat_stats = BoatStat.__table__
+fleet_series = FleetSeries.__table__
+
+_results = entries.join(fleets, fleets.c.id == entries.c.fleet_id).join(regattas, regattas.c.id == fleets.c.regatta_id)
+
+
+def _chunks(values):
+    values = sorted(values)
+    for start in range(0, len(values), CHUNK):
+        yield values[start:start + CHUNK]
+
+
+def affected_keys(conn, fleet_ids=None, regatta_names=None):
+    """Skippers, clubs, sail numbers and (fleet, season) series touched by these fleets/regattas."""
+    query = select(entries.c.skipper, entries.c.yacht_club, entries.c.sail_number,
+                   fleets.c.name, regattas.c.start_date).select_from(_results)
+    if fleet_ids is not None:
+        query = query.where(fleets.c.id.in_(list(fleet_ids)))
+    if regatta_names is not None:
+        query = query.where(regattas.c.name.in_(list(regatta_names)))
+
+    keys = {"skippers": set(), "clubs": set(), "sails": set(), "series": set()}
+    for skipper, club, sail, fleet_name, start_date in conn.execute(query):
+        if skipper:
+            keys["skippers"].add(skipper)
+        if club:
+            keys["clubs"].add(club)
+        if sail:
+            keys["sails"].add(sail)
+        if start_date is not None:
+            keys["series"].add((fleet_name, start_date.year))
+    return keys
+
+
+def merge_keys(*key_sets):
+    merged = {"skippers": set(), "clubs": set(), "sails": set(), "series": set()}
+    for keys in key_sets:
+        for name, values in keys.items():
+            merged[name] |= values
+    return merged
+
+
+def _wins():
+    return func.sum(case((entries.c.position == 1, 1), else_=0))
+
+
+def refresh(conn, keys):
+    """Recompute just the aggregate rows for `keys` (see affected_keys)."""
+    for chunk in _chunks(keys["skippers"]):
+        conn.execute(delete(skipper_stats).where(skipper_stats.c.skipper.in_(chunk)))
+        conn.execute(insert(skipper_stats).from_select(
+            ["skipper", "skipper_key", "entries", "wins", "podiums", "avg_position", "best_position", "last_date"],
+            select(entries.c.skipper, func.lower(entries.c.skipper), func.count(), _wins(),
+                   func.sum(case((entries.c.position <= 3, 1), else_=0)), func.avg(entries.c.position),
+                   func.min(entries.c.position), func.max(regattas.c.start_date))
+            .select_from(_results).where(entries.c.skipper.in_(chunk)).group_by(entries.c.skipper)
+        ))
+
+    for chunk in _chunks(keys["clubs"]):
+        conn.execute(delete(club_stats).where(club_stats.c.yacht_club.in_(chunk)))
+        conn.execute(insert(club_stats).from_select(
+            ["yacht_club", "club_key", "entries", "skippers", "wins", "avg_position"],
+            select(entries.c.yacht_club, func.lower(entries.c.yacht_club), func.count(),
+                   func.count(entries.c.skipper.distinct()), _wins(), func.avg(entries.c.position))
+            .where(entries.c.yacht_club.in_(chunk)).group_by(entries.c.yacht_club)
+        ))
+
+    for chunk in _chunks(keys["sails"]):
+        conn.execute(delete(boat_stats).where(boat_stats.c.sail_number.in_(chunk)))
+        conn.execute(insert(boat_stats).from_select(
+            ["sail_number", "boat_name", "entries", "wins", "best_position", "avg_position", "last_date"],
+            select(entries.c.sail_number, func.max(entries.c.boat_name), func.count(), _wins(),
+                   func.min(entries.c.position), func.avg(entries.c.position), func.max(regattas.c.start_date))
+            .select_from(_results).where(entries.c.sail_number.in_(chunk)).group_by(entries.c.sail_number)
+        ))
+
+    for fleet_name, season in sorted(keys["series"]):
+        conn.execute(delete(fleet_series).where(fleet_series.c.fleet_name == fleet_name,
+                                                fleet_series.c.season == season))
+        conn.execute(insert(fleet_series).from_select(
+            ["fleet_name", "season", "skipper", "fleet_key", "regattas", "series_points", "best_position"],
+            select(fleets.c.name, literal(season), entries.c.skipper, literal(fleet_name.lower()),
+                   func.count(), func.sum(entries.c.position), func.min(entries.c.position))
+            .select_from(_results)
+            .where(fleets.c.name == fleet_name, entries.c.skipper != "", entries.c.position.isnot(None),
+                   regattas.c.start_date.between(date(season, 1, 1), date(season, 12, 31)))
+            .group_by(fleets.c.name, entries.c.skipper)
+        ))
+
+
+def load_and_refresh(conn, records, source_url=None, emptied_fleets=()):
+    """load_results plus an incremental refresh of every aggregate the load touched.
+
+    `emptied_fleets` are (regatta name, fleet name) pairs with no boats left: they are
+    deleted, and the aggregates they fed are refreshed too.
+    """
+    regatta_names = {record["regatta_name"] for record in records} | {name for name, _ in emptied_fleets}
+    before = affected_keys(conn, regatta_names=regatta_names)  # catches boats dropped by a re-scrape
+    clear_fleets(conn, emptied_fleets)
+    fleet_ids = load_results(conn, records, source_url)
+    refresh(conn, merge_keys(before, affected_keys(conn, fleet_ids=fleet_ids)))
+    return fleet_ids
+
+
+def rebuild_all(conn):
+    """Recompute every aggregate from scratch (after a migration or backfill)."""
+    for table in (skipper_stats, club_stats, boat_stats, fleet_series):
+        conn.execute(delete(table))
+    refresh(conn, affected_keys(conn))
+
+
+# ✅ Intent matching for /query-db: cheap regexes routed to indexed aggregate lookups
+INTENTS = [
+    ("skipper_leaderboard", re.compile(r"\b(leaderboard|top|best|most wins|winningest)\b.*\b(skippers?|sailors?|helms?)\b|\bwho (wins|won) (the )?most\b", re.I)),
+    ("club_standings", re.compile(r"\b(club standings|top clubs?|best clubs?|clubs? (ranking|standings|leaderboard))\b", re.I)),
+    ("fleet_series", re.compile(r"\b(?:series|standings)(?:\s+(?:standings|points|results))*(?:\s+(?:for|in|of))?\s+(?:the\s+)?(?P<fleet>.+?)(?:\s+(?:fleet|class))?(?:\s+(?:in\s+)?(?P<season>(?:19|20)\d{2}))?\s*\??$", re.I)),
+    ("boat_history", re.compile(r"\b(?:sail(?:\s*(?:number|no\.?|#))?|boat)\s+#?(?P<sail>[A-Za-z]*\d[\w-]*)", re.I)),
+    ("club_stats", re.compile(r"\b(?:club average|average finish|how (?:is|are|did) (?:the )?)\s*(?:for\s+|of\s+)?(?P<club>.+?(?:yacht club|sailing club|sailing squadron|yc|sc|club))\b", re.I)),
+    ("skipper_stats", re.compile(r"\b(?:how (?:did|has|is|does)|stats for|results for|about)\s+(?P<skipper>.+?)(?:\s+(?:do|doing|done|perform|performing|sail|sailing|finish|finishing))?(?:\s+(?:this|last) (?:season|year))?\s*\??$", re.I)),
+]
+
+HELP = ("I can answer questions about skipper leaderboards, club standings, boat histories "
+        "(e.g. 'sail 12345') and fleet series points (e.g. 'series standings for Laser 2024').")
+
+
+def match_intent(question):
+    for name, pattern in INTENTS:
+        match = pattern.search(question)
+        if match:
+            return name, {k: v.strip() for k, v in match.groupdict().items() if v}
+    return None, {}
+
+
+def _avg(value):
+    return f"{value:.1f}" if value is not None else "n/a"
+
+
+def _rows(conn, query):
+    return [dict(row._mapping) for row in conn.execute(query)]
+
+
+def answer_question(conn, question):
+    """Route a chat question to an aggregate lookup; returns (answer, intent, rows)."""
+    intent, params = match_intent(question)
+
+    if intent == "skipper_leaderboard":
+        rows = _rows(conn, select(skipper_stats.c.skipper, skipper_stats.c.wins, skipper_stats.c.entries,
+                                  skipper_stats.c.avg_position)
+                     .order_by(skipper_stats.c.wins.desc(), skipper_stats.c.avg_position).limit(10))
+        lines = [f"{i}. {r['skipper']}: {r['wins']} wins in {r['entries']} regattas" for i, r in enumerate(rows, 1)]
+        return "Top skippers:\n" + "\n".join(lines) if rows else "No results loaded yet.", intent, rows
+
+    if intent == "club_standings":
+        rows = _rows(conn, select(club_stats.c.yacht_club, club_stats.c.wins, club_stats.c.entries,
+                                  club_stats.c.skippers, club_stats.c.avg_position)
+                     .order_by(club_stats.c.wins.desc(), club_stats.c.avg_position).limit(10))
+        lines = [f"{i}. {r['yacht_club']}: {r['wins']} wins, {r['skippers']} skippers" for i, r in enumerate(rows, 1)]
+        return "Club standings:\n" + "\n".join(lines) if rows else "No results loaded yet.", intent, rows
+
+    if intent == "fleet_series":
+        fleet = params.get("fleet", "").lower()
+        season = int(params["season"]) if "season" in params else None
+        query = select(fleet_series.c.season, fleet_series.c.fleet_name, fleet_series.c.skipper,
+                       fleet_series.c.regattas, fleet_series.c.series_points).where(fleet_series.c.fleet_key == fleet)
+        if season is None:
+            season = conn.execute(select(func.max(fleet_series.c.season))
+                                  .where(fleet_series.c.fleet_key == fleet)).scalar()
+        rows = _rows(conn, query.where(fleet_series.c.season == season)
+                     .order_by(fleet_series.c.series_points).limit(10)) if season else []
+        if not rows:
+            return f"No series results for {params.get('fleet', 'that fleet')}.", intent, rows
+        lines = [f"{i}. {r['skipper']}: {r['series_points']:g} pts over {r['regattas']} regattas"
+                 for i, r in enumerate(rows, 1)]
+        return f"{rows[0]['fleet_name']} series {season}:\n" + "\n".join(lines), intent, rows
+
+    if intent == "boat_history":
+        rows = _rows(conn, select(boat_stats).where(boat_stats.c.sail_number == params["sail"]))
+        if not rows:
+            return f"No results for sail {params['sail']}.", intent, rows
+        r = rows[0]
+        return (f"Sail {r['sail_number']} ({r['boat_name'] or 'no name'}): {r['entries']} regattas, "
+                f"{r['wins']} wins, best finish {r['best_position']}, average {_avg(r['avg_position'])}"), intent, rows
+
+    if intent == "skipper_stats":
+        rows = _rows(conn, select(skipper_stats).where(skipper_stats.c.skipper_key == params["skipper"].lower())
+                     .order_by(skipper_stats.c.entries.desc()))
+        if rows:
+            r = rows[0]
+            return (f"{r['skipper']}: {r['entries']} regattas, {r['wins']} wins, {r['podiums']} podiums, "
+                    f"average finish {_avg(r['avg_position'])}, last sailed {r['last_date'] or 'unknown'}"), intent, rows
+        intent, params = "club_stats", {"club": params["skipper"]}  # "How is Davis Island doing?"
+
+    if intent == "club_stats":
+        rows = _rows(conn, select(club_stats).where(club_stats.c.club_key == params["club"].lower())
+                     .order_by(club_stats.c.entries.desc()))
+        if not rows:
+            return f"No results for {params['club']}.", intent, rows
+        r = rows[0]
+        return (f"{r['yacht_club']}: {r['entries']} entries by {r['skippers']} skippers, "
+                f"{r['wins']} wins, average finish {_avg(r['avg_position'])}"), intent, rows
+
+    return HELP, None, []
@@ -0,0 +1,248 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import metrics
+
+try:
+    import brotli
+except ImportError:  # br is only offered when the brotli package is installed
+    brotli = None
+
+# ✅ Artifact store tuning (override in environment variables)
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "/tmp/artifacts")  # /tmp is writable on Render
+ARTIFACT_TTL = int(os.getenv("ARTIFACT_TTL", str(24 * 3600)))
+ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "500"))
+CHUNK_SIZE = 64 * 1024
+
+ENCODINGS = ("br", "gzip", "identity")  # server preference when the client accepts several
+SUFFIXES = {"identity": ".blob", "gzip": ".gz", "br": ".br"}
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def negotiate_encoding(accept_encoding, available):
+    """Pick the best of `available` codings allowed by an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([\d.]+)", params)
+        if match:
+            quality = float(match.group(1))
+        accepted[name.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, accepted.get("*", 1.0 if encoding == "identity" else 0.0))
+        if quality > 0:
+            return encoding
+    return "identity"
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single 'bytes=' range, None for no/ignored range, ValueError if unsatisfiable."""
+    match = RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"range {header} outside {size} bytes")
+    return start, end
+
+
+def iter_file(path, start, end):
+    """Yield bytes start..end (inclusive) of a file in CHUNK_SIZE pieces."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class ArtifactStore:
+    """Content-addressed store of export files with precompressed variants and age/size GC."""
+
+    def __init__(self, directory=ARTIFACT_DIR, ttl=ARTIFACT_TTL, max_bytes=ARTIFACT_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, artifact_id, suffix):
+        if not re.fullmatch(r"[0-9a-f]{16,64}", artifact_id or ""):
+            raise KeyError(artifact_id)
+        return os.path.join(self.directory, artifact_id + suffix)
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, content, filename, content_type="text/csv"):
+        """Store `content` (str or bytes); returns its artifact ID. Identical content shares one ID."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        artifact_id = hashlib.sha256(data).hexdigest()[:32]
+        meta_path = self._path(artifact_id, ".json")
+
+        if os.path.exists(meta_path):
+            os.utime(meta_path)  # ✅ re-exported: restart its TTL
+            return artifact_id
+
+        self._write(self._path(artifact_id, ".blob"), data)
+        encodings = ["identity"]
+        self._write(self._path(artifact_id, ".gz"), gzip.compress(data, compresslevel=6))
+        encodings.append("gzip")
+        if brotli is not None:
+            self._write(self._path(artifact_id, ".br"), brotli.compress(data, quality=5))
+            encodings.append("br")
+        meta = {"filename": filename, "content_type": content_type, "size": len(data),
+                "encodings": encodings, "created_at": time.time()}
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+        metrics.inc("artifacts_stored")
+        self.gc(keep=artifact_id)  # ✅ never evict the ID we are about to hand out
+        return artifact_id
+
+    def meta(self, artifact_id):
+        """Metadata for an artifact, or None if it does not exist (or expired)."""
+        try:
+            meta_path = self._path(artifact_id, ".json")
+            if time.time() - os.path.getmtime(meta_path) > self.ttl:
+                return None
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (KeyError, OSError, ValueError):
+            return None
+
+    def path(self, artifact_id, encoding="identity"):
+        return self._path(artifact_id, SUFFIXES[encoding])
+
+    def latest(self):
+        """ID of the most recently stored artifact, or None."""
+        newest = None
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+                if newest is None or mtime > newest[0]:
+                    newest = (mtime, name[:-5])
+        return newest[1] if newest else None
+
+    def remove(self, artifact_id):
+        for suffix in (".json", ".blob", ".gz", ".br"):
+            try:
+                os.remove(self._path(artifact_id, suffix))
+            except OSError:
+                pass
+
+    def gc(self, keep=None):
+        """Drop artifacts older than the TTL, then the oldest ones until the store fits in max_bytes.
+
+        `keep` is an artifact ID to spare (the one just stored).
+        """
+        with self._lock:
+            sizes = {}
+            mtimes = {}
+            for name in os.listdir(self.directory):
+                artifact_id, suffix = os.path.splitext(name)
+                if suffix not in (".json", ".blob", ".gz", ".br") or not re.fullmatch(r"[0-9a-f]{16,64}", artifact_id):
+                    continue  # in-flight .tmp writes
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                sizes[artifact_id] = sizes.get(artifact_id, 0) + stat.st_size
+                mtimes[artifact_id] = max(mtimes.get(artifact_id, 0), stat.st_mtime)
+
+            now = time.time()
+            total = sum(sizes.values())
+            removed = 0
+            for artifact_id in sorted(sizes, key=lambda a: mtimes.get(a, 0)):
+                if now - mtimes.get(artifact_id, 0) < self.ttl and total <= self.max_bytes:
+                    break
+                if artifact_id == keep:
+                    continue
+                self.remove(artifact_id)
+                total -= sizes[artifact_id]
+                removed += 1
+            if removed:
+                metrics.inc("artifacts_evicted", removed)
+            return removed
+
+
+def prepare_download(store, artifact_id, request_headers):
+    """Work out a download response: (status, headers, body iterator or None).
+
+    Negotiates br/gzip/identity from Accept-Encoding, answers If-None-Match
+    with 304 and single byte ranges with 206 (ranges apply to the encoded
+    bytes). Shared by the Flask and ASGI download routes.
+    """
+    meta = store.meta(artifact_id)
+    if meta is None:
+        return 404, {}, None
+
+    encoding = negotiate_encoding(request_headers.get("Accept-Encoding"), meta["encodings"])
+    path = store.path(artifact_id, encoding)
+    size = os.path.getsize(path)
+    etag = f'"{artifact_id}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+        "Content-Type": meta["content_type"],
+        "Content-Disposition": f'attachment; filename="{meta["filename"]}"',
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+
+    if etag in [tag.strip() for tag in request_headers.get("If-None-Match", "").split(",")]:
+        return 304, headers, None
+
+    try:
+        byte_range = None
+        if request_headers.get("If-Range", etag) == etag:
+            byte_range = parse_range(request_headers.get("Range"), size)
+    except ValueError:
+        return 416, {"Content-Range": f"bytes */{size}"}, None
+
+    metrics.inc("artifact_downloads", encoding=encoding)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return 200, headers, iter_file(path, 0, size - 1)
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return 206, headers, iter_file(path, start, end)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide artifact store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
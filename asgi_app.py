@@ -0,0 +1,246 @@
+# ASGI serving mode: the routes of main.py, chatgpt_scraper.scraper_bp (under /api) and
+# scrape_race_results.app with the same payloads, on one event loop.
+#
+#     uvicorn asgi_app:app --host 0.0.0.0 --port 8000 --workers 2
+#
+# Scrapes run on the same job queue as main.py (JOB_WORKERS, JOB_QUEUE_MAX, progress and
+# cancel). OpenAI handlers await the shared async OpenAI path (openai_formatter.submit), so
+# a timeout cancels the request itself; database handlers run on a bounded executor.
+import asyncio
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+import metrics
+from artifacts import get_store, prepare_download
+from chatgpt_scraper import fetch_race_results_from_chatgpt_async
+from driver_pool import pool_stats
+from jobs import get_queue, sse_stream
+from llm_cache import cache_stats
+from main import run_fetch_results
+from openai_formatter import submit
+from scrape_race_results import answer_query, fetch_race_data_async, store_results
+import startup
+
+# ✅ ASGI tuning (override in environment variables)
+BLOCKING_WORKERS = int(os.getenv("ASGI_BLOCKING_WORKERS", "8"))  # threads for database handlers
+REQUEST_TIMEOUT = float(os.getenv("ASGI_REQUEST_TIMEOUT", "300"))
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+app = FastAPI(title="Regatta results")
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+def _error(message, status_code=200):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+async def _json(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+async def with_timeout(coro):
+    """Run an OpenAI coroutine under ASGI_REQUEST_TIMEOUT; returns (result, None) or (None, 504 response).
+
+    The coroutine runs on the OpenAI loop; on timeout it is cancelled there,
+    which aborts the HTTP request instead of leaving a thread waiting on it.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(submit(coro)), REQUEST_TIMEOUT), None
+    except asyncio.TimeoutError:
+        metrics.inc("request_timeouts")
+        return None, _error(f"Request timed out after {REQUEST_TIMEOUT:g}s", 504)
+
+
+async def run_blocking(fn, *args):
+    """Run sync handler code on the bounded executor."""
+    return await asyncio.get_running_loop().run_in_executor(_blocking_executor, fn, *args)
+
+
+# --- main.py routes ---
+
+def _submit_scrape(data):
+    """Queue a fetch-results job; returns (job, None) or (None, error response)."""
+    url = data.get("url")
+    if not url:
+        print("❌ No URL provided!")
+        return None, _error("URL is required", 400)
+    try:
+        return get_queue().submit("fetch-results", run_fetch_results, url=url,
+                                  no_cache=bool(data.get("no_cache"))), None
+    except queue.Full:
+        return None, _error("Too many scrapes queued, try again later", 503)
+
+
+@app.post("/fetch-results")
+async def fetch_results(request: Request):
+    """API endpoint to scrape, format, and save race results to GitHub.
+
+    Runs on the job queue and waits up to ASGI_REQUEST_TIMEOUT for the result;
+    a job still running then is cancelled at its next stage.
+    """
+    job, error = _submit_scrape(await _json(request))
+    if error:
+        return error
+
+    done, _ = await asyncio.wait({asyncio.wrap_future(job.future)}, timeout=REQUEST_TIMEOUT)
+    if not done:
+        get_queue().cancel(job.id)
+        metrics.inc("request_timeouts")
+        return JSONResponse({"error": f"Request timed out after {REQUEST_TIMEOUT:g}s", "job_id": job.id},
+                            status_code=504)
+    payload, status_code = job.outcome()
+    return JSONResponse(payload, status_code=status_code)
+
+
+@app.post("/trigger-scrape")
+async def trigger_scrape(request: Request):
+    """Queue a scrape and return its job ID without waiting for it."""
+    job, error = _submit_scrape(await _json(request))
+    if error:
+        return error
+    return JSONResponse({"message": f"Queued scrape job {job.id}", "job_id": job.id,
+                         "progress_url": f"/get-progress/{job.id}/stream"}, status_code=202)
+
+
+@app.get("/get-progress")
+@app.get("/get-progress/{job_id}")
+async def get_progress(job_id: str = None):
+    """Progress snapshot for one job (or the most recent one)."""
+    job = get_queue().get(job_id) if job_id else get_queue().latest()
+    if job is None:
+        return _error("Unknown job", 404) if job_id else {"progress": []}
+    return job.to_dict()
+
+
+@app.get("/get-progress/{job_id}/stream")
+async def stream_progress(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's progress; resumes from Last-Event-ID."""
+    job = get_queue().get(job_id)
+    if job is None:
+        return _error("Unknown job", 404)
+    last_seq = int(request.headers.get("Last-Event-ID", 0) or 0)
+    return StreamingResponse(sse_stream(job, last_seq), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.post("/cancel-scrape/{job_id}")
+async def cancel_scrape(job_id: str):
+    """Cancel a queued job, or stop a running one at its next stage."""
+    job = get_queue().cancel(job_id)
+    if job is None:
+        return _error("Unknown job", 404)
+    return job.to_dict(events=False)
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return {"jobs": get_queue().list(), "stats": get_queue().stats()}
+
+
+@app.get("/admin")
+async def admin():
+    return FileResponse(os.path.join(TEMPLATES_DIR, "admin.html"))
+
+
+@app.get("/pool-stats")
+async def get_pool_stats():
+    from http_client import stats as http_stats
+
+    return {**pool_stats(), "http": http_stats()}
+
+
+@app.get("/llm-cache-stats")
+async def get_llm_cache_stats():
+    return await run_blocking(cache_stats)
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    ready, payload = startup.readiness()
+    return JSONResponse(payload, status_code=200 if ready else 503)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# --- chatgpt_scraper.scraper_bp routes (mounted under /api) ---
+
+@app.post("/api/fetch-results")
+async def api_fetch_results(request: Request):
+    """API endpoint to fetch race results from ChatGPT and save CSV."""
+    data = await _json(request)
+    url = data.get("url")
+    if not url:
+        return _error("URL is required", 400)
+
+    result, timed_out = await with_timeout(fetch_race_results_from_chatgpt_async(url, bool(data.get("no_cache"))))
+    return timed_out or result
+
+
+@app.get("/api/download-csv")
+@app.get("/api/download-csv/{artifact_id}")
+async def download_csv(request: Request, artifact_id: str = None):
+    store = get_store()
+    status, headers, body = prepare_download(store, artifact_id or store.latest(), request.headers)
+    if status == 404:
+        return _error("No CSV file found", 404)
+    if body is None:
+        return Response(status_code=status, headers=headers)
+    return StreamingResponse(body, status_code=status, headers=headers)
+
+
+# --- scrape_race_results.app routes ---
+
+@app.get("/")
+async def index():
+    return FileResponse(os.path.join(TEMPLATES_DIR, "index.html"))
+
+
+@app.post("/scrape_chatgpt")
+async def scrape_chatgpt(request: Request):
+    data = await _json(request)
+    url = data.get("url")
+    if not url:
+        return _error("URL is required", 400)
+
+    csv_data, timed_out = await with_timeout(fetch_race_data_async(url, bool(data.get("no_cache"))))
+    return timed_out or {"csv_data": csv_data}
+
+
+@app.post("/send_to_db")
+async def send_to_db(request: Request):
+    data = await _json(request)
+    csv_text = data.get("csv_data")
+    if not csv_text:
+        return _error("CSV data is required", 400)
+    return await run_blocking(store_results, csv_text, bool(data.get("full")))
+
+
+@app.get("/chatbot")
+async def chatbot():
+    return FileResponse(os.path.join(TEMPLATES_DIR, "chatbot.html"))
+
+
+@app.post("/query-db")
+async def query_db(request: Request):
+    data = await _json(request)
+    question = data.get("query", "").strip()
+    if not question:
+        return _error("Query is required", 400)
+    return await run_blocking(answer_query, question)
+
+
+startup.on_import()
@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+import pandas as pd
+import scrape_regatta_results as scraper
+from regatta_urls import regatta_url, regatta_id_from_url, is_text_results_url
+
+def parse_id_range(spec):
+    """Expand '29000-29010,29234' into a list of regatta_ids (ValueError on a malformed or reversed range)"""
+    ids = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = (int(p) for p in part.split('-', 1))
+            if end < start:
+                raise ValueError(f"range {part} ends before it starts (did you mean {end}-{start}?)")
+            ids.extend(str(i) for i in range(start, end + 1))
+        else:
+            ids.append(part)
+    return ids
+
+def read_url_file(path):
+    """Read one regatta_id or URL per line, skipping blanks and # comments"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least 1/rate seconds"""
+
+    def __init__(self, rate_per_host):
+        self.interval = 1.0 / rate_per_host if rate_per_host > 0 else 0.0
+        self.next_allowed = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed.get(host, now))
+            self.next_allowed[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+def scrape_with_retry(url, limiter, retries=3, backoff=1.0):
+    """Scrape one regatta, retrying failures with exponential backoff and jitter.
+
+    A missing regatta (404, or a server-rendered page without results) is
+    final, and so is a page that never became ready in the browser.
+    """
+    for attempt in range(retries + 1):
+        limiter.wait(url)
+        try:
+            return scraper.scrape_regatta_results(url, raise_errors=True,
+                                                  browser_fallback=not is_text_results_url(url))
+        except (LookupError, TimeoutError):
+            raise
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+
+def crawl(entries, workers=4, rate_per_host=2.0, retries=3, backoff=1.0):
+    """Scrape many regattas concurrently and merge them into one DataFrame.
+
+    Returns (df, summary). Every row carries a regatta_id column next to
+    Regatta_Name so results from different regattas stay distinguishable.
+    """
+    urls = list(dict.fromkeys(regatta_url(e) for e in entries))
+    limiter = HostRateLimiter(rate_per_host)
+    frames = []
+    failures = {}
+    empty = []
+    fetch_paths = {}
+    started = time.perf_counter()
+
+    print(f"Crawling {len(urls)} regattas with {workers} workers ({rate_per_host}/s per host)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(scrape_with_retry, url, limiter, retries, backoff): url for url in urls}
+        for done, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            regatta_id = regatta_id_from_url(url)
+            try:
+                df = future.result()
+            except LookupError:
+                df = None  # ✅ a gap in the ID range: no regatta behind this ID
+            except Exception as e:
+                failures[regatta_id] = str(e)
+                print(f"[{done}/{len(urls)}] FAILED regatta {regatta_id}: {e}")
+                continue
+
+            if df is None or df.empty:
+                empty.append(regatta_id)
+                print(f"[{done}/{len(urls)}] no results for regatta {regatta_id}")
+                continue
+
+            path = df.attrs.get('fetch_path', 'unknown')
+            fetch_paths[path] = fetch_paths.get(path, 0) + 1
+            df.insert(0, 'regatta_id', regatta_id)
+            frames.append(df)
+            print(f"[{done}/{len(urls)}] regatta {regatta_id}: {len(df)} rows via {path}")
+
+    elapsed = time.perf_counter() - started
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    summary = {
+        'regattas': len(urls),
+        'succeeded': len(frames),
+        'empty': len(empty),
+        'failed': len(failures),
+        'rows': len(merged),
+        'elapsed_seconds': round(elapsed, 2),
+        'regattas_per_second': round(len(urls) / elapsed, 2) if elapsed > 0 else 0.0,
+        'fetch_paths': fetch_paths,
+        'failures': failures,
+    }
+    return merged, summary
+
+def print_summary(summary):
+    print("\nBatch summary")
+    print("-" * 30)
+    print(f"Regattas:   {summary['regattas']}")
+    print(f"Succeeded:  {summary['succeeded']}")
+    print(f"Empty:      {summary['empty']}")
+    print(f"Failed:     {summary['failed']}")
+    print(f"Rows:       {summary['rows']}")
+    print(f"Elapsed:    {summary['elapsed_seconds']}s ({summary['regattas_per_second']} regattas/s)")
+    print(f"Served by:  {summary['fetch_paths']}")
+    for regatta_id, error in summary['failures'].items():
+        print(f"  {regatta_id}: {error}")
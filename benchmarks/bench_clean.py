@@ -0,0 +1,67 @@
+"""Memory and clean time on a season-sized results frame: all-object strings vs typed columns.
+
+    python benchmarks/bench_clean.py --regattas 300 --categories 10 --boats 30
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scrape_regatta_results as scraper
+from fixtures import scraped_season_frame
+
+LEGACY_CLUB_MAPPINGS = {
+    'SSS': 'Sarasota Sailing Squadron',
+    'Sss': 'Sarasota Sailing Squadron',
+    'Sarasota Sailing Squa': 'Sarasota Sailing Squadron'
+}
+
+
+def legacy_clean(df):
+    """clean_results before typed columns: strip every object column, then a fixed replace"""
+    for col in df.columns:
+        if df[col].dtype == "object":
+            df[col] = df[col].str.strip()
+    df['Yacht_Club'] = df['Yacht_Club'].replace(LEGACY_CLUB_MAPPINGS)
+    return df
+
+
+def megabytes(df):
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=300)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--boats", type=int, default=30)
+    args = parser.parse_args()
+
+    raw = scraped_season_frame(args.regattas, args.categories, args.boats)
+    print(f"{len(raw):,} rows ({args.regattas} regattas)")
+
+    started = time.perf_counter()
+    legacy = legacy_clean(raw.copy())
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    typed = scraper.clean_results(raw.copy())
+    typed_seconds = time.perf_counter() - started
+
+    # Frames straight from parse_regatta_text are typed already; cleaning only touches categories
+    retyped = typed.copy()
+    started = time.perf_counter()
+    scraper.clean_results(retyped)
+    clean_only_seconds = time.perf_counter() - started
+
+    assert (legacy["Yacht_Club"] == typed["Yacht_Club"].astype(object)).all()
+    print(f"{'':<22}{'memory MB':>10}{'clean s':>10}")
+    print(f"{'object columns':<22}{megabytes(legacy):10.1f}{legacy_seconds:10.3f}")
+    print(f"{'typed (incl. cast)':<22}{megabytes(typed):10.1f}{typed_seconds:10.3f}")
+    print(f"{'typed, already cast':<22}{'':>10}{clean_only_seconds:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
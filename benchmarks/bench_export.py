@@ -0,0 +1,80 @@
+"""Export timings on a large frame: three sequential export calls vs one concurrent export_formats call.
+
+    python benchmarks/bench_export.py --rows 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import exporter
+import scrape_regatta_results as scraper
+from fixtures import synthetic_text
+
+
+def results_frame(rows, regattas=20, categories=10):
+    """Cleaned results for `regattas` synthetic regattas, about `rows` entries in total"""
+    boats = max(1, rows // (regattas * categories))
+    page = synthetic_text(categories, boats)
+    with contextlib.redirect_stdout(io.StringIO()):
+        one = scraper.clean_results(scraper.parse_regatta_text(page))
+    frames = []
+    for r in range(regattas):
+        frame = one.copy()
+        frame["Regatta_Name"] = f"Synthetic Regatta {r}"
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def sequential_baseline(df, output_dir):
+    """The old CLI path: csv, excel (openpyxl) and json one after another"""
+    timings = {}
+    for fmt, write in (("csv", lambda p: df.to_csv(p, index=False)),
+                       ("excel", lambda p: df.to_excel(p, index=False, engine="openpyxl")),
+                       ("json", lambda p: df.to_json(p, orient="records"))):
+        started = time.perf_counter()
+        write(os.path.join(output_dir, "regatta_results" + exporter.FORMAT_SUFFIXES[fmt]))
+        timings[fmt] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--formats", default="csv,excel,json,parquet,arrow")
+    args = parser.parse_args()
+
+    df = results_frame(args.rows)
+    print(f"{len(df):,} rows, {df['Regatta_Name'].nunique()} regattas x {df['Category'].nunique()} categories")
+    output_dir = tempfile.mkdtemp(prefix="bench_export_")
+    try:
+        started = time.perf_counter()
+        baseline = sequential_baseline(df, output_dir)
+        baseline_total = time.perf_counter() - started
+
+        formats = args.formats.split(",")
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = exporter.export_formats(df, formats, output_dir=output_dir, basename="bench")
+        total = time.perf_counter() - started
+
+        print(f"{'format':<10}{'sequential s':>14}{'concurrent s':>14}")
+        for fmt in formats:
+            result = results[fmt]
+            new = f"{result['seconds']:14.2f}" if "seconds" in result else f"{'error':>14}"
+            old = f"{baseline[fmt]:14.2f}" if fmt in baseline else f"{'-':>14}"
+            print(f"{fmt:<10}{old}{new}")
+        print(f"{'wall':<10}{baseline_total:14.2f}{total:14.2f}   (excel engine: {exporter.EXCEL_ENGINE})")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Round trips and connections per regatta: ad-hoc requests.get vs the shared pooled client.
+
+    python benchmarks/bench_http.py --regattas 40 --latency 0.02
+
+Each regatta is validated and then scraped from the local stand-in server
+(benchmarks/stand_in.py), which adds --latency seconds to every new
+connection to mimic a TLS handshake to a remote host. The "before" run is the
+old code: an unpooled requests.get for validation and a second one for the
+page. The "after" run is validate_url() + scrape_regatta_results(). That run
+reuses the validation response and keeps connections alive. A last run
+serves 503 twice per page to show the bounded retries.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stand_in import RegattaServer
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_http_")
+os.environ.setdefault("PAGE_CACHE_DIR", os.path.join(_tmpdir, "pages"))
+os.environ.setdefault("METRICS_ENABLED", "0")
+os.environ.setdefault("HTTP_BACKOFF", "0.05")
+
+import requests
+import http_client
+import scrape_regatta_results as scraper
+
+
+def slow_handshakes(server, latency):
+    """Delay every new connection the stand-in accepts by `latency` seconds."""
+    handler = server.httpd.RequestHandlerClass
+    setup = handler.setup
+
+    def delayed_setup(self):
+        time.sleep(latency)
+        setup(self)
+
+    handler.setup = delayed_setup
+
+
+def urls(server, regattas, tag, extra=""):
+    return [f"{server.base_url}/synthetic/text?categories=4&boats=20&races=6&{tag}={i}{extra}" for i in range(regattas)]
+
+
+def run_before(server, regattas):
+    for url in urls(server, regattas, "before"):
+        requests.get(url).raise_for_status()  # the old validate_url
+        scraper.parse_regatta_text(scraper.html_to_text(requests.get(url, timeout=15).text))
+
+
+def run_after(server, regattas, tag="after", extra=""):
+    rows = 0
+    for url in urls(server, regattas, tag, extra):
+        if scraper.validate_url(url):
+            rows += len(scraper.scrape_regatta_results(url, raise_errors=True, revalidate=True))
+    return rows
+
+
+def measure(label, server, fn):
+    requests_before = sum(server.requests.values())
+    connections_before = server.connections
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{sum(server.requests.values()) - requests_before:>9}{server.connections - connections_before:>13}"
+          f"{elapsed:>10.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to each new connection")
+    args = parser.parse_args()
+
+    server = RegattaServer()
+    slow_handshakes(server, args.latency)
+    print(f"{'':<28}{'requests':>9}{'connections':>13}{'time':>11}")
+    measure("before (2x requests.get)", server, lambda: run_before(server, args.regattas))
+    measure("after (pooled, reused)", server, lambda: run_after(server, args.regattas))
+    measure("after, 2x 503 per page", server, lambda: run_after(server, args.regattas, "flaky", "&fail=2"))
+    print(f"client stats: {http_client.stats()}")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Ingest benchmark: per-row ORM session.add (the old /send_to_db) vs ingest.bulk_upsert.
+
+    python benchmarks/bench_ingest.py --rows 100000
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/bench_ingest.py   # Postgres (COPY path)
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import text
+import ingest
+import scrape_race_results as app_module
+from fixtures import synthetic_csv
+
+
+def legacy_ingest(csv_text):
+    """The original /send_to_db loop (int() on every value, one ORM object per row)"""
+    import csv
+    session = app_module.SessionLocal()
+    reader = csv.reader(csv_text.splitlines())
+    next(reader)
+    for row in reader:
+        session.add(app_module.RegattaResult(
+            regatta_name=row[0], regatta_date=row[1], race_category=row[2],
+            pos=int(row[3].rstrip("T")), sail=row[4], boat=row[5], skipper=row[6],
+            yacht_club=row[7], results=row[8], total_points=int(row[9].rstrip("T"))))
+    session.commit()
+    session.close()
+
+
+def clear():
+    with app_module.engine.begin() as conn:
+        conn.execute(text("DELETE FROM regatta_results"))
+
+
+def count():
+    with app_module.engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM regatta_results")).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    csv_text = synthetic_csv(args.rows)
+    table = app_module.RegattaResult.__table__
+    print(f"{args.rows:,} rows into {app_module.engine.dialect.name}")
+
+    clear()
+    started = time.perf_counter()
+    legacy_ingest(csv_text)
+    legacy = time.perf_counter() - started
+    print(f"legacy ORM add     {legacy:8.2f} s  {args.rows / legacy:10,.0f} rows/s  ({count():,} rows)")
+
+    clear()
+    started = time.perf_counter()
+    rows, errors = ingest.parse_csv_rows(csv_text)
+    ingest.bulk_upsert(app_module.engine, table, rows)
+    bulk = time.perf_counter() - started
+    print(f"bulk upsert        {bulk:8.2f} s  {args.rows / bulk:10,.0f} rows/s  ({count():,} rows, {len(errors)} rejected)")
+
+    started = time.perf_counter()
+    rows, _ = ingest.parse_csv_rows(csv_text)
+    ingest.bulk_upsert(app_module.engine, table, rows)
+    repost = time.perf_counter() - started
+    print(f"re-post (upsert)   {repost:8.2f} s  {args.rows / repost:10,.0f} rows/s  ({count():,} rows, no duplicates)")
+    print(f"speedup x{legacy / bulk:.1f}")
+
+
+if __name__ == "__main__":
+    main()
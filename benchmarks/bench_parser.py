@@ -0,0 +1,120 @@
+"""Parse-time and peak-memory benchmark: streaming parser vs the original split-based parser.
+
+    python benchmarks/bench_parser.py --categories 50 --boats 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import scrape_regatta_results as scraper
+from fixtures import synthetic_text
+
+
+def legacy_parse_result_line(line, category_name):
+    """The parser as it was before the streaming rewrite (prints included)"""
+    try:
+        pos_match = re.match(r'^(\d+)\.?\s*', line)
+        if not pos_match:
+            print(f"No position number found in line: {line}")
+            return None
+        position = pos_match.group(1)
+        data = line[pos_match.end():].strip()
+        parts = [p.strip() for p in data.split(',')]
+        while len(parts) < 6:
+            parts.append('')
+        results_and_points = parts[-1].split(';')
+        results = parts[4] if len(parts) > 4 else ''
+        total_points = results_and_points[-1].strip() if len(results_and_points) > 1 else parts[-1]
+        result = {
+            'Category': category_name, 'Position': position, 'Sail_Number': parts[0],
+            'Boat_Name': parts[1] if parts[1] else "No Name", 'Skipper': parts[2],
+            'Yacht_Club': parts[3], 'Results': results, 'Total_Points': total_points
+        }
+        print(f"Successfully parsed: Position {position}, {result['Sail_Number']}, {result['Boat_Name']}")
+        return result
+    except Exception as e:
+        print(f"Error parsing line '{line}': {str(e)}")
+        return None
+
+
+def legacy_parse(page_text):
+    """The body of the original scrape_regatta_results after the page text was fetched"""
+    all_results = []
+    lines = page_text.split('\n')
+    regatta_name = lines[0].strip() if len(lines) > 0 else "Unknown Regatta"
+    regatta_date = ""
+    for line in lines[1:5]:
+        if '|' in line:
+            regatta_date = line.split('|')[1].strip()
+            break
+    sections = re.split(r'(\w+\s*\(\d+\s+boats\)\s*\(top\))', page_text)
+    for i in range(1, len(sections), 2):
+        if i + 1 >= len(sections):
+            break
+        category_match = re.match(r'(.*?)\s*\((\d+)\s+boats\)', sections[i])
+        if not category_match:
+            continue
+        category_name = category_match.group(1).strip()
+        results_started = False
+        for line in sections[i + 1].split('\n'):
+            line = line.strip()
+            if 'Pos,Sail' in line:
+                results_started = True
+                continue
+            if results_started and re.match(r'^\d+\.', line):
+                result = legacy_parse_result_line(line, category_name)
+                if result:
+                    result['Regatta_Name'] = regatta_name
+                    result['Regatta_Date'] = regatta_date
+                    all_results.append(result)
+    return pd.DataFrame(all_results, columns=scraper.RESULT_COLUMNS)
+
+
+def measure(name, func, page_text, repeat):
+    """Best-of-N wall time plus peak traced memory of one run"""
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            df = func(page_text)
+            times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(page_text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    print(f"{name:<10} rows={len(df):>7}  best={best * 1000:9.1f} ms  "
+          f"rows/s={len(df) / best:12,.0f}  peak={peak / 1024 / 1024:7.1f} MiB")
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--boats", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    page_text = synthetic_text(args.categories, args.boats)
+    print(f"Synthetic page: {args.categories} categories x {args.boats} boats, {len(page_text):,} chars")
+
+    legacy_time, legacy_peak = measure("legacy", legacy_parse, page_text, args.repeat)
+    measure("records", lambda text: list(scraper.iter_results(text)), page_text, args.repeat)
+    stream_time, stream_peak = measure("streaming", scraper.parse_regatta_text, page_text, args.repeat)
+    print(f"speedup x{legacy_time / stream_time:.1f}, peak memory x{legacy_peak / stream_peak:.1f} lower")
+    print("(legacy drops tied-position rows, so it also returns fewer rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Cost of publishing results: clone-per-save (the old push_to_github) vs GitPublisher.
+
+    python benchmarks/bench_publish.py --history 2000 --saves 20
+
+Runs entirely against a local bare repository seeded with --history result
+files, so it needs git but no network or GitHub credentials. Also checks the
+published tree: every regatta lands in its own file and concurrent saves
+from two publishers sharing one clone all make it to the remote.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["METRICS_ENABLED"] = "0"
+from publisher import GitPublisher, regatta_path
+
+CSV = "Pos, Sail, Boat, Skipper, Yacht Club, Results, Total Points\n" + "".join(
+    f"{i}, {1000 + i}, Boat {i}, Skipper {i}, Club, \"{i},{i}\", {2 * i}\n" for i in range(1, 40))
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def seed_remote(workdir, history):
+    remote = os.path.join(workdir, "results.git")
+    seed = os.path.join(workdir, "seed")
+    git("init", "--quiet", "--bare", "--initial-branch=main", remote)
+    git("init", "--quiet", "--initial-branch=main", seed)
+    os.makedirs(os.path.join(seed, "results"))
+    for regatta_id in range(history):
+        with open(os.path.join(seed, "results", f"{regatta_id}.csv"), "w") as f:
+            f.write(CSV.replace("Boat", f"Boat{regatta_id}"))
+    git("add", ".", cwd=seed)
+    git("-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "--quiet", "-m", "seed", cwd=seed)
+    git("remote", "add", "origin", remote, cwd=seed)
+    git("push", "--quiet", "origin", "main", cwd=seed)
+    return remote
+
+
+def clone_per_save(remote, workdir, url, content):
+    """What push_to_github used to do on every save"""
+    repo_dir = os.path.join(workdir, "legacy")
+    shutil.rmtree(repo_dir, ignore_errors=True)
+    git("clone", "--quiet", remote, repo_dir)
+    with open(os.path.join(repo_dir, "race_results.csv"), "w") as f:
+        f.write(content)
+    git("add", "race_results.csv", cwd=repo_dir)
+    git("-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "--quiet", "-m",
+        "Auto-uploaded regatta results", cwd=repo_dir)
+    git("push", "--quiet", "origin", "main", cwd=repo_dir)
+
+
+def url(i):
+    return f"https://www.regattanetwork.com/clubmgmt/applet_regatta_results.php?regatta_id={90000 + i}&media_format=1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", type=int, default=2000, help="result files already in the remote")
+    parser.add_argument("--saves", type=int, default=20)
+    parser.add_argument("--window", type=float, default=0.5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_publish_")
+    try:
+        remote = seed_remote(workdir, args.history)
+        commits_before = int(subprocess.run(["git", "--git-dir", remote, "rev-list", "--count", "main"],
+                                            capture_output=True, text=True).stdout)
+
+        started = time.perf_counter()
+        for i in range(args.saves):
+            clone_per_save(remote, workdir, url(i), CSV + f"# save {i}\n")
+        legacy = time.perf_counter() - started
+
+        # Two publishers (think two gunicorn workers) sharing one clone, saves arriving concurrently
+        repo_dir = os.path.join(workdir, "clone")
+        publishers = [GitPublisher(remote, repo_dir=repo_dir, window=args.window, author_name="bench") for _ in range(2)]
+        publishers[0].sync()  # warm clone, as after the first save
+        futures = []
+        lock = threading.Lock()
+
+        def save(i):
+            future = publishers[i % 2].publish(regatta_path(url(i)), CSV + f"# save {i}\n")
+            with lock:
+                futures.append(future)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=save, args=(i,)) for i in range(args.saves)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        shas = {future.result(timeout=120) for future in futures}
+        batched = time.perf_counter() - started
+
+        commits = int(subprocess.run(["git", "--git-dir", remote, "rev-list", "--count", "main"],
+                                     capture_output=True, text=True).stdout) - commits_before - args.saves
+        tree = subprocess.run(["git", "--git-dir", remote, "ls-tree", "--name-only", "main", "results/"],
+                              capture_output=True, text=True).stdout.split()
+        published = sum(regatta_path(url(i)) in tree for i in range(args.saves))
+
+        print(f"{args.saves} saves against a remote with {args.history} result files")
+        print(f"clone per save:  {legacy:7.2f}s  ({args.saves} clones, {args.saves} commits, all to race_results.csv)")
+        print(f"GitPublisher:    {batched:7.2f}s  ({commits} commits, {len(shas)} distinct SHAs, "
+              f"{published}/{args.saves} regatta files on the remote, window {args.window:g}s)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
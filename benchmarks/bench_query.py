@@ -0,0 +1,66 @@
+"""/query-db answer latency on a seeded database.
+
+    python benchmarks/bench_query.py --regattas 500 --fleets 4 --boats 30
+
+Seeds the same synthetic season as bench_schema.py (the migration rebuilds
+the aggregates), then times answer_question over a mix of chat questions.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_schema import seed
+import aggregates
+import models
+
+QUESTIONS = [
+    "Who are the top skippers?",
+    "Show the club standings",
+    "How did Skipper 7 do?",
+    "stats for Skipper 42 this season",
+    "How is Club 3 doing?",
+    "sail 1007 history",
+    "boat #1012",
+    "series standings for Fleet 1 2024",
+    "standings for Fleet 2",
+    "what's the weather?",
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=500)
+    parser.add_argument("--fleets", type=int, default=4)
+    parser.add_argument("--boats", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = seed(args.regattas, args.fleets, args.boats)
+    print(f"Seeded {total:,} entries in {time.perf_counter() - started:.1f}s on {models.engine.dialect.name}")
+
+    timings = {}
+    with models.engine.connect() as conn:
+        for _ in range(args.repeat):
+            for question in QUESTIONS:
+                started = time.perf_counter()
+                answer, intent, _ = aggregates.answer_question(conn, question)
+                timings.setdefault((question, intent), []).append((time.perf_counter() - started) * 1000)
+
+    print(f"{'question':<36}{'intent':<22}{'p50 ms':>9}{'p99 ms':>9}")
+    for (question, intent), times in timings.items():
+        print(f"{question:<36}{intent or '-':<22}{percentile(times, 50):9.2f}{percentile(times, 99):9.2f}")
+    everything = [t for times in timings.values() for t in times]
+    print(f"{'all':<58}{percentile(everything, 50):9.2f}{percentile(everything, 99):9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Query latency on a seeded database: legacy regatta_results vs the normalized schema.
+
+    python benchmarks/bench_schema.py --regattas 500 --fleets 4 --boats 30
+
+Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix="bench_schema_")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import text
+import ingest
+import migrate_results
+import models
+import scrape_race_results as legacy_app
+
+RACES = 8
+
+
+def seed(regattas, fleets, boats):
+    """Same synthetic season in the legacy table, then migrated into the normalized tables"""
+    rng = random.Random(42)
+    skippers = [f"Skipper {i}" for i in range(boats * 3)]
+    clubs = [f"Club {i}" for i in range(40)]
+    rows = []
+    for r in range(regattas):
+        day = r % 28 + 1
+        month = r % 12 + 1
+        for f in range(fleets):
+            for pos, skipper in enumerate(rng.sample(skippers, boats), start=1):
+                scores = [str(rng.randint(1, boats)) for _ in range(RACES)]
+                rows.append({
+                    "regatta_name": f"Regatta {r}", "regatta_date": f"{month:02d}/{day:02d}/2024",
+                    "race_category": f"Fleet {f}", "pos": pos, "sail": str(1000 + skippers.index(skipper)),
+                    "boat": f"Boat {skipper}", "skipper": skipper, "yacht_club": clubs[skippers.index(skipper) % len(clubs)],
+                    "results": ",".join(scores), "total_points": sum(int(s) for s in scores),
+                })
+    ingest.bulk_upsert(legacy_app.engine, legacy_app.RegattaResult.__table__, rows)
+    migrate_results.migrate()
+    return len(rows)
+
+
+QUERIES = {
+    "skipper season": (
+        "SELECT regatta_name, race_category, pos FROM regatta_results "
+        "WHERE skipper = :skipper AND regatta_date LIKE '%/2024'",
+        "SELECT r.name, f.name, e.position FROM entries e JOIN fleets f ON f.id = e.fleet_id "
+        "JOIN regattas r ON r.id = f.regatta_id "
+        "WHERE e.skipper = :skipper AND r.start_date BETWEEN '2024-01-01' AND '2024-12-31'",
+    ),
+    "sail lookup": (
+        "SELECT regatta_name, pos FROM regatta_results WHERE sail = :sail",
+        "SELECT f.regatta_id, e.position FROM entries e JOIN fleets f ON f.id = e.fleet_id WHERE e.sail_number = :sail",
+    ),
+    "club avg finish": (
+        "SELECT AVG(pos), COUNT(*) FROM regatta_results WHERE yacht_club = :club",
+        "SELECT AVG(position), COUNT(*) FROM entries WHERE yacht_club = :club",
+    ),
+    "skipper race wins": (
+        "SELECT results FROM regatta_results WHERE skipper = :skipper",
+        "SELECT COUNT(*) FROM race_scores s JOIN entries e ON e.id = s.entry_id "
+        "WHERE e.skipper = :skipper AND s.points = 1",
+    ),
+}
+
+
+def time_query(conn, sql, params, repeat, post=None):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(text(sql), params).fetchall()
+        if post:
+            post(rows)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def count_wins(rows):
+    """What the legacy schema forces on callers: parse the results string per row"""
+    return sum(score.strip() == "1" for (results,) in rows for score in results.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=500)
+    parser.add_argument("--fleets", type=int, default=4)
+    parser.add_argument("--boats", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = seed(args.regattas, args.fleets, args.boats)
+    print(f"Seeded {total:,} entries ({total * RACES:,} race scores) in {time.perf_counter() - started:.1f}s "
+          f"on {models.engine.dialect.name}")
+
+    params = {"skipper": "Skipper 7", "sail": "1007", "club": "Club 3"}
+    with models.engine.connect() as conn:
+        print(f"{'query':<20}{'legacy ms':>12}{'normalized ms':>16}{'speedup':>10}")
+        for name, (legacy_sql, normalized_sql) in QUERIES.items():
+            post = count_wins if name == "skipper race wins" else None
+            legacy = time_query(conn, legacy_sql, params, args.repeat, post)
+            normalized = time_query(conn, normalized_sql, params, args.repeat)
+            print(f"{name:<20}{legacy:12.2f}{normalized:16.2f}{legacy / normalized:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
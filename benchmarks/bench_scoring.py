@@ -0,0 +1,70 @@
+"""Re-scoring a season of regattas: per-row Python vs the vectorized score matrix.
+
+    python benchmarks/bench_scoring.py --regattas 2000 --categories 5 --boats 20 --races 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # normalize imports models; nothing touches the database
+
+import scoring
+from normalize import parse_race_scores
+from fixtures import random_season_frame
+
+
+def python_rescore(df):
+    """Row-by-row: parse each Results string, drop the marked count of worst scores, sort each fleet"""
+    checked = []
+    for _, fleet in df.groupby(["Regatta_Name", "Category"], sort=False):
+        entries = len(fleet) + 1
+        parsed = [parse_race_scores(results) for results in fleet["Results"]]
+        drops = max(sum(s[3] for s in scores) for scores in parsed)
+        totals = []
+        for scores in parsed:
+            points = sorted((p if p is not None else entries) for _, p, _, _ in scores)
+            totals.append(sum(points[:len(points) - drops]))
+        order = sorted(range(len(totals)), key=lambda i: totals[i])
+        for rank, i in enumerate(order, start=1):
+            checked.append((totals[i], rank, abs(totals[i] - fleet["Total_Points"].iloc[i]) > 0.01))
+    return checked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--boats", type=int, default=20)
+    parser.add_argument("--races", type=int, default=8)
+    args = parser.parse_args()
+
+    df = random_season_frame(args.regattas, args.categories, args.boats, args.races)
+    print(f"{len(df):,} entries, {args.regattas * args.categories:,} fleets, {args.races} races")
+
+    started = time.perf_counter()
+    legacy = python_rescore(df)
+    python_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matrix = scoring.score_matrix(df["Results"])
+    parse_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    checked = scoring.recompute_standings(df)
+    vector_seconds = time.perf_counter() - started
+
+    assert sum(flag for _, _, flag in legacy) == checked["Points_Mismatch"].sum()
+    print(f"score matrix {matrix.points.shape}, {checked['Points_Mismatch'].sum():,} total mismatches flagged")
+    print(f"{'':<26}{'seconds':>10}")
+    print(f"{'per-row python':<26}{python_seconds:10.2f}")
+    print(f"{'vectorized (parse only)':<26}{parse_seconds:10.2f}")
+    print(f"{'vectorized (full rescore)':<26}{vector_seconds:10.2f}")
+
+    started = time.perf_counter()
+    standings = scoring.series_standings(checked.assign(Category="All"), drops=2, position="Computed_Position")
+    print(f"{'series standings':<26}{time.perf_counter() - started:10.2f}  ({len(standings)} boats)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Concurrent-request throughput: Flask on sync workers vs the ASGI app.
+
+    python benchmarks/bench_serving.py --requests 64 --concurrency 16 --workers 4 --llm-latency 1.0
+
+Both servers answer POST /api/fetch-results against a local stand-in for the
+OpenAI API that sleeps --llm-latency seconds per completion, so the numbers
+show how many slow LLM calls each serving mode keeps in flight (the OpenAI
+rate limiter is switched off for both). The Flask app
+runs with --workers forked single-threaded processes (like gunicorn sync
+workers); the ASGI app runs in one uvicorn process.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fake_openai_app(latency):
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def completions(request):
+        await asyncio.sleep(latency)
+        return JSONResponse({
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()), "model": "gpt-4-turbo",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "Pos, Sail, Boat, Skipper, Yacht Club, Results, Total Points\n1, 123, Boat, Skipper, YC, 1, 1"}}],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70},
+        })
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+def flask_app():
+    from flask import Flask
+    from chatgpt_scraper import scraper_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(scraper_bp, url_prefix="/api")
+    return app
+
+
+def serve(mode, port, workers, latency):
+    """Child-process entry point for one server."""
+    if mode == "openai":
+        import uvicorn
+        uvicorn.run(fake_openai_app(latency), host="127.0.0.1", port=port, log_level="warning")
+    elif mode == "flask":
+        from werkzeug.serving import run_simple
+        run_simple("127.0.0.1", port, flask_app(), threaded=False, processes=workers)
+    elif mode == "asgi":
+        import uvicorn
+        uvicorn.run("asgi_app:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def start(mode, port, env, args):
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+         "--workers", str(args.workers), "--llm-latency", str(args.llm_latency)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise TimeoutError(f"{mode} server did not start on port {port}")
+
+
+async def load(base_url, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        async def one(i):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/fetch-results", json={"url": f"https://example.com/regatta/{i}"})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200 or "error" in response.json():
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4, help="Flask worker processes")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per fake OpenAI completion")
+    parser.add_argument("--serve", choices=["openai", "flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.workers, args.llm_latency)
+        return
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_serving_")
+    openai_port = free_port()
+    env = dict(os.environ,
+               OPENAI_API_KEY="bench", OPENAI_BASE_URL=f"http://127.0.0.1:{openai_port}/v1",
+               LLM_CACHE_BYPASS="1", LLM_CACHE_PATH=os.path.join(tmpdir, "llm_cache.sqlite3"),
+               LLM_REQUESTS_PER_MINUTE="0",  # measure serving concurrency, not the shared OpenAI rate budget
+               DATABASE_URL=f"sqlite:///{tmpdir}/bench.db", METRICS_ENABLED="0")
+
+    servers = [start("openai", openai_port, env, args)]
+    try:
+        print(f"{args.requests} requests, concurrency {args.concurrency}, {args.llm_latency:g}s per LLM call")
+        print(f"{'mode':<28}{'req/s':>8}{'p50 s':>8}{'p99 s':>8}{'failed':>8}")
+        for mode, label in (("flask", f"flask ({args.workers} sync workers)"), ("asgi", "asgi (1 uvicorn worker)")):
+            port = free_port()
+            server = start(mode, port, env, args)
+            servers.append(server)
+            result = asyncio.run(load(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+            print(f"{label:<28}{result['throughput']:8.2f}{result['p50']:8.2f}{result['p99']:8.2f}{result['failures']:8d}")
+            server.terminate()
+    finally:
+        for server in servers:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
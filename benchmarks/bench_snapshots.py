@@ -0,0 +1,72 @@
+"""Polling a live regatta: rows and bytes written per scrape, full frames vs snapshot deltas.
+
+    python benchmarks/bench_snapshots.py --categories 10 --boats 30 --races 8 --polls-per-race 5
+
+Each poll re-scrapes the whole regatta. Races finish fleet by fleet, so most
+polls see no change or only the fleet that just finished a race.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from snapshots import SnapshotStore
+
+
+def regatta_frame(categories, boats, races_done):
+    """Results after `races_done[c]` races in each category"""
+    rows = []
+    for c in range(categories):
+        for b in range(boats):
+            scores = [(b + r) % boats + 1 for r in range(races_done[c])]
+            rows.append({"Regatta_Name": "Live Regatta", "Regatta_Date": "03/15/2024 - 03/17/2024",
+                         "Category": f"Fleet {c}", "Position": b + 1, "Sail_Number": str(1000 + b),
+                         "Boat_Name": f"Boat {b}", "Skipper": f"Skipper {b}", "Yacht_Club": "Sarasota Sailing Squadron",
+                         "Results": ",".join(map(str, scores)), "Total_Points": float(sum(scores))})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--boats", type=int, default=30)
+    parser.add_argument("--races", type=int, default=8)
+    parser.add_argument("--polls-per-race", type=int, default=5)
+    args = parser.parse_args()
+
+    store = SnapshotStore(tempfile.mkdtemp(prefix="bench_snapshots_"))
+    races_done = [0] * args.categories
+    full_rows = full_bytes = delta_rows = delta_bytes = polls = 0
+    diff_seconds = 0.0
+
+    for race in range(args.races):
+        for poll in range(args.polls_per_race):
+            # One more fleet finishes this race on each poll until all have
+            for c in range(min(args.categories, (poll + 1) * args.categories // args.polls_per_race)):
+                races_done[c] = race + 1
+            df = regatta_frame(args.categories, args.boats, races_done)
+
+            started = time.perf_counter()
+            delta = store.diff("live", df)
+            store.commit(delta)
+            diff_seconds += time.perf_counter() - started
+
+            polls += 1
+            full_rows += len(df)
+            full_bytes += len(df.to_csv(index=False).encode("utf-8"))
+            delta_rows += len(delta.rows) + len(delta.removed)
+            delta_bytes += len(delta.frame().to_csv(index=False).encode("utf-8")) if not delta.empty else 0
+
+    print(f"{polls} polls of a {args.categories} x {args.boats} boat regatta, {args.races} races")
+    print(f"{'':<18}{'rows':>10}{'bytes':>14}")
+    print(f"{'full frames':<18}{full_rows:10,}{full_bytes:14,}")
+    print(f"{'deltas':<18}{delta_rows:10,}{delta_bytes:14,}")
+    print(f"diff + commit overhead: {diff_seconds / polls * 1000:.1f} ms per poll")
+
+
+if __name__ == "__main__":
+    main()
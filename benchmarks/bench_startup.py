@@ -0,0 +1,119 @@
+"""Cold-start import profile of the web entry points, optionally against an older revision.
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --compare 360ad23      # same measurement on that commit's tree
+
+Each entry point is imported in a fresh interpreter with `-X importtime`.
+The profile reports the median wall time, the heaviest top-level packages
+and which heavy dependencies ended up in sys.modules. The current tree also
+times startup.warm_up(), the work that moved from import time to first use.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["main", "chatgpt_scraper", "scrape_race_results", "asgi_app"]
+HEAVY = ["selenium", "bs4", "pandas", "numpy", "openai", "sqlalchemy", "requests"]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print("ELAPSED", elapsed)
+print("LOADED", ",".join(name for name in {heavy!r} if name in sys.modules))
+if {warm}:
+    import startup
+    started = time.perf_counter()
+    startup.warm_up()
+    print("WARM", time.perf_counter() - started, ",".join(
+        f"{{name}}={{step['state']}}" for name, step in startup._warm_up.status().items()))
+"""
+
+
+def profile(tree, module, warm, env):
+    """(seconds, loaded heavy packages, {top-level package: cumulative us}, warm-up line) for one cold import"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             PROBE.format(module=module, heavy=HEAVY, warm=warm)],
+                            cwd=tree, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1], {}, None
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  ") and name.strip().split(".")[0] in HEAVY:  # direct child of the entry point
+            top = name.strip().split(".")[0]
+            packages[top] = max(packages.get(top, 0), int(cumulative))
+    fields = dict(line.split(" ", 1) for line in result.stdout.splitlines() if " " in line)
+    return float(fields["ELAPSED"]), fields.get("LOADED", ""), packages, fields.get("WARM")
+
+
+def run_tree(label, tree, runs, warm, env):
+    print(f"\n== {label} ({tree})")
+    medians = {}
+    for module in ENTRY_POINTS:
+        samples = [profile(tree, module, False, env) for _ in range(runs)]
+        if samples[0][0] is None:
+            print(f"{module:<22} import failed: {samples[0][1]}")
+            continue
+        medians[module] = statistics.median(sample[0] for sample in samples)
+        _, loaded, packages, _ = samples[-1]
+        heaviest = ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in
+                             sorted(packages.items(), key=lambda item: -item[1])[:4])
+        print(f"{module:<22}{medians[module] * 1000:8.0f} ms   loaded: {loaded or '-'}")
+        if heaviest:
+            print(f"{'':<22}heaviest: {heaviest}")
+        if warm:
+            warm_line = profile(tree, module, True, env)[3]
+            if warm_line:
+                seconds, steps = warm_line.split(" ", 1)
+                print(f"{'':<22}warm_up(): {float(seconds) * 1000:.0f} ms ({steps})")
+    return medians
+
+
+def extract(ref):
+    """Export `ref` of this repo into a temporary directory."""
+    directory = tempfile.mkdtemp(prefix="bench_startup_")
+    archive = os.path.join(directory, "tree.tar")
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, ref], cwd=ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory)
+    os.remove(archive)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--compare", metavar="REF", help="also profile this git revision")
+    parser.add_argument("--no-warm", action="store_true", help="skip timing startup.warm_up()")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_startup_env_")
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0", WARM_UP="off",
+               DATABASE_URL=os.getenv("DATABASE_URL", f"sqlite:///{scratch}/startup.db"),
+               OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "startup-bench"),
+               LLM_CACHE_PATH=os.path.join(scratch, "llm_cache.sqlite3"),
+               SNAPSHOT_DIR=os.path.join(scratch, "snapshots"), ARTIFACT_DIR=os.path.join(scratch, "artifacts"))
+
+    current = run_tree("working tree", ROOT, args.runs, not args.no_warm, env)
+    if not args.compare:
+        return
+    previous = run_tree(args.compare, extract(args.compare), args.runs, False, env)
+    print("\nCold import, median:")
+    for module in ENTRY_POINTS:
+        if module in current and module in previous:
+            print(f"{module:<22}{previous[module] * 1000:8.0f} ms -> {current[module] * 1000:6.0f} ms "
+                  f"({previous[module] / current[module]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Watch mode against a local stand-in for regattanetwork: adaptive vs fixed-interval polling.
+
+    python benchmarks/bench_watch.py --regattas 3 --races 5 --race-every 3 --min-interval 0.25 --max-interval 4
+
+The stand-in server serves evolving fixture pages: every --race-every seconds
+each regatta posts one more race, and after the last race the header says
+'Final Results'. Pages carry an ETag and answer If-None-Match with 304, like
+a polite origin. Both modes run the real Watcher; the fixed mode just never
+backs off (backoff=1).
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmpdir = tempfile.mkdtemp(prefix="bench_watch_")
+os.environ["PAGE_CACHE_DIR"] = os.path.join(_tmpdir, "pages")
+os.environ["SNAPSHOT_DIR"] = os.path.join(_tmpdir, "snapshots")
+
+
+def fixture_page(regatta, races, categories, boats, final):
+    """Results text after `races` races in every fleet"""
+    lines = [f"Live Fixture Regatta {regatta}",
+             "Sarasota Sailing Squadron | 01/01/2099 - 01/03/2099",  # dates in the future: only the marker ends it
+             "Final Results" if final else "Preliminary Results"]
+    for c in range(categories):
+        lines.append(f"Fleet{c} ({boats} boats) (top)")
+        lines.append("Pos,Sail,Boat,Skipper,Yacht Club,Results,Total Points")
+        for b in range(1, boats + 1):
+            scores = [(b + r) % boats + 1 for r in range(races)]
+            lines.append(f"{b}. {1000 + b}, Boat {b}, Skipper {c}-{b}, Yacht Club {b % 7}, "
+                         f"{','.join(map(str, scores))}; {sum(scores)}")
+    return "<html><body><pre>" + "\n".join(lines) + "</pre></body></html>"
+
+
+class FixtureServer:
+    """Serves /regatta/<n>; the page advances one race every `race_every` seconds from start()."""
+
+    def __init__(self, races, race_every, categories, boats):
+        self.races = races
+        self.race_every = race_every
+        self.categories = categories
+        self.boats = boats
+        self.started = None
+        self.requests = {200: 0, 304: 0}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                races, final = server.stage()
+                body = fixture_page(self.path.rsplit("/", 1)[-1], races, server.categories, server.boats,
+                                    final).encode("utf-8")
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                status = 304 if self.headers.get("If-None-Match") == etag else 200
+                with server.lock:
+                    server.requests[status] += 1
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", "0" if status == 304 else str(len(body)))
+                self.end_headers()
+                if status == 200:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def start(self):
+        self.started = time.monotonic()
+        self.requests = {200: 0, 304: 0}
+
+    def stage(self):
+        step = int((time.monotonic() - self.started) / self.race_every) + 1
+        return min(step, self.races), step > self.races
+
+    def posted_at(self, races):
+        return self.started + (races - 1) * self.race_every
+
+    def url(self, regatta):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/regatta/{regatta}"
+
+
+def run_mode(server, args, backoff):
+    import watcher
+    from snapshots import SnapshotStore
+
+    lags = []
+    changes = []
+
+    def on_change(target, df, delta):
+        races = watcher.races_sailed(df) // args.categories
+        changes.append(races)
+        lags.append(time.monotonic() - server.posted_at(races))
+
+    snapshots = SnapshotStore(tempfile.mkdtemp(dir=_tmpdir))
+    w = watcher.Watcher(on_change, workers=args.workers, rate_per_host=args.rate, min_interval=args.min_interval,
+                        max_interval=args.max_interval, backoff=backoff, snapshots=snapshots)
+    for regatta in range(args.regattas):
+        w.add(server.url(regatta))
+    server.start()
+    started = time.monotonic()
+    w.run()
+    return {"seconds": time.monotonic() - started, "requests": sum(server.requests.values()),
+            "full": server.requests[200], "not_modified": server.requests[304], "changes": len(changes),
+            "lag": statistics.mean(lags) if lags else float("nan"),
+            "polls": sum(status["polls"] for status in w.status())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regattas", type=int, default=3)
+    parser.add_argument("--categories", type=int, default=4)
+    parser.add_argument("--boats", type=int, default=20)
+    parser.add_argument("--races", type=int, default=5)
+    parser.add_argument("--race-every", type=float, default=3.0, help="seconds between posted races")
+    parser.add_argument("--min-interval", type=float, default=0.25)
+    parser.add_argument("--max-interval", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=50.0, help="requests per second to the stand-in host")
+    args = parser.parse_args()
+
+    import contextlib
+    import io
+
+    server = FixtureServer(args.races, args.race_every, args.categories, args.boats)
+    print(f"{args.regattas} regattas, {args.races} races {args.race_every:g}s apart, "
+          f"polling every {args.min_interval:g}-{args.max_interval:g}s")
+    print(f"{'mode':<10}{'polls':>8}{'200s':>8}{'304s':>8}{'changes':>9}{'lag s':>8}{'done s':>8}")
+    for label, backoff in (("fixed", 1.0), ("adaptive", 1.5)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_mode(server, args, backoff)
+        print(f"{label:<10}{result['polls']:8d}{result['full']:8d}{result['not_modified']:8d}"
+              f"{result['changes']:9d}{result['lag']:8.2f}{result['seconds']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Shared benchmark inputs: recorded regatta pages and synthetic pages, frames and CSV.
+
+pandas, numpy and the app modules are imported inside the functions, so the
+benchmarks can set their environment (cache directories, DATABASE_URL)
+after importing this module.
+"""
+import contextlib
+import io
+import os
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_names():
+    return sorted(name[:-5] for name in os.listdir(FIXTURE_DIR) if name.endswith(".html"))
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def synthetic_rows(categories, boats, races):
+    """(category, [(position, sail, boat, skipper, club, [scores], total)]) with ties, codes and one discard"""
+    for c in range(categories):
+        rows = []
+        for b in range(1, boats + 1):
+            scores = [str((b + r) % boats + 1) for r in range(races)]
+            if b % 17 == 0 and races:
+                scores[-1] = f"DNF/{boats + 1}"
+            if races > 3:
+                scores[0] = f"({scores[0]})"
+            rows.append((b, str(1000 + b), f"Boat {b}", f"Skipper {c}-{b}", f"Yacht Club {b % 7}", scores, b * races))
+        yield f"Fleet{c}", rows
+
+
+def _text_lines(categories, boats, races):
+    lines = ["Synthetic Benchmark Regatta", "Sarasota Sailing Squadron | 03/15/2024 - 03/17/2024"]
+    for category, rows in synthetic_rows(categories, boats, races):
+        lines.append(f"{category} ({boats} boats) (top)")
+        lines.append("Pos,Sail,Boat,Skipper,Yacht Club,Results,Total Points")
+        for position, sail, boat, skipper, club, scores, total in rows:
+            tie = "T" if position % 10 == 0 else ""
+            lines.append(f"{position}{tie}. {sail}, {boat}, {skipper}, {club}, {','.join(scores)}; {total}{tie}")
+    return lines
+
+
+def synthetic_text(categories, boats, races=8):
+    """The text of a regattanetwork media_format=1 page (what parse_regatta_text reads)"""
+    return "\n".join(_text_lines(categories, boats, races))
+
+
+def synthetic_text_page(categories, boats, races=8):
+    """synthetic_text as the HTML page the server sends (what scrape_regatta_results fetches)"""
+    return "<html><body>\n" + "<br>\n".join(_text_lines(categories, boats, races)) + "\n</body></html>"
+
+
+def synthetic_table_page(categories, boats, races=8):
+    """A results page with one <table> per fleet (what scrape_regatta.extract_result_rows parses)"""
+    header = "".join(f"<th>{h}</th>" for h in
+                     ["Pos", "Sail", "Boat", "Skipper", "Yacht Club"] + [f"R{r + 1}" for r in range(races)] + ["Total"])
+    parts = ["<html><body><h1>Synthetic Benchmark Regatta</h1><p>Sarasota Sailing Squadron | 03/15/2024</p>"]
+    for category, rows in synthetic_rows(categories, boats, races):
+        parts.append(f"<h3>{category} ({boats} boats)</h3><table><tr>{header}</tr>")
+        for position, sail, boat, skipper, club, scores, total in rows:
+            cells = [str(position), sail, boat, skipper, club] + scores + [str(total)]
+            parts.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def synthetic_csv(rows, regattas=50):
+    """A /send_to_db CSV body of `rows` rows spread over `regattas` regattas, with tied positions"""
+    from ingest import CSV_COLUMNS
+
+    lines = [",".join(CSV_COLUMNS)]
+    per_regatta = max(1, rows // regattas)
+    for i in range(rows):
+        regatta = i // per_regatta
+        tie = "T" if i % 25 == 0 else ""
+        lines.append(f"Regatta {regatta},2024-03-{regatta % 28 + 1:02d},Fleet {i % 5},{i % per_regatta + 1}{tie},"
+                     f"{10000 + i},Boat {i},Skipper {i},Club {i % 40},\"1,2,3,4\",{i % 90 + 4}{tie}")
+    return "\n".join(lines) + "\n"
+
+
+def scraped_season_frame(regattas, categories, boats):
+    """Parsed synthetic regattas as clean_results receives them: object strings, padded and aliased"""
+    import pandas as pd
+    import scrape_regatta_results as scraper
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        one = scraper.parse_regatta_text(synthetic_text(categories, boats))
+    one = one.astype(str).astype(object)
+    one["Yacht_Club"] = one["Yacht_Club"].where(one["Position"].astype(int) % 5 != 0, " SSS ")
+    frames = []
+    for r in range(regattas):
+        frame = one.copy()
+        frame["Regatta_Name"] = f" Regatta {r} "
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def random_season_frame(regattas, categories, boats, races, drops=1, seed=0):
+    """Random finishes with DNF/DNS/OCS codes, `drops` bracketed discards and 1% corrupted totals"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    fleets = regattas * categories
+    finishes = np.argsort(rng.random((fleets, boats, races)), axis=1).astype(np.float64) + 1
+    finishes = finishes.reshape(fleets * boats, races)
+    codes = np.where(rng.random(finishes.shape) < 0.03, rng.choice(["DNF", "DNS", "OCS"], finishes.shape), "")
+    finishes[codes != ""] = boats + 1
+
+    worst = np.argsort(-finishes, axis=1, kind="stable")[:, :drops]
+    discarded = np.zeros(finishes.shape, dtype=bool)
+    np.put_along_axis(discarded, worst, True, axis=1)
+    totals = np.where(discarded, 0, finishes).sum(axis=1)
+    totals[rng.random(len(totals)) < 0.01] += 1
+
+    tokens = np.where(codes != "", codes, finishes.astype(int).astype(str))
+    tokens = np.where(discarded, np.char.add(np.char.add("(", tokens), ")"), tokens)
+    results = [",".join(row) for row in tokens.tolist()]
+
+    fleet = np.repeat(np.arange(fleets), boats)
+    return pd.DataFrame({
+        "Regatta_Name": [f"Regatta {f // categories}" for f in fleet],
+        "Category": [f"Fleet {f % categories}" for f in fleet],
+        "Position": np.tile(np.arange(1, boats + 1), fleets),
+        "Skipper": [f"Skipper {i % boats}" for i in range(len(fleet))],
+        "Results": results,
+        "Total_Points": totals,
+    })
@@ -0,0 +1,204 @@
+"""Local stand-ins for the outside world: regattanetwork pages and the OpenAI chat API.
+
+    python benchmarks/stand_in.py --port 8765             # serve fixtures until Ctrl-C
+    python benchmarks/stand_in.py --record <url> <name>   # save a live page as fixtures/<name>.html
+
+Pages:
+    /fixtures/<name>                               a recorded page from benchmarks/fixtures
+    /synthetic/text?categories=&boats=&races=      scaled-up media_format=1 text page
+    /synthetic/tables?categories=&boats=&races=    scaled-up table page
+Pages carry an ETag and answer If-None-Match with 304. Connections are kept
+alive (HTTP/1.1), and `fail=N` in the query answers the first N requests for
+that URL with 503, to exercise client retries.
+
+The fake OpenAI server answers POST /v1/chat/completions with one CSV line per
+row in the prompt after `latency` seconds, so the real client, chunking and
+stitching code runs end to end.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from fixtures import FIXTURE_DIR, fixture_names, load_fixture, synthetic_table_page, synthetic_text_page
+
+
+class _Server:
+    def __init__(self, handler, port=0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class RegattaServer(_Server):
+    """Serves fixture and synthetic regatta pages; counts responses by status and connections accepted."""
+
+    def __init__(self, port=0):
+        self.requests = {200: 0, 304: 0, 404: 0, 503: 0}
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._pages = {}
+        self._failures = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                body = server.page(self.path)
+                status = 404 if body is None else 503 if server.should_fail(self.path) else 200
+                etag = None
+                if status == 200:
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        status = 304
+                with server._lock:
+                    server.requests[status] += 1
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body) if status == 200 else 0))
+                self.end_headers()
+                if status == 200:
+                    self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, port)
+
+    def should_fail(self, path):
+        """True for the first `fail=N` requests of a URL"""
+        fail = parse_qs(urlparse(path).query).get("fail", ["0"])[0]
+        with self._lock:
+            seen = self._failures[path] = self._failures.get(path, 0) + 1
+        return fail.isdigit() and seen <= int(fail)
+
+    def page(self, path):
+        """Body bytes for a request path, or None (synthetic pages are generated once per size)"""
+        parsed = urlparse(path)
+        params = {k: int(v[0]) for k, v in parse_qs(parsed.query).items() if v[0].isdigit()}
+        key = (parsed.path, params.get("categories", 10), params.get("boats", 30), params.get("races", 8))
+        if key not in self._pages:
+            if parsed.path.startswith("/fixtures/"):
+                name = parsed.path.rsplit("/", 1)[-1]
+                if name not in fixture_names():
+                    return None
+                self._pages[key] = load_fixture(name).encode("utf-8")
+            elif parsed.path == "/synthetic/text":
+                self._pages[key] = synthetic_text_page(*key[1:]).encode("utf-8")
+            elif parsed.path == "/synthetic/tables":
+                self._pages[key] = synthetic_table_page(*key[1:]).encode("utf-8")
+            else:
+                return None
+        return self._pages[key]
+
+
+PROMPT_ROWS_RE = re.compile(r"CSV format:\s*(\[.*\])\s*Ensure the format", re.S)
+
+
+class FakeOpenAI(_Server):
+    """POST /v1/chat/completions: one CSV line per prompt row after `latency` seconds."""
+
+    def __init__(self, latency=0.0, port=0):
+        self.latency = latency
+        self.completions = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if server.latency:
+                    time.sleep(server.latency)
+                prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+                body = json.dumps({
+                    "id": "chatcmpl-stand-in", "object": "chat.completion", "created": int(time.time()),
+                    "model": request.get("model", "gpt-4-turbo"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": server.reply(prompt)}}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20, "total_tokens": len(prompt) // 4 + 20},
+                }).encode("utf-8")
+                with server._lock:
+                    server.completions += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(Handler, port)
+
+    @staticmethod
+    def reply(prompt):
+        lines = ["Pos, Sail, Boat, Skipper, Yacht Club, Results, Total Points"]
+        match = PROMPT_ROWS_RE.search(prompt)
+        for row in json.loads(match.group(1)) if match else []:
+            values = list(row.values()) if isinstance(row, dict) else list(row)
+            scores = ",".join(str(v) for v in values[5:-1])
+            lines.append(", ".join(str(v) for v in values[:5]) + f', "{scores}", {values[-1] if values else ""}')
+        return "\n".join(lines)
+
+    @property
+    def api_base(self):
+        return self.base_url + "/v1"
+
+
+def record(url, name):
+    """Save a live page (as served, before any JavaScript) into benchmarks/fixtures."""
+    import requests
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    path = os.path.join(FIXTURE_DIR, f"{name}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!-- recorded from {url} -->\n" + response.text)
+    print(f"Saved {len(response.text):,} characters to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--openai-port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake completion")
+    parser.add_argument("--record", nargs=2, metavar=("URL", "NAME"))
+    args = parser.parse_args()
+
+    if args.record:
+        record(*args.record)
+        return
+
+    pages = RegattaServer(args.port)
+    openai_server = FakeOpenAI(args.latency, args.openai_port)
+    print(f"Regatta pages: {pages.base_url}/fixtures/<{'|'.join(fixture_names())}>, {pages.base_url}/synthetic/text")
+    print(f"OpenAI: OPENAI_BASE_URL={openai_server.api_base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,52 @@
-from flask import Blueprint, request, jsonify, send_file
-import openai
-import os
+import asyncio
+from flask import Blueprint, Response, request, jsonify
+from artifacts import get_store, prepare_download
+from openai_formatter import complete_async, run
 
 # ✅ Define a Flask Blueprint
 scraper_bp = Blueprint("scraper", __name__)
 
-# ✅ OpenAI API Key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+SYSTEM_PROMPT = "You are a sailing race data extractor."
 
-if not OPENAI_API_KEY:
-    raise ValueError("Missing OPENAI_API_KEY. Set it in environment variables.")
 
-# ✅ Initialize OpenAI Client (Fixes Indentation Issue)
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
-
-def fetch_race_results_from_chatgpt(url):
-    """Fetch structured sailing race results from OpenAI and save as CSV."""
-    prompt = f"""
+def _prompt(url):
+    return f"""
     Extract and structure the sailing race data from the following URL: {url}.
     Return the results in a CSV format with the following columns:
     Pos, Sail, Boat, Skipper, Yacht Club, Results, Total Points
     """
 
+
+def _save_output(prompt, csv_data):
+    """Store the CSV as a downloadable artifact and build the debug payload returned to the page."""
+    artifact_id = get_store().put(csv_data, "race_results.csv")
+
+    return {
+        "prompt": prompt,
+        "raw_response": csv_data,
+        "csv_data": csv_data,
+        "artifact_id": artifact_id,
+        "file_path": get_store().path(artifact_id),  # ✅ Return file path
+        "download_url": f"/api/download-csv/{artifact_id}"
+    }
+
+
+async def fetch_race_results_from_chatgpt_async(url, bypass_cache=False):
+    """Fetch structured sailing race results from OpenAI and save as CSV (on the OpenAI loop)."""
+    prompt = _prompt(url)
     try:
-        response = client.chat.completions.create(  # ✅ Correct OpenAI API Call
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are a sailing race data extractor."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2048
-        )
-
-        csv_data = response.choices[0].message.content  # ✅ Extract response correctly
-
-        # ✅ Save CSV to a file
-        file_path = "/tmp/output.csv"  # Use /tmp since it's writable on Render
-        with open(file_path, "w", encoding="utf-8") as file:
-            file.write(csv_data)
-
-        return {
-            "prompt": prompt,
-            "raw_response": csv_data,
-            "csv_data": csv_data,
-            "file_path": file_path  # ✅ Return file path
-        }
+        # ✅ Identical requests are answered from the local LLM cache
+        csv_data = await complete_async("gpt-4-turbo", SYSTEM_PROMPT, prompt, bypass_cache=bypass_cache)
+        return await asyncio.to_thread(_save_output, prompt, csv_data)
     except Exception as e:
         return {"error": str(e)}
 
+
+def fetch_race_results_from_chatgpt(url, bypass_cache=False):
+    """fetch_race_results_from_chatgpt_async for the Flask blueprint."""
+    return run(fetch_race_results_from_chatgpt_async(url, bypass_cache))
+
+
 @scraper_bp.route("/fetch-results", methods=["POST"])
 def fetch_results():
     """API endpoint to fetch race results from ChatGPT and save CSV."""
@@ -57,14 +56,15 @@ def fetch_results():
     if not url:
         return jsonify({"error": "URL is required"}), 400
 
-    debug_data = fetch_race_results_from_chatgpt(url)
+    debug_data = fetch_race_results_from_chatgpt(url, bypass_cache=bool(data.get("no_cache")))
     return jsonify(debug_data)
 
 @scraper_bp.route("/download-csv", methods=["GET"])
-def download_csv():
-    """Endpoint to download the saved CSV file."""
-    file_path = "/tmp/output.csv"
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True, download_name="race_results.csv")
-    else:
+@scraper_bp.route("/download-csv/<artifact_id>", methods=["GET"])
+def download_csv(artifact_id=None):
+    """Stream a saved CSV (the latest one without an ID) with gzip/br, ETag and Range support."""
+    store = get_store()
+    status, headers, body = prepare_download(store, artifact_id or store.latest(), request.headers)
+    if status == 404:
         return jsonify({"error": "No CSV file found"}), 404
+    return Response(body, status=status, headers=headers, direct_passthrough=True)
@@ -0,0 +1,455 @@
+import math
+import os
+import subprocess
+import threading
+import time
+import atexit
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import metrics
+
+try:
+    import psutil
+except ImportError:  # RSS based recycling is skipped without psutil
+    psutil = None
+
+# ✅ Define a lightweight Chromium binary location
+CHROMIUM_PATH = os.getenv("CHROMIUM_PATH", "/usr/local/bin/chrome-linux/chrome")
+
+# ✅ Pool tuning (override in Render environment variables)
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+MAX_PAGES_PER_DRIVER = int(os.getenv("DRIVER_MAX_PAGES", "50"))
+MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "700"))
+LEASE_TIMEOUT = float(os.getenv("DRIVER_LEASE_TIMEOUT", "120"))
+
+# ✅ Page loading (override in Render environment variables)
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")  # return at DOMContentLoaded
+READY_STRATEGY = os.getenv("READY_STRATEGY", "any")
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", "20"))
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") == "1"
+BLOCK_THIRD_PARTY_SCRIPTS = os.getenv("BLOCK_THIRD_PARTY_SCRIPTS", "1") == "1"
+
+# ✅ Nothing we scrape needs images, fonts or CSS; the ad/analytics hosts are the
+# fallback for when third-party scripts can't be intercepted (see ScriptFilter)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*",
+]
+
+# ✅ Ways of deciding a results page has finished rendering
+RESULTS_TABLE_XPATH = "//table[.//th[contains(., 'Pos') or contains(., 'Sail') or contains(., 'Skipper')]]"
+
+
+def _results_table():
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    return EC.presence_of_element_located((By.XPATH, RESULTS_TABLE_XPATH))
+
+
+def _results_header():
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    return EC.text_to_be_present_in_element((By.TAG_NAME, "body"), "Pos,Sail")
+
+
+def _any_ready():
+    from selenium.webdriver.support import expected_conditions as EC
+    return EC.any_of(_results_table(), _results_header())
+
+
+# ✅ Selenium is imported when a condition is built, not when this module is (it is slow to import)
+READY_CONDITIONS = {"results_table": _results_table, "results_header": _results_header, "any": _any_ready}
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def install_chromium():
+    """Download and configure a lightweight Chromium binary for Selenium."""
+    if not os.path.exists(CHROMIUM_PATH):
+        print("🔧 Downloading Chromium Portable...")
+
+        # ✅ Use a smaller, stable Chromium version hosted on a reliable CDN
+        subprocess.run(
+            "wget -q https://github.com/RobRich999/Chromium_Clang/releases/download/v121.0.6167.85/chrome-linux.zip -O /tmp/chrome.zip",
+            shell=True,
+            check=True,
+        )
+        subprocess.run("unzip /tmp/chrome.zip -d /usr/local/bin/", shell=True, check=True)
+        print("✅ Chromium installed successfully!")
+
+
+def use_portable_chromium():
+    """Render has no system Chrome, so use the portable build there (or wherever it is already installed)."""
+    return os.getenv("RENDER") is not None or os.path.exists(CHROMIUM_PATH)
+
+
+def get_chromedriver_path():
+    """Resolve the ChromeDriver binary once per process instead of once per page."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+
+def create_driver():
+    """Start a new headless Chrome session."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+    options.add_argument("--headless")  # Run without UI
+    options.add_argument("--no-sandbox")  # Required for Render/Docker environments
+    options.add_argument("--disable-dev-shm-usage")  # Prevent crashes
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if BLOCK_RESOURCES:
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.fonts": 2,
+        })
+
+    if use_portable_chromium():
+        install_chromium()
+        options.binary_location = CHROMIUM_PATH  # ✅ Use the downloaded Chromium
+        service = Service(get_chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=options)
+    else:
+        driver = webdriver.Chrome(options=options)
+
+    if BLOCK_RESOURCES:
+        block_resources(driver)
+    if BLOCK_THIRD_PARTY_SCRIPTS:
+        ScriptFilter.attach(driver)
+    return driver
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Ask Chrome (via DevTools) not to download resources matching the given URL patterns."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        print(f"⚠️ Resource blocking unavailable: {e}")
+
+
+class ScriptFilter:
+    """Fails every script request whose host is not the host of the page being loaded.
+
+    Runs a CDP Fetch interception (resourceType=Script) on the driver's own
+    DevTools connection, in a daemon thread that ends when the browser quits.
+    load_page sets the page host before each navigation.
+    """
+
+    ATTACH_TIMEOUT = 10
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.page_host = None
+        self.blocked = 0
+        self.error = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name="script-filter").start()
+
+    @classmethod
+    def attach(cls, driver):
+        """Start filtering `driver`'s scripts; returns the filter, or None if interception is unavailable."""
+        script_filter = cls(driver)
+        if not script_filter._ready.wait(cls.ATTACH_TIMEOUT) or script_filter.error:
+            print(f"⚠️ Third-party script blocking unavailable: {script_filter.error or 'CDP attach timed out'}")
+            return None
+        driver.script_filter = script_filter
+        return script_filter
+
+    def allows(self, url):
+        host = urlsplit(url).hostname
+        return self.page_host is None or host is None or host == self.page_host
+
+    def _run(self):
+        import trio
+        try:
+            trio.run(self._intercept)
+        except Exception as e:  # ✅ the browser quit (or never attached): nothing left to filter
+            self.error = self.error or e
+        finally:
+            self._ready.set()
+
+    async def _intercept(self):
+        async with self.driver.bidi_connection() as connection:
+            session, devtools = connection.session, connection.devtools
+            await session.execute(devtools.fetch.enable(patterns=[devtools.fetch.RequestPattern(
+                resource_type=devtools.network.ResourceType.SCRIPT,
+                request_stage=devtools.fetch.RequestStage.REQUEST,
+            )]))
+            self._ready.set()
+            # ✅ Unbounded: a dropped event would leave its request paused forever
+            async for event in session.listen(devtools.fetch.RequestPaused, buffer_size=math.inf):
+                try:
+                    if self.allows(event.request.url):
+                        await session.execute(devtools.fetch.continue_request(event.request_id))
+                    else:
+                        await session.execute(devtools.fetch.fail_request(
+                            event.request_id, devtools.network.ErrorReason.BLOCKED_BY_CLIENT))
+                        self.blocked += 1
+                        metrics.inc("scripts_blocked")
+                except Exception:
+                    pass  # the request went away (navigation, tab closed) while paused
+
+
+def load_page(driver, url, ready=None, timeout=None):
+    """Navigate to `url` and wait until the results are present; returns wall time in seconds.
+
+    `ready` is a READY_CONDITIONS key or any callable accepted by WebDriverWait.until.
+    Raises TimeoutError if the page is not ready within `timeout` seconds.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    ready = ready or READY_STRATEGY
+    timeout = timeout or READY_TIMEOUT
+    condition = READY_CONDITIONS[ready]() if isinstance(ready, str) else ready
+
+    script_filter = getattr(driver, "script_filter", None)
+    if script_filter is not None:
+        script_filter.page_host = urlsplit(url).hostname  # ✅ scripts from any other host are failed
+
+    started = time.perf_counter()
+    driver.get(url)
+    try:
+        WebDriverWait(driver, timeout).until(condition)
+    except TimeoutException:
+        elapsed = time.perf_counter() - started
+        record_page_time(url, elapsed, ready=False)
+        raise TimeoutError(f"Results not ready after {timeout:.0f}s (strategy={ready!r}) for {url}")
+
+    elapsed = time.perf_counter() - started
+    record_page_time(url, elapsed)
+    metrics.observe("stage_duration_seconds", elapsed, stage="render")
+    return elapsed
+
+
+class PooledDriver:
+    """A browser session plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+
+    def rss_mb(self):
+        """Resident memory of chromedriver and every browser process it spawned."""
+        if psutil is None:
+            return None
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except Exception:
+            return None
+
+    def is_healthy(self):
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """Bounded pool of warm headless Chrome sessions shared by the scrapers."""
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, max_rss_mb=MAX_RSS_MB, factory=create_driver):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.factory = factory
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "created": 0,
+            "recycled_pages": 0,
+            "recycled_rss": 0,
+            "health_failures": 0,
+            "errors": 0,
+            "leases": 0,
+            "lease_wait_seconds": 0.0,
+            "pages_served": 0,
+        }
+
+    def _checkout(self):
+        """Return a healthy idle session, or start a new one."""
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            if entry.is_healthy():
+                return entry
+            with self._lock:
+                self._stats["health_failures"] += 1
+            entry.quit()
+
+        with metrics.stage("browser_startup"):
+            entry = PooledDriver(self.factory())
+        with self._lock:
+            self._stats["created"] += 1
+        return entry
+
+    def prewarm(self, count=1):
+        """Start idle sessions until `count` (at most the pool size) are waiting for a lease."""
+        with self._lock:
+            missing = min(count, self.size) - len(self._idle) - self._in_use
+        for _ in range(max(0, missing)):
+            with metrics.stage("browser_startup"):
+                entry = PooledDriver(self.factory())
+            with self._lock:
+                self._stats["created"] += 1
+                self._idle.append(entry)
+
+    def _checkin(self, entry, broken):
+        """Return a session to the pool unless it is broken or due for recycling."""
+        if broken or self._closed:
+            entry.quit()
+            return
+
+        if entry.pages >= self.max_pages:
+            with self._lock:
+                self._stats["recycled_pages"] += 1
+            entry.quit()
+            return
+
+        rss = entry.rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            with self._lock:
+                self._stats["recycled_rss"] += 1
+            entry.quit()
+            return
+
+        try:
+            entry.driver.get("about:blank")  # ✅ Drop the previous page's DOM before idling
+        except Exception:
+            entry.quit()
+            return
+
+        with self._lock:
+            self._idle.append(entry)
+
+    @contextmanager
+    def lease(self, timeout=LEASE_TIMEOUT):
+        """Borrow a browser session for the duration of a `with` block."""
+        from selenium.common.exceptions import WebDriverException
+
+        started = time.time()
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No browser session available after {timeout}s (pool size {self.size})")
+
+        entry = None
+        broken = False
+        try:
+            entry = self._checkout()
+            waited = time.time() - started
+            metrics.observe("stage_duration_seconds", waited, stage="browser_lease")  # ✅ the wait, not the render
+            with self._lock:
+                self._in_use += 1
+                self._stats["leases"] += 1
+                self._stats["lease_wait_seconds"] += waited
+            yield entry.driver
+            entry.pages += 1
+            with self._lock:
+                self._stats["pages_served"] += 1
+        except WebDriverException:
+            broken = True
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            if entry is not None:
+                with self._lock:
+                    self._in_use -= 1
+                self._checkin(entry, broken)
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_pages": self.max_pages,
+                "max_rss_mb": self.max_rss_mb,
+            })
+        return stats
+
+    def close(self):
+        """Quit every idle session; sessions still leased are quit on return."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            entry.quit()
+
+
+_page_times = deque(maxlen=200)
+_page_times_lock = threading.Lock()
+
+
+def record_page_time(url, seconds, ready=True):
+    """Remember how long a page took to become ready."""
+    with _page_times_lock:
+        _page_times.append({"url": url, "seconds": round(seconds, 3), "ready": ready})
+    print(f"⏱️ Page {'ready' if ready else 'timed out'} in {seconds:.2f}s: {url}")
+
+
+def page_time_stats():
+    """Summary of recent per-page wall times."""
+    with _page_times_lock:
+        times = list(_page_times)
+    ready = sorted(t["seconds"] for t in times if t["ready"])
+    if not ready:
+        return {"pages": len(times), "timeouts": len(times)}
+    return {
+        "pages": len(times),
+        "timeouts": len(times) - len(ready),
+        "avg_seconds": round(sum(ready) / len(ready), 3),
+        "p50_seconds": ready[len(ready) // 2],
+        "max_seconds": ready[-1],
+        "recent": times[-10:],
+    }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide driver pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def pool_stats():
+    """Stats for the shared pool (empty until a scraper has used it)."""
+    stats = _pool.stats() if _pool is not None else {"size": POOL_SIZE, "idle": 0, "in_use": 0, "created": 0}
+    stats["page_times"] = page_time_stats()
+    return stats
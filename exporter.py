@@ -0,0 +1,144 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from page_cache import find_dates
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # parquet/arrow exports need pyarrow
+    pa = None
+
+try:
+    import xlsxwriter
+    EXCEL_ENGINE = "xlsxwriter"  # several times faster than openpyxl on large sheets
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+# ✅ Export tuning (override in environment variables)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "20000"))
+PARTITION_COLUMNS = ["Regatta_Name", "Category"]
+
+FORMAT_SUFFIXES = {"csv": ".csv", "excel": ".xlsx", "json": ".json", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(value)).strip("_")[:80] or "regatta"
+
+
+def output_basename(df, basename=None):
+    """Per-regatta file name: '<regatta>_<start date>', or '<basename>_<timestamp>' for multi-regatta frames.
+
+    An explicit `basename` is used as given for a single regatta, so re-exports
+    of the same regatta replace each other but never another regatta's files.
+    """
+    regattas = df["Regatta_Name"].unique() if "Regatta_Name" in df.columns else []
+    if len(regattas) == 1:
+        name = _slug(regattas[0])
+        dates = find_dates(str(df["Regatta_Date"].iloc[0])) if "Regatta_Date" in df.columns else []
+        if dates:
+            name += f"_{dates[0].isoformat()}"
+        return f"{basename}_{name}" if basename else name
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return f"{basename or 'regatta_results'}_{len(regattas)}_regattas_{stamp}"
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv(df, path, chunk_rows):
+    df.to_csv(path, index=False, chunksize=chunk_rows)
+
+
+def write_json(df, path, chunk_rows):
+    """Same records array as DataFrame.to_json(orient='records'), written a chunk at a time."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        first = True
+        for chunk in _chunks(df, chunk_rows):
+            records = chunk.to_json(orient="records")[1:-1]
+            if records:
+                f.write(records if first else "," + records)
+                first = False
+        f.write("]")
+
+
+def write_excel(df, path, chunk_rows):
+    """Rows streamed straight to xlsxwriter in constant-memory mode; openpyxl via pandas otherwise."""
+    if EXCEL_ENGINE != "xlsxwriter":
+        df.to_excel(path, index=False, engine=EXCEL_ENGINE)
+        return
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+    try:
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, [str(c) for c in df.columns])
+        row_number = 1
+        for chunk in _chunks(df, chunk_rows):
+            columns = [chunk[c].astype(object).where(chunk[c].notna(), None).tolist() for c in chunk.columns]
+            for row in zip(*columns):
+                sheet.write_row(row_number, 0, row)
+                row_number += 1
+    finally:
+        workbook.close()
+
+
+def _write_dataset(df, path, chunk_rows, file_format):
+    """Hive-partitioned dataset (Regatta_Name=.../Category=...) streamed from record batches."""
+    if pa is None:
+        raise ImportError("pyarrow is required for parquet/arrow export")
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    batches = (batch for chunk in _chunks(df, chunk_rows)
+               for batch in pa.Table.from_pandas(chunk, schema=schema, preserve_index=False).to_batches())
+    partition_columns = [c for c in PARTITION_COLUMNS if c in df.columns]
+    ds.write_dataset(
+        batches, path, schema=schema, format=file_format,
+        partitioning=ds.partitioning(pa.schema([schema.field(c) for c in partition_columns]), flavor="hive"),
+        existing_data_behavior="delete_matching", max_partitions=100_000,
+        basename_template="part-{i}" + FORMAT_SUFFIXES["parquet" if file_format == "parquet" else "arrow"],
+    )
+
+
+def write_parquet(df, path, chunk_rows):
+    _write_dataset(df, path, chunk_rows, "parquet")
+
+
+def write_arrow(df, path, chunk_rows):
+    _write_dataset(df, path, chunk_rows, "ipc")
+
+
+WRITERS = {"csv": write_csv, "excel": write_excel, "json": write_json, "parquet": write_parquet, "arrow": write_arrow}
+
+
+def export_formats(df, formats, output_dir="output", basename=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write `df` in every format in `formats` concurrently.
+
+    Returns {format: {"path", "seconds"}} for the formats written and
+    {format: {"error"}} for any that failed.
+    """
+    formats = [formats] if isinstance(formats, str) else list(dict.fromkeys(formats))
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    name = output_basename(df, basename)
+
+    def run(fmt):
+        path = os.path.join(output_dir, name + FORMAT_SUFFIXES[fmt])
+        started = time.perf_counter()
+        try:
+            WRITERS[fmt](df, path, chunk_rows)
+        except Exception as e:
+            print(f"Error saving {fmt} file: {str(e)}")
+            return fmt, {"error": str(e)}
+        seconds = time.perf_counter() - started
+        print(f"{fmt.upper()} saved to: {path} ({seconds:.2f}s)")
+        return fmt, {"path": path, "seconds": seconds}
+
+    with ThreadPoolExecutor(max_workers=len(formats) or 1) as pool:
+        return dict(pool.map(run, formats))
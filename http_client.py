@@ -0,0 +1,108 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+import metrics
+
+# ✅ Shared HTTP client tuning (override in environment variables)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))  # seconds before the first retry, doubled per retry
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "30"))  # cap on a server's Retry-After
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "10"))  # hosts with a kept-alive connection pool
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))  # kept-alive connections per host
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_counts = {"requests": 0, "retries": 0, "connections_opened": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(name, value=1):
+    with _counts_lock:
+        _counts[name] += value
+
+
+class _Retry(Retry):
+    """urllib3 Retry that counts retries and caps Retry-After."""
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)  # raises when exhausted
+        if response is not None and response.status:
+            reason = f"status_{response.status}"
+        else:
+            reason = type(error).__name__ if error is not None else "unknown"
+        metrics.inc("http_retries", reason=reason)
+        _count("retries")
+        return retry
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        metrics.inc("http_connections_opened")
+        _count("connections_opened")
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        metrics.inc("http_connections_opened")
+        _count("connections_opened")
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count the connections they open (the rest are reused)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPConnectionPool,
+                                                   "https": _CountingHTTPSConnectionPool}
+
+
+def create_session(retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """requests.Session with keep-alive pools and bounded retries (exponential backoff) on 5xx/429."""
+    retry = _Retry(total=retries, connect=retries, read=retries, status=retries, status_forcelist=RETRY_STATUSES,
+                   allowed_methods=frozenset({"GET", "HEAD"}), backoff_factor=backoff, raise_on_status=False)
+    adapter = _PooledAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide HTTP session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def get(url, headers=None, timeout=None, **kwargs):
+    """GET through the shared session with (connect, read) timeouts; retried 5xx/429s are invisible to callers."""
+    _count("requests")
+    metrics.inc("http_requests")
+    return get_session().get(url, headers=headers, timeout=timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                             **kwargs)
+
+
+def stats():
+    """Request, retry and connection counters; every attempt not on a new connection reused a kept-alive one."""
+    with _counts_lock:
+        counts = dict(_counts)
+    attempts = counts["requests"] + counts["retries"]
+    counts["connections_reused"] = max(0, attempts - counts["connections_opened"])
+    counts["reuse_rate"] = round(counts["connections_reused"] / attempts, 3) if attempts else 0.0
+    return counts
@@ -0,0 +1,185 @@
+import csv
+import io
+from contextlib import contextmanager
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# ✅ Column order of the CSV posted to /send_to_db
+CSV_COLUMNS = ["regatta_name", "regatta_date", "race_category", "pos", "sail",
+               "boat", "skipper", "yacht_club", "results", "total_points"]
+
+# ✅ One entry per boat per fleet per regatta
+NATURAL_KEY = ["regatta_name", "race_category", "sail", "skipper"]
+
+# ✅ Text columns, where an empty cell is an empty string rather than NULL
+TEXT_COLUMNS = [c for c in CSV_COLUMNS if c not in ("pos", "total_points")]
+
+BATCH_SIZE = 5000
+
+_keyed_tables = set()
+
+
+def parse_int(value):
+    """'12' -> 12, '12T' (tied) -> 12, '12.0' -> 12; anything else raises ValueError."""
+    value = value.strip().rstrip("Tt").strip()
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a number")
+    if not number.is_integer():
+        raise ValueError(f"{value!r} is not a whole number")
+    return int(number)
+
+
+def parse_points(value):
+    """'12' -> 12, '12T' (tied) -> 12, '10.5' (average-points redress) -> 10.5; anything else raises ValueError."""
+    value = value.strip().rstrip("Tt").strip()
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{value!r} is not a number")
+    return int(number) if number.is_integer() else number
+
+
+def parse_csv_rows(csv_text):
+    """Validate posted CSV rows.
+
+    Returns (rows, errors): rows are dicts ready for insert, deduplicated on
+    the natural key (last one wins); errors is a list of
+    {"line", "error", "row"} for rows that were skipped.
+    """
+    reader = csv.reader(io.StringIO(csv_text))
+    next(reader, None)  # Skip header row
+
+    rows = {}
+    errors = []
+    for line_number, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        if len(row) != len(CSV_COLUMNS):
+            errors.append({"line": line_number, "error": f"expected {len(CSV_COLUMNS)} columns, got {len(row)}", "row": row})
+            continue
+        record = {column: cell.strip() for column, cell in zip(CSV_COLUMNS, row)}
+        try:
+            record["pos"] = parse_int(record["pos"])
+            record["total_points"] = parse_points(record["total_points"])
+        except ValueError as e:
+            errors.append({"line": line_number, "error": str(e), "row": row})
+            continue
+        rows[tuple(record[k] for k in NATURAL_KEY)] = record
+    return list(rows.values()), errors
+
+
+@contextmanager
+def _transaction(bind):
+    """A transaction on an Engine, or the caller's own when `bind` is already a Connection."""
+    if isinstance(bind, Connection):
+        yield bind
+    else:
+        with bind.begin() as conn:
+            yield conn
+
+
+def ensure_natural_key(bind, table):
+    """Make sure the natural-key unique index exists (dropping older duplicates first).
+
+    The DDL is SQLite/Postgres only; the generic path replaces rows by key
+    and needs no index. On Postgres an integer total_points column from an
+    older schema is widened to double precision as well.
+    """
+    if table.name in _keyed_tables:
+        return
+    key = ", ".join(NATURAL_KEY)
+    with _transaction(bind) as conn:
+        conn.execute(text(
+            f"DELETE FROM {table.name} WHERE id NOT IN "
+            f"(SELECT MAX(id) FROM {table.name} GROUP BY {key})"
+        ))
+        conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_{table.name}_entry ON {table.name} ({key})"))
+        if bind.dialect.name == "postgresql":
+            # ✅ tables created before fractional totals were accepted have an integer column
+            conn.execute(text(
+                f"DO $$ BEGIN IF (SELECT data_type FROM information_schema.columns WHERE table_name = '{table.name}' "
+                f"AND column_name = 'total_points') = 'integer' THEN "
+                f"ALTER TABLE {table.name} ALTER COLUMN total_points TYPE double precision; END IF; END $$"
+            ))
+    _keyed_tables.add(table.name)
+
+
+def bulk_upsert(bind, table, rows, batch_size=BATCH_SIZE):
+    """Insert or update rows on the natural key; returns the number of rows written.
+
+    Postgres streams the rows with COPY into a temp table and merges with
+    INSERT ... ON CONFLICT. SQLite uses batched executemany upserts. `bind`
+    is an Engine, or a Connection to write inside the caller's transaction.
+    """
+    if not rows:
+        return 0
+    if bind.dialect.name not in ("postgresql", "sqlite"):
+        return _replace_generic(bind, table, rows, batch_size)
+
+    ensure_natural_key(bind, table)
+    if bind.dialect.name == "postgresql":
+        return _copy_upsert_postgres(bind, table, rows)
+
+    from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(table)
+    update_columns = [c for c in CSV_COLUMNS if c not in NATURAL_KEY]
+    statement = statement.on_conflict_do_update(
+        index_elements=NATURAL_KEY,
+        set_={c: statement.excluded[c] for c in update_columns},
+    )
+    with _transaction(bind) as conn:
+        for start in range(0, len(rows), batch_size):
+            conn.execute(statement, rows[start:start + batch_size])
+    return len(rows)
+
+
+def _copy_upsert_postgres(bind, table, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[c] for c in CSV_COLUMNS])
+    buffer.seek(0)
+
+    columns = ", ".join(CSV_COLUMNS)
+    key = ", ".join(NATURAL_KEY)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in CSV_COLUMNS if c not in NATURAL_KEY)
+    staging = f"staging_{table.name}"
+
+    with _transaction(bind) as conn:
+        cursor = conn.connection.cursor()
+        cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP")
+        # ✅ Unquoted empty cells are NULL in CSV COPY: keep them empty strings like the other dialects
+        cursor.copy_expert(f"COPY {staging} ({columns}) FROM STDIN WITH "
+                           f"(FORMAT csv, FORCE_NOT_NULL ({', '.join(TEXT_COLUMNS)}))", buffer)
+        cursor.execute(
+            f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {staging} "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+        )
+    return len(rows)
+
+
+def _replace_generic(bind, table, rows, batch_size):
+    """Dialects without ON CONFLICT: delete matching keys, then executemany insert."""
+    key_filter = " AND ".join(f"{c} = :{c}" for c in NATURAL_KEY)
+    with _transaction(bind) as conn:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            conn.execute(text(f"DELETE FROM {table.name} WHERE {key_filter}"),
+                         [{c: row[c] for c in NATURAL_KEY} for row in batch])
+            conn.execute(table.insert(), batch)
+    return len(rows)
+
+
+def delete_keys(bind, table, keys, batch_size=BATCH_SIZE):
+    """Delete rows by natural key (dicts with the NATURAL_KEY columns); returns the number of keys deleted."""
+    if not keys:
+        return 0
+    key_filter = " AND ".join(f"{c} = :{c}" for c in NATURAL_KEY)
+    with _transaction(bind) as conn:
+        for start in range(0, len(keys), batch_size):
+            conn.execute(text(f"DELETE FROM {table.name} WHERE {key_filter}"),
+                         [{c: key[c] for c in NATURAL_KEY} for key in keys[start:start + batch_size]])
+    return len(keys)
@@ -0,0 +1,215 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import metrics
+
+# ✅ Job queue tuning (override in environment variables)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # no point exceeding DRIVER_POOL_SIZE
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "20"))  # queued (not yet running) jobs before submit is refused
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))  # finished jobs kept for /get-progress
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+class Job:
+    """One submitted scrape: status, progress events and the final result."""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.publish = None  # outcome of the GitHub push queued by the job, see track_publish()
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.future = None
+        self._seq = itertools.count(1)
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    def progress(self, message, **fields):
+        """Append a progress event and wake any SSE listeners."""
+        with self._changed:
+            self.events.append({"seq": next(self._seq), "time": time.time(), "status": self.status,
+                                "message": message, **fields})
+            self._changed.notify_all()
+        print(f"[job {self.id}] {message}")
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Called by the pipeline between stages; raises CancelledError once cancel() was requested."""
+        if self._cancel.is_set():
+            raise CancelledError()
+
+    def events_since(self, seq, timeout=None):
+        """Events after `seq`, waiting up to `timeout` for one if there are none yet."""
+        with self._changed:
+            if timeout and self.status not in FINISHED and (not self.events or self.events[-1]["seq"] <= seq):
+                self._changed.wait(timeout)
+            return [event for event in self.events if event["seq"] > seq]
+
+    def track_publish(self, future):
+        """Report a queued push (a publisher Future) in to_dict()['publish'] once it resolves"""
+        self.publish = {"status": "pending"}
+
+        def resolved(f):
+            if f.exception() is not None:
+                self.publish = {"status": "failed", "error": str(f.exception())}
+                self.progress(f"Publishing failed: {f.exception()}", stage="publish")
+            else:
+                self.publish = {"status": "published", "commit": f.result()}
+                self.progress(f"Published as {f.result()[:12]}", stage="publish")
+
+        future.add_done_callback(resolved)
+
+    def to_dict(self, events=True):
+        job = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "error": self.error,
+            "publish": self.publish,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if events:
+            job["progress"] = [event["message"] for event in self.events]
+        return job
+
+    def outcome(self):
+        """(payload, HTTP status) of a finished job, for the endpoints that wait for one"""
+        if self.status == "done":
+            return self.result, 200
+        if self.status == "cancelled":
+            return {"error": "cancelled", "job_id": self.id}, 409
+        return {"error": self.error or self.status, "job_id": self.id}, 500
+
+
+class JobQueue:
+    """Bounded worker pool for long-running scrapes, with per-job progress and cancellation."""
+
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_QUEUE_MAX, history=JOB_HISTORY):
+        self.max_queued = max_queued
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, **params):
+        """Queue `fn(job, **params)`; raises queue.Full when JOB_QUEUE_MAX jobs are already waiting."""
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if queued >= self.max_queued:
+                metrics.inc("jobs", status="rejected")
+                raise queue.Full(f"{queued} jobs already queued")
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+            self._trim()
+        job.progress(f"Queued {kind}")
+        metrics.inc("jobs", status="queued")
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.started_at = time.time()
+        metrics.observe("job_queue_wait_seconds", job.started_at - job.created_at)
+        job.progress("Started")
+        try:
+            job.check_cancelled()
+            job.result = fn(job, **job.params)
+            job.status, message = "done", "Finished"
+        except CancelledError:
+            job.status, message = "cancelled", "Cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status, message = "failed", f"Failed: {e}"
+        job.finished_at = time.time()
+        job.progress(message)
+        metrics.inc("jobs", status=job.status)
+        metrics.observe("job_duration_seconds", job.finished_at - job.started_at, kind=job.kind)
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright, or ask a running one to stop at its next stage boundary."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            job.progress("Cancelled before it started")
+            metrics.inc("jobs", status="cancelled")
+        else:
+            job.progress("Cancellation requested")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self):
+        with self._lock:
+            return max(self._jobs.values(), key=lambda job: job.created_at, default=None)
+
+    def list(self):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+        return [job.to_dict(events=False) for job in jobs]
+
+    def _trim(self):
+        finished = sorted((job for job in self._jobs.values() if job.status in FINISHED),
+                          key=lambda job: job.created_at)
+        for job in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job.id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        stats = {status: statuses.count(status) for status in ("queued", "running") + FINISHED}
+        stats["max_queued"] = self.max_queued
+        return stats
+
+
+def sse_stream(job, last_seq=0):
+    """Server-Sent Events for one job: a `progress` event per message, then `done`."""
+    seq = last_seq
+    while True:
+        events = job.events_since(seq, timeout=SSE_KEEPALIVE)
+        for event in events:
+            seq = event["seq"]
+            yield f"id: {seq}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+        if job.status in FINISHED and not job.events_since(seq):
+            yield f"event: done\ndata: {json.dumps(job.to_dict(events=False))}\n\n"
+            return
+        if not events:
+            yield ": keepalive\n\n"
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Return the process-wide job queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import metrics
+
+# ✅ Cache tuning (override in environment variables)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "50"))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+
+_lock = threading.Lock()
+_initialized = False
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0, "latency_saved_seconds": 0.0}
+
+
+def cache_key(model, system_prompt, user_prompt):
+    """Content address of a chat request."""
+    payload = json.dumps([model, system_prompt, user_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    global _initialized
+    conn = sqlite3.connect(LLM_CACHE_PATH, timeout=10)
+    if not _initialized:
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+        conn.commit()
+        _initialized = True
+    return conn
+
+
+def _count(name, value=1):
+    with _lock:
+        _stats[name] += value
+
+
+def lookup(key):
+    """Return (content, original_latency) for a live entry, or None."""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT content, latency, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        content, latency, created_at = row
+        if time.time() - created_at > LLM_CACHE_TTL:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        return content, latency
+    finally:
+        conn.close()
+
+
+def store(key, model, content, latency):
+    conn = _connect()
+    try:
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, content, size, latency, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, model, content, len(content.encode("utf-8")), latency, now, now),
+        )
+        conn.commit()
+        _count("stores")
+        _evict(conn)
+    finally:
+        conn.close()
+
+
+def _evict(conn):
+    """Drop expired entries, then least recently used ones until the cache fits in LLM_CACHE_MAX_MB."""
+    expired = conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - LLM_CACHE_TTL,)).rowcount
+    max_bytes = LLM_CACHE_MAX_MB * 1024 * 1024
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    evicted = 0
+    if total > max_bytes:
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used").fetchall():
+            if total <= max_bytes:
+                break
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+    conn.commit()
+    if expired or evicted:
+        _count("evictions", expired + evicted)
+
+
+async def acached_completion(model, system_prompt, user_prompt, call, bypass=False, validate=None):
+    """Return the completion text for this exact request, awaiting `call()` only on a cache miss.
+
+    `call` is a coroutine function that performs the real API request and
+    returns the message content; the SQLite work runs in a thread.
+    Set `bypass` (or LLM_CACHE_BYPASS=1) to force a fresh call; the result
+    still refreshes the cache. `validate(content)` returning False keeps a
+    reply out of the cache (and turns a cached one into a miss).
+    """
+    key = cache_key(model, system_prompt, user_prompt)
+
+    if bypass or LLM_CACHE_BYPASS:
+        _count("bypassed")
+    else:
+        cached = await asyncio.to_thread(lookup, key)
+        if cached is not None and validate is not None and not validate(cached[0]):
+            cached = None  # stored before the check existed
+        if cached is not None:
+            content, latency = cached
+            _count("hits")
+            _count("latency_saved_seconds", latency)
+            metrics.inc("llm_cache_lookups", result="hit")
+            print(f"✅ LLM cache hit ({len(content)} characters, saved {latency:.1f}s)")
+            return content
+        _count("misses")
+        metrics.inc("llm_cache_lookups", result="miss")
+
+    started = time.perf_counter()
+    content = await call()
+    latency = time.perf_counter() - started
+    if content and (validate is None or validate(content)):
+        await asyncio.to_thread(store, key, model, content, latency)
+    return content
+
+
+def cache_stats():
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["latency_saved_seconds"] = round(stats["latency_saved_seconds"], 3)
+    try:
+        conn = _connect()
+        try:
+            stats["entries"], stats["bytes"] = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+    return stats
@@ -0,0 +1,88 @@
+import csv
+import io
+import re
+
+# ✅ Column order the rest of the pipeline (and the GitHub CSV) expects
+CANONICAL_COLUMNS = ["Pos", "Sail", "Boat", "Skipper", "Yacht Club", "Results", "Total Points"]
+
+# ✅ Known header spellings per canonical column, most specific first
+HEADER_ALIASES = {
+    "Pos": ["pos", "position", "place", "pl", "rank", "#"],
+    "Sail": ["sail", "sail #", "sail no", "sail number", "sail num", "bow", "bow #"],
+    "Boat": ["boat", "boat name", "yacht", "yacht name", "vessel"],
+    "Skipper": ["skipper", "helm", "helmsman", "skipper name", "name", "sailor", "owner"],
+    "Yacht Club": ["yacht club", "club", "yc", "affiliation", "club name"],
+    "Results": ["results", "race results", "races", "scores", "series"],
+    "Total Points": ["total points", "total", "total pts", "net points", "net", "nett", "points", "pts"],
+}
+
+# ✅ Without these the table is not a results table we understand
+REQUIRED_COLUMNS = ["Pos", "Total Points"]
+IDENTITY_COLUMNS = ["Sail", "Boat", "Skipper"]
+
+RACE_COLUMN_RE = re.compile(r"^(?:r|race)?\s*(\d+)$")
+
+
+def normalize_header(header):
+    """'Sail No.' -> 'sail no'"""
+    header = re.sub(r"[.:_]", " ", header.strip().lower())
+    return re.sub(r"\s+", " ", header).strip()
+
+
+def map_headers(headers):
+    """Map each canonical column to the header it comes from.
+
+    Returns (mapping, race_headers) or None if the headers can't be mapped.
+    Individual race columns (R1, R2, 3, ...) are collected separately and
+    joined into Results when there is no Results column.
+    """
+    normalized = {normalize_header(h): h for h in headers}
+    mapping = {}
+    for column, aliases in HEADER_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized and normalized[alias] not in mapping.values():
+                mapping[column] = normalized[alias]
+                break
+
+    race_headers = [h for h in headers if RACE_COLUMN_RE.match(normalize_header(h))]
+
+    if any(column not in mapping for column in REQUIRED_COLUMNS):
+        return None
+    if not any(column in mapping for column in IDENTITY_COLUMNS):
+        return None
+    return mapping, race_headers
+
+
+def format_rows_locally(raw_data):
+    """Build the canonical CSV from header-keyed rows, or return None if the headers don't map.
+
+    `raw_data` is the list returned by scrape_regatta_page: one dict per table
+    row keyed by that table's header text.
+    """
+    if not raw_data or not all(isinstance(row, dict) for row in raw_data):
+        return None
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(CANONICAL_COLUMNS)
+
+    mappings = {}
+    for row in raw_data:
+        headers = tuple(row)
+        if headers not in mappings:
+            mappings[headers] = map_headers(headers)
+        if mappings[headers] is None:
+            return None
+        mapping, race_headers = mappings[headers]
+
+        values = []
+        for column in CANONICAL_COLUMNS:
+            if column in mapping:
+                values.append(row[mapping[column]])
+            elif column == "Results" and race_headers:
+                values.append(",".join(row[h] for h in race_headers if row[h]))
+            else:
+                values.append("")
+        writer.writerow(values)
+
+    return output.getvalue()
@@ -1,40 +1,202 @@
-from flask import Flask, request, jsonify
-from scrape_regatta import scrape_regatta_page
-from openai_formatter import format_data_with_gpt
-from save_csv import save_to_csv
+import queue
+from concurrent.futures import CancelledError
+from flask import Flask, Response, request, jsonify, render_template
+from driver_pool import get_pool, pool_stats
+from llm_cache import cache_stats
+from jobs import get_queue, sse_stream
+from openai_formatter import format_results, get_client
+import metrics
+import startup
 
 app = Flask(__name__)
 
-@app.route("/fetch-results", methods=["POST"])
-def fetch_results():
-    """API endpoint to scrape, format, and save race results to GitHub."""
-    data = request.json
-    url = data.get("url")
+# ✅ The scrape/format/save pipeline (Selenium, BeautifulSoup, pandas, the OpenAI SDK) is imported by the
+# first scrape or by warm-up, not at startup
+PIPELINE_MODULES = ("scrape_regatta", "save_csv", "snapshots", "scrape_regatta_results", "selenium.webdriver")
+startup.register("pipeline", startup.import_modules(*PIPELINE_MODULES))
+startup.register("openai", get_client, optional=True)  # ✅ reported, but OpenAI is only the fallback formatter
+if startup.WARM_UP_BROWSERS:
+    startup.register("browsers", lambda: get_pool().prewarm(startup.WARM_UP_BROWSERS))
 
-    if not url:
-        print("❌ No URL provided!")
-        return jsonify({"error": "URL is required"}), 400
+def run_fetch_results(job, url, no_cache=False):
+    """Scrape, format and save one regatta, reporting progress on `job`."""
+    from scrape_regatta import scrape_regatta_page
 
     print(f"🔍 Fetching race results from: {url}")
+    job.progress(f"Scraping {url}", stage="scrape")
 
-    raw_results = scrape_regatta_page(url)
+    with metrics.stage("scrape"):
+        raw_results = scrape_regatta_page(url)
 
     if "error" in raw_results:
         print("❌ Error in scraping:", raw_results["error"])
-        return jsonify({"error": raw_results["error"]})
+        raise ValueError(raw_results["error"])
 
     print(f"✅ Extracted {len(raw_results)} rows from webpage")  # ✅ Log data extracted from webpage
+    job.progress(f"Extracted {len(raw_results)} rows", stage="scrape")
+    job.check_cancelled()
+    job.progress("Formatting results", stage="format")
 
-    formatted_csv = format_data_with_gpt(raw_results)
-
-    if "Error" in formatted_csv:
-        print("❌ OpenAI failed to format data:", formatted_csv)
-        return jsonify({"error": formatted_csv})
+    try:
+        with metrics.stage("format"):
+            formatted_csv, formatter = format_results(raw_results, bypass_cache=no_cache)
+    except ValueError as e:
+        print("❌ OpenAI failed to format data:", e)
+        raise
 
     print(f"✅ Saving CSV with {len(formatted_csv.splitlines())} rows")  # ✅ Log CSV size
+    job.progress(f"Formatted {len(formatted_csv.splitlines())} CSV lines with the {formatter} formatter", stage="format")
+    job.check_cancelled()
+    job.progress("Saving CSV and pushing to GitHub", stage="save")
+    return save_if_changed(url, formatted_csv, formatter, job=job)
+
+
+def save_if_changed(url, formatted_csv, formatter, job=None):
+    """Save and publish a formatted regatta CSV unless no row changed since the last scrape of `url`.
+
+    The push is batched, so it is only queued here; its outcome is reported on `job`.
+    """
+    from save_csv import save_to_csv
+    from local_formatter import IDENTITY_COLUMNS
+    from snapshots import get_snapshots
+
+    # ✅ A live regatta is re-scraped after every race: unchanged scrapes are neither saved nor pushed
+    snapshots = get_snapshots()
+    delta = snapshots.diff_csv(f"csv:{url}", formatted_csv, IDENTITY_COLUMNS)
+    print(f"🔍 Changes since the last scrape: {delta.describe()}")
+    if delta.empty:
+        return {"message": "No changes since the last scrape", "file_path": None, "formatter": formatter,
+                "changes": delta.summary()}
+
+    with metrics.stage("save"):
+        file_path, future = save_to_csv(formatted_csv, source_url=url, on_published=lambda: snapshots.commit(delta))
+
+    if future is None:
+        message = "Data saved (publishing is not configured)"
+    else:
+        message = "Data saved and queued for publishing"
+        if job is not None:
+            job.track_publish(future)
+    print(f"✅ {message}: {file_path}")
+    return {"message": message, "file_path": file_path, "formatter": formatter, "changes": delta.summary()}
+
+
+def submit_scrape(data):
+    """Queue a scrape job for a request body; returns (job, error_response)."""
+    url = (data or {}).get("url")
+    if not url:
+        print("❌ No URL provided!")
+        return None, (jsonify({"error": "URL is required"}), 400)
+    try:
+        job = get_queue().submit("fetch-results", run_fetch_results, url=url, no_cache=bool(data.get("no_cache")))
+    except queue.Full:
+        return None, (jsonify({"error": "Too many scrapes queued, try again later"}), 503)
+    return job, None
+
+
+@app.route("/fetch-results", methods=["POST"])
+def fetch_results():
+    """API endpoint to scrape, format, and save race results to GitHub.
+
+    Runs on the bounded job pool and waits for the result; use /trigger-scrape
+    to get a job ID back immediately instead.
+    """
+    job, error = submit_scrape(request.json)
+    if error:
+        return error
+
+    try:
+        job.future.result()
+    except CancelledError:  # ✅ cancelled while still queued: the job never ran
+        pass
+    payload, status_code = job.outcome()
+    return jsonify(payload), status_code
+
+
+@app.route("/trigger-scrape", methods=["POST"])
+def trigger_scrape():
+    """Queue a scrape and return its job ID without waiting for it."""
+    job, error = submit_scrape(request.json)
+    if error:
+        return error
+    return jsonify({"message": f"Queued scrape job {job.id}", "job_id": job.id,
+                    "progress_url": f"/get-progress/{job.id}/stream"}), 202
+
+
+@app.route("/get-progress", methods=["GET"])
+@app.route("/get-progress/<job_id>", methods=["GET"])
+def get_progress(job_id=None):
+    """Progress snapshot for one job (or the most recent one)."""
+    job = get_queue().get(job_id) if job_id else get_queue().latest()
+    if job is None:
+        if job_id:
+            return jsonify({"error": "Unknown job"}), 404
+        return jsonify({"progress": []})
+    return jsonify(job.to_dict())
+
+
+@app.route("/get-progress/<job_id>/stream", methods=["GET"])
+def stream_progress(job_id):
+    """Server-Sent Events stream of a job's progress; resumes from Last-Event-ID."""
+    job = get_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    last_seq = int(request.headers.get("Last-Event-ID", 0) or 0)
+    return Response(sse_stream(job, last_seq), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/cancel-scrape/<job_id>", methods=["POST"])
+def cancel_scrape(job_id):
+    """Cancel a queued job, or stop a running one at its next stage."""
+    job = get_queue().cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict(events=False))
+
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    """Recent jobs and queue occupancy."""
+    return jsonify({"jobs": get_queue().list(), "stats": get_queue().stats()})
+
+
+@app.route("/admin", methods=["GET"])
+def admin():
+    return render_template("admin.html")
+
+
+@app.route("/pool-stats", methods=["GET"])
+def get_pool_stats():
+    """Expose the shared browser pool and HTTP connection pool counters."""
+    from http_client import stats as http_stats
+
+    return jsonify({**pool_stats(), "http": http_stats()})
+
+
+@app.route("/llm-cache-stats", methods=["GET"])
+def get_llm_cache_stats():
+    """Expose LLM response cache hit rate and latency saved."""
+    return jsonify(cache_stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus scrape endpoint with per-stage latency histograms and counters."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: answers without touching the browser pool, database or OpenAI."""
+    return jsonify({"status": "ok"})
+
 
-    file_path = save_to_csv(formatted_csv)
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: 503 until the warm-up steps have run (see startup.py)."""
+    ready, payload = startup.readiness()
+    return jsonify(payload), 200 if ready else 503
 
-    print(f"✅ CSV saved and uploaded to GitHub: {file_path}")
 
-    return jsonify({"message": "Data successfully saved and uploaded!", "file_path": file_path})
+startup.on_import()
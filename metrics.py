@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# ✅ Set METRICS_ENABLED=0 to turn every call below into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# ✅ Latency buckets (seconds) covering a parse (ms) up to a slow GPT call or git push (tens of seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add `value` to a counter (rows extracted, bytes, tokens, ...)."""
+    if not METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """Record one observation in a histogram."""
+    if not METRICS_ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+@contextmanager
+def _timed(stage_name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_duration_seconds", time.perf_counter() - started, stage=stage_name)
+
+
+_NOOP = nullcontext()  # reusable, so a disabled stage() allocates nothing
+
+
+def stage(stage_name):
+    """Time a pipeline stage: `with metrics.stage("render"): ...`"""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _timed(stage_name)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                      for k, v in _histograms.items()}
+
+    lines = []
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {name}_total counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}_total{_format_labels(labels)} {value}")
+
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(BUCKETS, histogram["buckets"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
@@ -0,0 +1,52 @@
+from sqlalchemy import inspect, text
+from models import Base, get_engine
+from aggregates import rebuild_all
+from normalize import load_results, record_from_legacy_row
+
+LEGACY_REGATTA = "Legacy race_results"  # race_results rows carry no regatta or fleet
+
+def legacy_records(conn, tables):
+    """Rows of the two legacy tables, as load_results records."""
+    if "regatta_results" in tables:
+        rows = conn.execute(text(
+            "SELECT regatta_name, regatta_date, race_category, pos, sail, boat, skipper, "
+            "yacht_club, results, total_points FROM regatta_results ORDER BY id"
+        ))
+        for row in rows:
+            yield record_from_legacy_row(row._mapping)
+
+    if "race_results" in tables:
+        rows = conn.execute(text(
+            "SELECT position, sail_number, boat_name, skipper, yacht_club, results, total_points "
+            "FROM race_results ORDER BY id"
+        ))
+        for row in rows:
+            yield {
+                "regatta_name": LEGACY_REGATTA,
+                "regatta_date": "",
+                "category": "Unknown",
+                "position": row.position,
+                "sail_number": row.sail_number,
+                "boat_name": row.boat_name,
+                "skipper": row.skipper,
+                "yacht_club": row.yacht_club,
+                "results": row.results,
+                "total_points": row.total_points,
+            }
+
+def migrate():
+    """Copy race_results and regatta_results into the normalized tables (safe to re-run)."""
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    tables = set(inspect(engine).get_table_names())
+
+    with engine.begin() as conn:
+        records = list(legacy_records(conn, tables))
+        fleet_ids = load_results(conn, records)
+        rebuild_all(conn)
+
+    print(f"✅ Migrated {len(records)} legacy rows into {len(fleet_ids)} fleets")
+    return len(records)
+
+if __name__ == "__main__":
+    migrate()
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, create_engine
+from sqlalchemy import (Boolean, Column, Date, Float, ForeignKey, Index, Integer, String, Text,
+                        UniqueConstraint, create_engine)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
 
 # ✅ Define Base for ORM Models
 Base = declarative_base()
@@ -19,17 +21,140 @@ class RaceResult(Base):
     results = Column(Text, nullable=True)
     total_points = Column(Integer, nullable=False)
 
+# ✅ Normalized results schema: regatta -> fleet -> entry -> per-race score
+class Regatta(Base):
+    __tablename__ = "regattas"
+    __table_args__ = (
+        UniqueConstraint("name", "start_date", name="uq_regattas_name_start"),
+        Index("ix_regattas_start_date", "start_date"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(200), nullable=False)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
+    date_text = Column(String(100), nullable=True)  # as scraped, e.g. "03/15/2024 - 03/16/2024"
+    source_url = Column(Text, nullable=True)
+
+class Fleet(Base):
+    __tablename__ = "fleets"
+    __table_args__ = (UniqueConstraint("regatta_id", "name", name="uq_fleets_regatta_name"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    regatta_id = Column(Integer, ForeignKey("regattas.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(100), nullable=False)
+
+class Entry(Base):
+    __tablename__ = "entries"
+    __table_args__ = (
+        UniqueConstraint("fleet_id", "sail_number", "skipper", name="uq_entries_fleet_boat"),
+        Index("ix_entries_skipper_fleet", "skipper", "fleet_id"),
+        Index("ix_entries_sail_fleet", "sail_number", "fleet_id"),
+        Index("ix_entries_club_position", "yacht_club", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fleet_id = Column(Integer, ForeignKey("fleets.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=True)
+    position_tied = Column(Boolean, nullable=False, default=False)
+    sail_number = Column(String(50), nullable=False, default="")
+    boat_name = Column(String(100), nullable=True)
+    skipper = Column(String(100), nullable=False, default="")
+    yacht_club = Column(String(100), nullable=True)
+    total_points = Column(Float, nullable=True)
+    points_tied = Column(Boolean, nullable=False, default=False)
+
+class RaceScore(Base):
+    __tablename__ = "race_scores"
+    __table_args__ = (UniqueConstraint("entry_id", "race_number", name="uq_race_scores_entry_race"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entry_id = Column(Integer, ForeignKey("entries.id", ondelete="CASCADE"), nullable=False)
+    race_number = Column(Integer, nullable=False)
+    points = Column(Float, nullable=True)
+    code = Column(String(10), nullable=True)  # DNF, DNS, OCS, ...
+    discarded = Column(Boolean, nullable=False, default=False)
+
+# ✅ Materialized aggregates behind /query-db (refreshed incrementally on ingest, see aggregates.py)
+class SkipperStat(Base):
+    __tablename__ = "skipper_stats"
+    __table_args__ = (
+        Index("ix_skipper_stats_key", "skipper_key"),
+        Index("ix_skipper_stats_wins", "wins", "avg_position"),
+    )
+
+    skipper = Column(String(100), primary_key=True)
+    skipper_key = Column(String(100), nullable=False)  # lower-cased, for lookups from chat questions
+    entries = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)
+    podiums = Column(Integer, nullable=False)
+    avg_position = Column(Float, nullable=True)
+    best_position = Column(Integer, nullable=True)
+    last_date = Column(Date, nullable=True)
+
+class ClubStat(Base):
+    __tablename__ = "club_stats"
+    __table_args__ = (
+        Index("ix_club_stats_key", "club_key"),
+        Index("ix_club_stats_wins", "wins", "avg_position"),
+    )
+
+    yacht_club = Column(String(100), primary_key=True)
+    club_key = Column(String(100), nullable=False)
+    entries = Column(Integer, nullable=False)
+    skippers = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)
+    avg_position = Column(Float, nullable=True)
+
+class BoatStat(Base):
+    __tablename__ = "boat_stats"
+
+    sail_number = Column(String(50), primary_key=True)
+    boat_name = Column(String(100), nullable=True)
+    entries = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)
+    best_position = Column(Integer, nullable=True)
+    avg_position = Column(Float, nullable=True)
+    last_date = Column(Date, nullable=True)
+
+class FleetSeries(Base):
+    __tablename__ = "fleet_series"
+    __table_args__ = (Index("ix_fleet_series_standings", "fleet_key", "season", "series_points"),)
+
+    fleet_name = Column(String(100), primary_key=True)
+    season = Column(Integer, primary_key=True)
+    skipper = Column(String(100), primary_key=True)
+    fleet_key = Column(String(100), nullable=False)  # lower-cased fleet name
+    regattas = Column(Integer, nullable=False)
+    series_points = Column(Float, nullable=False)  # low point: sum of finishing positions
+    best_position = Column(Integer, nullable=True)
+
 # ✅ Get DATABASE_URL securely from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise ValueError("Missing DATABASE_URL. Set it in Render environment variables.")
+# ✅ Session factory, bound to the engine when it is created
+SessionLocal = sessionmaker()
+
+_engine = None
+_engine_lock = threading.Lock()
+
 
-# ✅ Create Database Engine
-engine = create_engine(DATABASE_URL)
+def get_engine():
+    """Return the shared engine, connecting and creating missing tables on first use (not at import)."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if not DATABASE_URL:
+                raise ValueError("Missing DATABASE_URL. Set it in Render environment variables.")
+            engine = create_engine(DATABASE_URL)
+            Base.metadata.create_all(engine)  # ✅ Create Tables if They Don't Exist
+            SessionLocal.configure(bind=engine)
+            _engine = engine
+        return _engine
 
-# ✅ Create Tables if They Don't Exist
-Base.metadata.create_all(engine)
 
-# ✅ Create a Session Factory
-SessionLocal = sessionmaker(bind=engine)
+def __getattr__(name):
+    # ✅ `models.engine` still works for scripts, connecting on first access
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,154 @@
+import re
+from sqlalchemy import delete, insert, select
+from models import Entry, Fleet, RaceScore, Regatta
+from page_cache import find_dates
+
+SCORE_TOKEN_RE = re.compile(r"(\d+(?:\.\d+)?)|([A-Za-z]{2,5})")
+
+
+def split_scores(results):
+    """'1,2,(DNF)' / '1-2-[4]' / '1 2 3' -> ['1', '2', '(DNF)']"""
+    results = (results or "").strip()
+    if not results:
+        return []
+    if "," in results:
+        tokens = results.split(",")
+    elif re.search(r"\d\s*-\s*[\d\[(A-Za-z]", results):
+        tokens = results.split("-")
+    else:
+        tokens = results.split()
+    return [t.strip() for t in tokens if t.strip()]
+
+
+def parse_race_scores(results):
+    """Race-by-race scores as (race_number, points, code, discarded) tuples.
+
+    Discarded races are written in () or []; penalty codes such as DNF, DNS
+    or OCS may appear alone or with their points ('DNF/9', '9 DNF').
+    """
+    scores = []
+    for race_number, token in enumerate(split_scores(results), start=1):
+        discarded = token[0] in "([" and token[-1] in ")]"
+        points = None
+        code = None
+        for number, letters in SCORE_TOKEN_RE.findall(token):
+            if number and points is None:
+                points = float(number)
+            elif letters and code is None:
+                code = letters.upper()
+        scores.append((race_number, points, code, discarded))
+    return scores
+
+
+def regatta_dates(date_text):
+    """(start_date, end_date) from a scraped date string like '03/15/2024 - 03/16/2024'."""
+    dates = find_dates(date_text or "")
+    if not dates:
+        return None, None
+    return dates[0], dates[-1]
+
+
+def record_from_legacy_row(row):
+    """A regatta_results row (or a validated /send_to_db CSV row) as a load_results record."""
+    return {
+        "regatta_name": row["regatta_name"] or "Unknown Regatta",
+        "regatta_date": row["regatta_date"],
+        "category": row["race_category"],
+        "position": row["pos"],
+        "sail_number": row["sail"],
+        "boat_name": row["boat"],
+        "skipper": row["skipper"],
+        "yacht_club": row["yacht_club"],
+        "results": row["results"],
+        "total_points": row["total_points"],
+    }
+
+
+def _regatta_id(conn, name, date_text, source_url):
+    start, end = regatta_dates(date_text)
+    regattas = Regatta.__table__
+    same_start = regattas.c.start_date.is_(None) if start is None else regattas.c.start_date == start
+    found = conn.execute(select(regattas.c.id).where(regattas.c.name == name, same_start)).scalar()
+    if found is not None:
+        return found
+    return conn.execute(insert(regattas).values(
+        name=name, start_date=start, end_date=end, date_text=date_text, source_url=source_url
+    )).inserted_primary_key[0]
+
+
+def _fleet_id(conn, regatta_id, name):
+    fleets = Fleet.__table__
+    found = conn.execute(select(fleets.c.id).where(fleets.c.regatta_id == regatta_id, fleets.c.name == name)).scalar()
+    if found is not None:
+        return found
+    return conn.execute(insert(fleets).values(regatta_id=regatta_id, name=name)).inserted_primary_key[0]
+
+
+def clear_fleets(conn, fleet_keys):
+    """Delete fleets, given as (regatta name, fleet name), whose boats were all removed; returns their ids."""
+    regattas, fleets = Regatta.__table__, Fleet.__table__
+    entries, race_scores = Entry.__table__, RaceScore.__table__
+    fleet_ids = []
+    for regatta_name, category in fleet_keys:
+        fleet_ids.extend(conn.execute(
+            select(fleets.c.id).join(regattas, regattas.c.id == fleets.c.regatta_id)
+            .where(regattas.c.name == (regatta_name or "Unknown Regatta"), fleets.c.name == (category or "Unknown"))
+        ).scalars())
+    if fleet_ids:
+        old_entries = select(entries.c.id).where(entries.c.fleet_id.in_(fleet_ids))
+        conn.execute(delete(race_scores).where(race_scores.c.entry_id.in_(old_entries)))
+        conn.execute(delete(entries).where(entries.c.fleet_id.in_(fleet_ids)))
+        conn.execute(delete(fleets).where(fleets.c.id.in_(fleet_ids)))
+    return fleet_ids
+
+
+def load_results(conn, records, source_url=None):
+    """Write scraped results into the normalized tables; returns the ids of the fleets written.
+
+    `records` are dicts with regatta_name, regatta_date, category, position,
+    sail_number, boat_name, skipper, yacht_club, results and total_points
+    (position_tied / points_tied optional). Each fleet present in `records`
+    is replaced as a whole, so re-loading a re-scraped regatta is idempotent.
+    """
+    fleets = {}
+    for record in records:
+        key = (record["regatta_name"], record.get("regatta_date") or "", record.get("category") or "Unknown")
+        boat = (record.get("sail_number") or "", record.get("skipper") or "")
+        fleets.setdefault(key, {})[boat] = record  # last one wins
+
+    entries = Entry.__table__
+    race_scores = RaceScore.__table__
+    fleet_ids = []
+    for (regatta_name, date_text, category), boats in fleets.items():
+        regatta_id = _regatta_id(conn, regatta_name, date_text, source_url)
+        fleet_id = _fleet_id(conn, regatta_id, category)
+        fleet_ids.append(fleet_id)
+
+        old_entries = select(entries.c.id).where(entries.c.fleet_id == fleet_id)
+        conn.execute(delete(race_scores).where(race_scores.c.entry_id.in_(old_entries)))
+        conn.execute(delete(entries).where(entries.c.fleet_id == fleet_id))
+
+        rows = [{
+            "fleet_id": fleet_id,
+            "position": record.get("position"),
+            "position_tied": bool(record.get("position_tied", False)),
+            "sail_number": sail,
+            "boat_name": record.get("boat_name"),
+            "skipper": skipper,
+            "yacht_club": record.get("yacht_club"),
+            "total_points": record.get("total_points"),
+            "points_tied": bool(record.get("points_tied", False)),
+        } for (sail, skipper), record in boats.items()]
+        entry_ids = conn.execute(
+            insert(entries).returning(entries.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        scores = [
+            {"entry_id": entry_id, "race_number": race_number, "points": points, "code": code, "discarded": discarded}
+            for entry_id, record in zip(entry_ids, boats.values())
+            for race_number, points, code, discarded in parse_race_scores(record.get("results"))
+        ]
+        if scores:
+            conn.execute(insert(race_scores), scores)
+
+    return fleet_ids
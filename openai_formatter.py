@@ -1,38 +1,275 @@
-import openai
+import asyncio
+import csv
+import io
 import os
 import json
+import random
+import threading
+import time
+import metrics
+from local_formatter import CANONICAL_COLUMNS, format_rows_locally
+from llm_cache import acached_completion
 
-# ✅ Initialize OpenAI API
+# ✅ OpenAI API key; the client is created on first use, not at import
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
-def format_data_with_gpt(raw_data):
-    """Send extracted race data to OpenAI for formatting into CSV."""
-    
-    if not raw_data:
-        print("❌ No data provided for OpenAI to process!")
-        return "Error: No data extracted from the webpage"
+# ✅ Chunking / concurrency limits (override in environment variables)
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "6000"))
+MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "2048"))
+CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "2"))
+
+CSV_HEADER = ",".join(CANONICAL_COLUMNS)  # ✅ the same header the local formatter writes
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English/JSON)."""
+    return len(text) // 4 + 1
+
+
+def chunk_rows(raw_data, prompt_budget=PROMPT_TOKEN_BUDGET, output_budget=MAX_OUTPUT_TOKENS):
+    """Split rows into chunks whose prompt and expected CSV output both fit the token budgets."""
+    chunks = []
+    current = []
+    prompt_tokens = 0
+    output_tokens = 0
+    for row in raw_data:
+        row_json = json.dumps(row, separators=(",", ":"))
+        row_tokens = estimate_tokens(row_json)
+        # A CSV line is roughly as long as the row's JSON without keys and quotes
+        row_output_tokens = estimate_tokens(",".join(row.values() if isinstance(row, dict) else row))
+        if current and (prompt_tokens + row_tokens > prompt_budget
+                        or output_tokens + row_output_tokens > output_budget * 0.8):
+            chunks.append(current)
+            current, prompt_tokens, output_tokens = [], 0, 0
+        current.append(row)
+        prompt_tokens += row_tokens
+        output_tokens += row_output_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _RateLimiter:
+    """Spaces out request starts to stay under LLM_REQUESTS_PER_MINUTE."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Claim the next start slot; returns how long to wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        return start - now
+
+    async def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiter = _RateLimiter(REQUESTS_PER_MINUTE)
+
+_client = None
+_client_lock = threading.Lock()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """The event loop every OpenAI call runs on, started in a daemon thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True, name="openai").start()
+        return _loop
+
+
+def get_client():
+    """Shared async OpenAI client, importing openai on first use (only used on the OpenAI loop)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            if not OPENAI_API_KEY:
+                raise ValueError("Missing OPENAI_API_KEY. Set it in environment variables.")
+            import openai
+            _client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+        return _client
+
+
+def submit(coro):
+    """Schedule an OpenAI coroutine on the OpenAI loop; returns a concurrent.futures.Future.
+
+    Async callers await asyncio.wrap_future(submit(...)). Cancelling the
+    future cancels the coroutine, and with it the HTTP request in flight.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run(coro):
+    """Run an OpenAI coroutine on the OpenAI loop and wait for its result (for sync callers)."""
+    return submit(coro).result()
+
+
+async def complete_async(model, system_prompt, prompt, bypass_cache=False, validate=None):
+    """One chat completion through the LLM cache; returns the message text.
+
+    Requests are spaced out by the rate limiter and 429s retried with
+    exponential backoff. Must run on the OpenAI loop (see submit/run).
+    """
+    async def call_openai():
+        import openai
+        client = get_client()
+        for attempt in range(MAX_RETRIES + 1):
+            await _rate_limiter.wait()
+            try:
+                with metrics.stage("llm_format"):
+                    response = await client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=MAX_OUTPUT_TOKENS
+                    )
+                break
+            except openai.RateLimitError:
+                if attempt == MAX_RETRIES:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
 
-    print(f"🔍 Sending {len(raw_data)} rows to OpenAI for formatting")  # ✅ Debugging log
+        _record_usage(response)
+        return response.choices[0].message.content
 
+    return await acached_completion(model, system_prompt, prompt, call_openai, bypass=bypass_cache, validate=validate)
+
+
+def _csv_rows(csv_text):
+    """Data lines of a CSV reply, without code fences, blank lines or the header."""
+    rows = []
+    for line in csv_text.strip().splitlines():
+        line = line.strip()
+        if not line or line.startswith("```"):
+            continue
+        if line.replace(" ", "").lower().startswith(CSV_HEADER.replace(" ", "").lower()[:8]):
+            continue
+        rows.append(line)
+    return rows
+
+
+def _chunk_prompt(rows):
     prompt = f"""
     Convert the following sailing race results into a structured CSV format:
-    {json.dumps(raw_data, indent=2)}
+    {json.dumps(rows, separators=(",", ":"))}
 
     Ensure the format:
-    Pos, Sail, Boat, Skipper, Yacht Club, Results, Total Points
+    {CSV_HEADER}
+    Output exactly one CSV line per input row, header first, and nothing else.
     """
+    return "You are a data formatting assistant.", prompt
+
+
+def _record_usage(response):
+    if response.usage is not None:
+        metrics.inc("llm_tokens", response.usage.prompt_tokens, kind="prompt")
+        metrics.inc("llm_tokens", response.usage.completion_tokens, kind="completion")
+
+
+def _retry_delay(attempt):
+    delay = RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF)
+    metrics.inc("llm_retries", reason="rate_limit")
+    print(f"⚠️ OpenAI rate limited, retrying in {delay:.1f}s")
+    return delay
 
-    response = client.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[
-            {"role": "system", "content": "You are a data formatting assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=2048
-    )
 
-    csv_data = response.choices[0].message.content
-    print(f"✅ OpenAI response received ({len(csv_data)} characters)")  # ✅ Debugging log
+async def format_chunk_with_gpt_async(rows, bypass_cache=False):
+    """Format one chunk of rows; returns the CSV data lines."""
+    system_prompt, prompt = _chunk_prompt(rows)
+    # ✅ A short or padded reply is never cached, so the retry below can't be answered by it
+    csv_data = await complete_async("gpt-4-turbo", system_prompt, prompt, bypass_cache=bypass_cache,
+                                    validate=lambda reply: len(_csv_rows(reply)) == len(rows))
+    return _csv_rows(csv_data)
 
+
+def _stitch(chunks, results):
+    """Join formatted chunks under one header (ValueError if a chunk came back short)."""
+    for chunk, rows in zip(chunks, results):
+        if len(rows) != len(chunk):
+            raise ValueError(f"OpenAI returned {len(rows)} rows for a chunk of {len(chunk)} rows")
+
+    # ✅ Re-serialise the replies so both formatters emit byte-identical CSV ("1, 123" -> "1,123")
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(CANONICAL_COLUMNS)
+    lines = [line for rows in results for line in rows]
+    for cells in csv.reader(lines, skipinitialspace=True):
+        writer.writerow(cell.strip() for cell in cells)
+    csv_data = output.getvalue()
+    print(f"✅ OpenAI response received ({len(csv_data)} characters, {len(lines)} rows)")  # ✅ Debugging log
     return csv_data
+
+
+async def format_data_with_gpt_async(raw_data, bypass_cache=False):
+    """Send extracted race data to OpenAI for formatting into CSV.
+
+    Large regattas are split into chunks that fit the token budget and
+    formatted concurrently (LLM_CONCURRENCY at a time); the replies are
+    stitched back together under a single header and checked against the
+    input row count. Raises ValueError when there is nothing to format or
+    OpenAI fails. Must run on the OpenAI loop (see submit/run).
+    """
+    
+    if not raw_data:
+        print("❌ No data provided for OpenAI to process!")
+        raise ValueError("No data extracted from the webpage")
+
+    import openai
+    chunks = chunk_rows(raw_data)
+    print(f"🔍 Sending {len(raw_data)} rows to OpenAI for formatting in {len(chunks)} chunk(s)")  # ✅ Debugging log
+    slots = asyncio.Semaphore(CONCURRENCY)
+
+    async def format_chunk(chunk):
+        async with slots:
+            rows = await format_chunk_with_gpt_async(chunk, bypass_cache)
+            if len(rows) != len(chunk):
+                # ✅ Ask again once (skipping the cache) before giving up on a short or padded reply
+                print(f"⚠️ OpenAI returned {len(rows)} rows for {len(chunk)}, retrying chunk")
+                rows = await format_chunk_with_gpt_async(chunk, bypass_cache=True)
+            return rows
+
+    try:
+        results = await asyncio.gather(*(format_chunk(chunk) for chunk in chunks))
+    except (openai.OpenAIError, ValueError) as e:  # ✅ ValueError: no API key configured
+        raise ValueError(f"OpenAI request failed: {e}") from e
+
+    return _stitch(chunks, results)
+
+
+def format_data_with_gpt(raw_data, bypass_cache=False):
+    """format_data_with_gpt_async for sync callers (the job queue and the Flask apps)."""
+    return run(format_data_with_gpt_async(raw_data, bypass_cache))
+
+
+def format_results(raw_data, bypass_cache=False):
+    """Format scraped rows as CSV locally when the table headers map, otherwise via OpenAI.
+
+    Returns (csv_data, formatter) where formatter is "local" or "openai";
+    raises ValueError when the OpenAI fallback fails.
+    """
+    with metrics.stage("local_format"):
+        csv_data = format_rows_locally(raw_data)
+
+    if csv_data is not None:
+        print(f"✅ Formatted {len(raw_data)} rows locally (no OpenAI call)")
+        metrics.inc("formatter_used", formatter="local")
+        return csv_data, "local"
+
+    print("🔍 Table headers could not be mapped, falling back to OpenAI")
+    metrics.inc("formatter_used", formatter="openai")
+    return format_data_with_gpt(raw_data, bypass_cache=bypass_cache), "openai"
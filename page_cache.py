@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, date
+
+# ✅ Cache tuning (override in environment variables)
+CACHE_DIR = os.getenv("PAGE_CACHE_DIR", ".page_cache")
+CACHE_MAX_BYTES = int(float(os.getenv("PAGE_CACHE_MAX_MB", "200")) * 1024 * 1024)
+FINAL_TTL = int(os.getenv("PAGE_CACHE_FINAL_TTL", str(7 * 24 * 3600)))  # finished regattas rarely change
+LIVE_TTL = int(os.getenv("PAGE_CACHE_LIVE_TTL", "120"))  # in-progress regattas change after every race
+
+DATE_PATTERNS = [
+    (re.compile(r'\b(\d{1,2}/\d{1,2}/\d{4})\b'), ['%m/%d/%Y']),
+    (re.compile(r'\b(\d{4}-\d{2}-\d{2})\b'), ['%Y-%m-%d']),
+    (re.compile(r'\b([A-Z][a-z]{2,8}\.? \d{1,2},? \d{4})\b'), ['%B %d, %Y', '%B %d %Y', '%b %d, %Y', '%b %d %Y', '%b. %d, %Y']),
+]
+
+
+def _parse_date(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def find_dates(text):
+    """Every recognisable date in `text`, sorted."""
+    dates = []
+    for pattern, formats in DATE_PATTERNS:
+        for match in pattern.findall(text):
+            parsed = _parse_date(match, formats)
+            if parsed:
+                dates.append(parsed)
+    return sorted(dates)
+
+
+FINAL_MARKER = re.compile(r'\bfinal (?:results|standings)\b', re.I)
+
+
+def _header(page_text):
+    return "\n".join(page_text.strip().split("\n")[:6])
+
+
+def regatta_end_date(page_text):
+    """Latest date mentioned in the page header (the regatta's last day), if any."""
+    dates = find_dates(_header(page_text))
+    return dates[-1] if dates else None
+
+
+def is_regatta_final(page_text, today=None):
+    """A regatta is treated as finished once its last day is in the past or its header says 'Final Results'."""
+    if FINAL_MARKER.search(_header(page_text)):
+        return True
+    end = regatta_end_date(page_text)
+    return end is not None and end < (today or date.today())
+
+
+class PageCache:
+    """URL-keyed on-disk cache of scraped page text with HTTP validators and LRU eviction."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, final_ttl=FINAL_TTL, live_ttl=LIVE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.final_ttl = final_ttl
+        self.live_ttl = live_ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "revalidated": 0, "stored": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".txt", base + ".json"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, url):
+        """Return the cached entry for `url` (fresh or stale), or None."""
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(body_path, encoding="utf-8") as f:
+                entry["text"] = f.read()
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+        try:
+            os.utime(body_path)  # ✅ mtime doubles as the LRU clock
+        except OSError:
+            self._count("misses")  # evicted since we read it
+            return None
+        entry["fresh"] = self.is_fresh(entry)
+        self._count("hits" if entry["fresh"] else "stale")
+        return entry
+
+    def has_fresh(self, url):
+        """True if a fresh copy of `url` is cached; reads only the metadata and counts no lookup."""
+        _, meta_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return self.is_fresh(json.load(f))
+        except (OSError, ValueError):
+            return False
+
+    def is_fresh(self, entry):
+        ttl = self.final_ttl if entry.get("final") else self.live_ttl
+        return time.time() - entry.get("fetched_at", 0) < ttl
+
+    def conditional_headers(self, entry):
+        """If-None-Match / If-Modified-Since headers for revalidating a stale entry."""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, text, etag=None, last_modified=None, source="http"):
+        """Store page text along with the validators from the response that produced it."""
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "final": is_regatta_final(text),
+            "source": source,
+        }
+        self._write(body_path, text)
+        self._write(meta_path, json.dumps(meta))
+        self._count("stored")
+        self.evict()
+
+    def mark_revalidated(self, url, entry):
+        """The server answered 304: keep the body and restart its TTL."""
+        _, meta_path = self._paths(url)
+        meta = {k: v for k, v in entry.items() if k not in ("text", "fresh")}
+        meta["fetched_at"] = time.time()
+        self._write(meta_path, json.dumps(meta))
+        self._count("revalidated")
+
+    def _write(self, path, content):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for stale_path in (path, path[:-4] + ".json"):
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+            total -= size
+            self._count("evictions")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"] + stats["stale"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide page cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
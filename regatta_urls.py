@@ -0,0 +1,19 @@
+from urllib.parse import urlparse, parse_qs
+
+REGATTA_URL_TEMPLATE = "https://www.regattanetwork.com/clubmgmt/applet_regatta_results.php?regatta_id={regatta_id}&media_format=1"
+
+def regatta_url(entry):
+    """Turn a regatta_id or a full URL into a results URL"""
+    entry = entry.strip()
+    if entry.isdigit():
+        return REGATTA_URL_TEMPLATE.format(regatta_id=entry)
+    return entry
+
+def regatta_id_from_url(url):
+    """Pull regatta_id out of the query string (falls back to the URL itself)"""
+    values = parse_qs(urlparse(url).query).get('regatta_id')
+    return values[0] if values else url
+
+def is_text_results_url(url):
+    """The media_format=1 applet is rendered by the server: if plain HTTP finds no results, Chrome won't either"""
+    return parse_qs(urlparse(url).query).get('media_format') == ['1']
@@ -0,0 +1,179 @@
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+# ✅ Race codes in the score matrix (0 = plain score). Codes scored as entries + 1 when no points are given.
+CODES = ["", "DNC", "DNS", "OCS", "ZFP", "UFD", "BFD", "SCP", "NSC", "DNF", "RET", "DSQ", "DNE", "RDG", "DPI",
+         "RAF", "OTHER"]
+CODE_IDS = {code: i for i, code in enumerate(CODES)}
+ENTRIES_PLUS_ONE = [CODE_IDS[c] for c in ("DNC", "DNS", "OCS", "UFD", "BFD", "NSC", "DNF", "RET", "DSQ", "DNE",
+                                          "RAF", "OTHER")]
+NOT_DISCARDABLE = [CODE_IDS["DNE"]]
+
+POINTS_TOLERANCE = 0.01
+
+_NUMBER_RE = r"(\d+(?:\.\d+)?)"
+_CODE_RE = r"([A-Za-z]{2,5})"
+
+
+class ScoreMatrix(NamedTuple):
+    """Race-by-race scores for n boats: points (n x races, NaN where not sailed), code ids and discard marks"""
+    points: np.ndarray
+    codes: np.ndarray
+    discarded: np.ndarray
+
+
+def _split_tokens(results):
+    """Race tokens of every Results string as one Series indexed by row number (same rules as normalize.split_scores)"""
+    text = pd.Series(results, dtype=object).fillna("").astype(str).str.strip().reset_index(drop=True)
+    has_comma = text.str.contains(",", regex=False)
+    dashed = ~has_comma & text.str.contains(r"\d\s*-\s*[\d\[(A-Za-z]", regex=True)
+    text = text.mask(has_comma, text.str.replace(r"\s*,\s*", ",", regex=True))
+    text = text.mask(dashed, text.str.replace(r"\s*-\s*", ",", regex=True))
+    text = text.mask(~has_comma & ~dashed, text.str.replace(r"\s+", ",", regex=True))
+    tokens = text.str.split(",").explode()
+    return tokens[tokens.notna() & (tokens != "")]
+
+
+def score_matrix(results):
+    """Parse a column of race strings ('1,2,(DNF)', '3 [12] 4', '1,DNF/9') into a ScoreMatrix"""
+    n = len(results)
+    tokens = _split_tokens(results)
+    rows = tokens.index.to_numpy()
+    races = tokens.groupby(level=0).cumcount().to_numpy()
+    width = int(races.max()) + 1 if len(races) else 0
+
+    # Plain scores ('3', '(12)') convert in one C pass; only tokens with codes go through the regexes
+    bare = tokens.str.strip("()[]")
+    discarded = (bare.str.len() < tokens.str.len()).to_numpy()
+    plain = bare.str.fullmatch(r"\d+(?:\.\d+)?").to_numpy(dtype=bool)
+    number = np.full(len(tokens), np.nan, dtype=np.float32)
+    number[plain] = bare[plain].astype("float32").to_numpy()
+    code_ids = np.zeros(len(tokens), dtype=np.int8)
+    coded = ~plain
+    if coded.any():
+        odd = bare[coded]
+        number[coded] = pd.to_numeric(odd.str.extract(_NUMBER_RE, expand=False), errors="coerce")
+        letters = odd.str.extract(_CODE_RE, expand=False).str.upper()
+        ids = pd.Categorical(letters, categories=CODES[1:]).codes.astype(np.int8) + 1
+        ids[(ids == 0) & letters.notna().to_numpy()] = CODE_IDS["OTHER"]
+        code_ids[coded] = ids
+
+    matrix = ScoreMatrix(np.full((n, width), np.nan, dtype=np.float32),
+                         np.zeros((n, width), dtype=np.int8),
+                         np.zeros((n, width), dtype=bool))
+    matrix.points[rows, races] = number
+    matrix.codes[rows, races] = code_ids
+    matrix.discarded[rows, races] = discarded
+    return matrix
+
+
+def fleet_ids(df, by=("Regatta_Name", "Category")):
+    """Integer fleet id per row (a missing regatta name or category is a fleet of its own, never -1)"""
+    return df.groupby(list(by), sort=False, observed=True, dropna=False).ngroup().to_numpy()
+
+
+def race_scores(matrix, fleet):
+    """Points per race with penalty codes scored as fleet entries + 1 where the page gave no points"""
+    entries = np.bincount(fleet)[fleet].astype(np.float32)
+    penalised = np.isin(matrix.codes, ENTRIES_PLUS_ONE) & np.isnan(matrix.points)
+    return np.where(penalised, (entries + 1)[:, None], matrix.points)
+
+
+def low_point(scores, fleet, drops, not_discardable=None):
+    """Vectorized low-point scoring for many fleets at once.
+
+    `scores` is boats x races (NaN = not sailed), `fleet` the fleet id of each
+    boat and `drops` the number of worst scores each boat excludes. Ties are
+    broken per RRS A8: the sorted counted scores, then the last race backwards.
+    Returns (total, position, tied, dropped).
+    """
+    n, width = scores.shape
+    sailed = ~np.isnan(scores)
+    droppable = sailed if not_discardable is None else sailed & ~not_discardable
+
+    # Drop each boat's `drops` worst droppable scores
+    worst_first = np.argsort(-np.where(droppable, scores, -np.inf), axis=1, kind="stable")
+    rank = np.empty_like(worst_first)
+    np.put_along_axis(rank, worst_first, np.arange(width)[None, :], axis=1)
+    dropped = droppable & (rank < np.asarray(drops).reshape(-1, 1))
+
+    counted = sailed & ~dropped
+    total = np.where(counted, scores, 0).sum(axis=1, dtype=np.float64)
+
+    best = np.sort(np.where(counted, scores, np.inf), axis=1)  # A8.1
+    last = np.where(sailed, scores, np.inf)[:, ::-1]  # A8.2
+    keys = [fleet.astype(np.float64), total] + list(best.T) + list(last.T)
+    order = np.lexsort(keys[::-1])
+
+    sorted_keys = np.stack([np.asarray(k, dtype=np.float64)[order] for k in keys])
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (sorted_keys[:, 1:] != sorted_keys[:, :-1]).any(axis=0)
+    new_fleet = np.ones(n, dtype=bool)
+    new_fleet[1:] = sorted_keys[0, 1:] != sorted_keys[0, :-1]
+
+    index = np.arange(n)
+    group_start = np.maximum.accumulate(np.where(new_group, index, 0))
+    fleet_start = np.maximum.accumulate(np.where(new_fleet, index, 0))
+    group_size = np.bincount(group_start, minlength=n)[group_start]
+
+    position = np.empty(n, dtype=np.int32)
+    tied = np.empty(n, dtype=bool)
+    position[order] = group_start - fleet_start + 1
+    tied[order] = group_size > 1
+    return total, position, tied, dropped
+
+
+def recompute_standings(df, drops=None):
+    """Re-score every fleet in a results frame and flag disagreements with the scraped standings.
+
+    `drops` defaults to the number of discards marked in each fleet's
+    results. Adds Computed_Points, Computed_Position, Computed_Tied,
+    Points_Mismatch and Position_Mismatch columns to a copy of `df`.
+    """
+    df = df.copy()
+    if df.empty:
+        return df
+
+    matrix = score_matrix(df["Results"])
+    fleet = fleet_ids(df)
+    if drops is None:
+        drops = pd.Series(matrix.discarded.sum(axis=1)).groupby(fleet).transform("max").to_numpy()
+    scores = race_scores(matrix, fleet)
+    total, position, tied, _ = low_point(scores, fleet, drops, np.isin(matrix.codes, NOT_DISCARDABLE))
+
+    df["Computed_Points"] = total
+    df["Computed_Position"] = position
+    df["Computed_Tied"] = tied
+    scraped_points = pd.to_numeric(df["Total_Points"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    df["Points_Mismatch"] = ~np.isnan(scraped_points) & (np.abs(scraped_points - total) > POINTS_TOLERANCE)
+    scraped_position = pd.to_numeric(df["Position"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    df["Position_Mismatch"] = ~np.isnan(scraped_position) & (scraped_position != position)
+    return df
+
+
+def series_standings(df, drops=0, by="Category", boat="Skipper", position="Position"):
+    """Series standings across regattas: each regatta finish is one low-point "race".
+
+    Boats are matched on `boat` within each `by` group (fleet/class); a
+    regatta a boat missed scores as DNC (series entries + 1). Returns one
+    row per boat with the regatta-by-regatta scores, total, position and tie flag.
+    """
+    finishes = df[[by, boat, "Regatta_Name", position]].dropna()
+    finishes = finishes.astype({by: str, boat: str, "Regatta_Name": str})
+    table = finishes.pivot_table(index=[by, boat], columns="Regatta_Name", values=position, aggfunc="min")
+    if table.empty:
+        return pd.DataFrame(columns=[by, boat, "Series_Points", "Series_Position", "Series_Tied"])
+
+    fleet = table.index.get_level_values(0).factorize()[0]
+    sailed_in_series = table.notna().groupby(level=0).transform("any").to_numpy()  # regattas held for that fleet
+    entries = np.bincount(fleet)[fleet].astype(np.float64)
+    scores = table.to_numpy(dtype=np.float64, na_value=np.nan)
+    scores = np.where(np.isnan(scores) & sailed_in_series, (entries + 1)[:, None], scores)
+
+    total, series_position, tied, _ = low_point(scores, fleet, drops)
+    standings = table.reset_index()
+    standings["Series_Points"] = total
+    standings["Series_Position"] = series_position
+    standings["Series_Tied"] = tied
+    return standings.sort_values([by, "Series_Position"], kind="stable").reset_index(drop=True)
@@ -1,23 +1,27 @@
 import os
-import openai
-import csv
-import requests
+import threading
+import time
 from flask import Flask, request, jsonify, render_template
-from sqlalchemy import create_engine, Column, Integer, String, Text
+from sqlalchemy import Column, Float, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from openai_formatter import complete_async, get_client, run
+from ingest import CSV_COLUMNS, NATURAL_KEY, parse_csv_rows, bulk_upsert, delete_keys, ensure_natural_key
+import models
+from aggregates import answer_question, load_and_refresh
+from normalize import record_from_legacy_row
+import startup
 
 # Load environment variables
 DATABASE_URL = os.getenv("DATABASE_URL")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-openai.api_key = OPENAI_API_KEY
 
 Base = declarative_base()
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)  # ✅ bound by get_engine()
 
 class RegattaResult(Base):
     __tablename__ = "regatta_results"
+    __table_args__ = (Index("uq_regatta_results_entry", *NATURAL_KEY, unique=True),)
     id = Column(Integer, primary_key=True, index=True)
     regatta_name = Column(String, index=True)
     regatta_date = Column(String, index=True)
@@ -28,25 +32,51 @@ class RegattaResult(Base):
     skipper = Column(String)
     yacht_club = Column(String)
     results = Column(Text)
-    total_points = Column(Integer)
+    total_points = Column(Float)
+
+_table_created = False
+_table_lock = threading.Lock()
+
+
+def get_engine():
+    """The shared models engine, with regatta_results created on first use (nothing connects at import)."""
+    global _table_created
+    engine = models.get_engine()
+    with _table_lock:
+        if not _table_created:
+            Base.metadata.create_all(bind=engine)
+            SessionLocal.configure(bind=engine)
+            _table_created = True
+    return engine
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-Base.metadata.create_all(bind=engine)
 
 app = Flask(__name__)
 
-def fetch_race_data(url):
-    prompt = f"""
+startup.register("database", get_engine)
+startup.register("ingest", startup.import_modules("pandas", "snapshots"))
+startup.register("openai", get_client, optional=True)
+
+RACE_DATA_SYSTEM_PROMPT = "You are an assistant that extracts structured data from web pages."
+
+
+def _race_data_prompt(url):
+    return f"""
     Extract and structure the sailing race data from the following URL: {url}
     Output the data in CSV format with the following columns:
     regatta_name, regatta_date, race_category, pos, sail, boat, skipper, yacht_club, results, total_points.
     """
-    
-    response = openai.ChatCompletion.create(
-        model="gpt-4",
-        messages=[{"role": "system", "content": "You are an assistant that extracts structured data from web pages."},
-                  {"role": "user", "content": prompt}]
-    )
-    return response["choices"][0]["message"]["content"]
+
+def fetch_race_data_async(url, bypass_cache=False):
+    return complete_async("gpt-4", RACE_DATA_SYSTEM_PROMPT, _race_data_prompt(url), bypass_cache=bypass_cache)
+
+def fetch_race_data(url, bypass_cache=False):
+    return run(fetch_race_data_async(url, bypass_cache))
 
 @app.route('/')
 def index():
@@ -59,9 +89,60 @@ def scrape_chatgpt():
     if not url:
         return jsonify({"error": "URL is required"}), 400
     
-    csv_data = fetch_race_data(url)
+    csv_data = fetch_race_data(url, bypass_cache=bool(data.get("no_cache")))
     return jsonify({"csv_data": csv_data})
 
+def store_results(csv_text, full=False):
+    """Validate and upsert posted CSV rows; returns the /send_to_db response payload.
+
+    Only rows added or changed since the last post of the same regatta are
+    written (and removed ones deleted); `full` writes everything again.
+    """
+    import pandas as pd
+    from snapshots import get_snapshots
+
+    rows, errors = parse_csv_rows(csv_text)
+    snapshots = get_snapshots()
+    delta = snapshots.diff_by(pd.DataFrame(rows, columns=CSV_COLUMNS), "regatta_name", NATURAL_KEY[1:],
+                              snapshot_id=lambda name: f"db:{name}")
+    changed = rows if full else [rows[i] for i in delta.rows.index]
+    removed = delta.removed.to_dict("records")
+
+    engine = get_engine()
+    table = RegattaResult.__table__
+    ensure_natural_key(engine, table)  # DDL once, outside the data transaction
+
+    # ✅ Keep the normalized tables and /query-db aggregates in step; fleets are reloaded whole, so only touched ones
+    touched = {(row["regatta_name"], row["race_category"]) for row in changed + removed}
+    emptied = touched - {(row["regatta_name"], row["race_category"]) for row in rows}
+    # ✅ One transaction: the flat table, normalized tables and aggregates change together or not at all
+    with engine.begin() as conn:
+        written = bulk_upsert(conn, table, changed)
+        deleted = delete_keys(conn, table, removed)
+        if touched:
+            load_and_refresh(conn, [record_from_legacy_row(row) for row in rows
+                                    if (row["regatta_name"], row["race_category"]) in touched],
+                             emptied_fleets=emptied)
+    snapshots.commit(delta)  # only after the commit, so a failed write is retried by the next post
+
+    return {
+        "message": "Data successfully saved to the database",
+        "rows_written": written,
+        "rows_deleted": deleted,
+        "rows_unchanged": 0 if full else delta.unchanged_rows,
+        "bytes_skipped": 0 if full else delta.skipped_bytes,
+        "rows_rejected": len(errors),
+        "errors": errors[:100]
+    }
+
+def answer_query(question):
+    """Answer a chatbot question from the aggregates; returns the /query-db response payload."""
+    started = time.perf_counter()
+    with get_engine().connect() as conn:
+        answer, intent, rows = answer_question(conn, question)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {"answer": answer, "intent": intent, "data": rows, "ms": round(elapsed_ms, 2)}
+
 @app.route('/send_to_db', methods=['POST'])
 def send_to_db():
     data = request.json
@@ -69,28 +150,31 @@ def send_to_db():
     if not csv_text:
         return jsonify({"error": "CSV data is required"}), 400
     
-    session = SessionLocal()
-    reader = csv.reader(csv_text.splitlines())
-    headers = next(reader)  # Skip header row
-    
-    for row in reader:
-        result = RegattaResult(
-            regatta_name=row[0],
-            regatta_date=row[1],
-            race_category=row[2],
-            pos=int(row[3]),
-            sail=row[4],
-            boat=row[5],
-            skipper=row[6],
-            yacht_club=row[7],
-            results=row[8],
-            total_points=int(row[9])
-        )
-        session.add(result)
-    session.commit()
-    session.close()
-    
-    return jsonify({"message": "Data successfully saved to the database"})
+    return jsonify(store_results(csv_text, full=bool(data.get("full"))))
+
+@app.route('/chatbot')
+def chatbot():
+    return render_template('chatbot.html')
+
+@app.route('/query-db', methods=['POST'])
+def query_db():
+    data = request.json
+    question = (data or {}).get("query", "").strip()
+    if not question:
+        return jsonify({"error": "Query is required"}), 400
+
+    return jsonify(answer_query(question))
+
+@app.route('/healthz')
+def healthz():
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readyz():
+    ready, payload = startup.readiness()
+    return jsonify(payload), 200 if ready else 503
+
+startup.on_import()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
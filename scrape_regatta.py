@@ -1,62 +1,47 @@
-import os
-import subprocess
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
-import time
-
-# ✅ Define a lightweight Chromium binary location
-CHROMIUM_PATH = "/usr/local/bin/chrome-linux/chrome"
-
-def install_chromium():
-    """Download and configure a lightweight Chromium binary for Selenium."""
-    if not os.path.exists(CHROMIUM_PATH):
-        print("🔧 Downloading Chromium Portable...")
-
-        # ✅ Use a smaller, stable Chromium version hosted on a reliable CDN
-        subprocess.run(
-            "wget -q https://github.com/RobRich999/Chromium_Clang/releases/download/v121.0.6167.85/chrome-linux.zip -O /tmp/chrome.zip",
-            shell=True,
-            check=True,
-        )
-        subprocess.run("unzip /tmp/chrome.zip -d /usr/local/bin/", shell=True, check=True)
-        print("✅ Chromium installed successfully!")
+from driver_pool import get_pool, load_page
+import metrics
 
 def scrape_regatta_page(url):
     """Use Selenium to scrape dynamically loaded race results."""
     print(f"🔍 Fetching URL: {url} using Selenium")
 
-    # ✅ Install Chromium if not found
-    install_chromium()
+    # ✅ Lease a warm browser from the shared pool instead of launching Chrome
+    with get_pool().lease() as driver:
+        try:
+            load_page(driver, url, ready="results_table")  # ✅ Wait for the results table, not a fixed sleep
+        except TimeoutError as e:
+            # ✅ A page without a results table never becomes ready: same answer as a page with no tables
+            print(f"❌ {e}")
+            return {"error": "No results tables found."}
+        page_html = driver.page_source
+    metrics.inc("page_bytes", len(page_html), source="browser")
 
-    # ✅ Set up Selenium WebDriver with the downloaded Chromium
-    options = Options()
-    options.add_argument("--headless")  # Run without UI
-    options.add_argument("--no-sandbox")  # Required for Render/Docker environments
-    options.add_argument("--disable-dev-shm-usage")  # Prevent crashes
-    options.binary_location = CHROMIUM_PATH  # ✅ Use the downloaded Chromium
+    # ✅ Parse the full page HTML with BeautifulSoup
+    with metrics.stage("parse"):
+        extracted_data = extract_result_rows(page_html)
 
-    # ✅ Use the correct ChromeDriver
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    if extracted_data is None:
+        print("❌ No tables found on the page!")
+        return {"error": "No results tables found."}
 
-    driver.get(url)
-    time.sleep(5)  # ✅ Wait for JavaScript to load
+    metrics.inc("rows_extracted", len(extracted_data))
+    print(f"✅ Extracted {len(extracted_data)} race results")
+    return extracted_data
 
-    page_html = driver.page_source
-    driver.quit()  # ✅ Close the browser
+def extract_result_rows(page_html):
+    """Pull the rows of every results table out of the page (None if there are no tables).
 
-    # ✅ Parse the full page HTML with BeautifulSoup
+    Rows are dicts keyed by the table's header text when the headers line up
+    with the cells, so the columns can be mapped without asking OpenAI.
+    """
     soup = BeautifulSoup(page_html, "html.parser")
 
     tables = soup.find_all("table")
     extracted_data = []
 
     if not tables:
-        print("❌ No tables found on the page!")
-        return {"error": "No results tables found."}
+        return None
 
     for index, table in enumerate(tables):
         headers = [th.get_text(strip=True) for th in table.find_all("th")]
@@ -69,7 +54,9 @@ def scrape_regatta_page(url):
             for row in rows:
                 cols = [td.get_text(strip=True) for td in row.find_all("td")]
                 if len(cols) >= 5:
-                    extracted_data.append(cols)
+                    if len(cols) == len(headers) and len(set(headers)) == len(headers):
+                        extracted_data.append(dict(zip(headers, cols)))
+                    else:
+                        extracted_data.append(cols)
 
-    print(f"✅ Extracted {len(extracted_data)} race results")
     return extracted_data
@@ -2,222 +2,415 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 import re
+import io
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from typing import NamedTuple, Optional
+import threading
 import time
 import traceback
+import http_client
+from driver_pool import get_pool, load_page
+from page_cache import get_cache, is_regatta_final
+from exporter import export_formats
+import metrics
 
-def setup_driver():
-    """Setup and return a headless Chrome browser"""
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    driver = webdriver.Chrome(options=chrome_options)
-    return driver
+# ✅ A validated page is kept briefly so the scrape that follows doesn't download it again
+VALIDATION_REUSE_SECONDS = float(os.getenv("VALIDATION_REUSE_SECONDS", "60"))
+
+_validated = {}  # url -> (monotonic time, response)
+_validated_lock = threading.Lock()
 
 def validate_url(url):
-    """Validate that the URL is accessible"""
+    """Validate that the URL is accessible (the response is reused by the next fetch of the page)"""
     try:
-        response = requests.get(url)
+        with metrics.stage("http_fetch"):
+            response = http_client.get(url)
+        metrics.inc("page_bytes", len(response.content), source="http")
         response.raise_for_status()
-        return True
     except requests.RequestException as e:
         print(f"Error accessing URL: {e}")
         return False
+    now = time.monotonic()
+    with _validated_lock:
+        for stale in [u for u, (at, _) in _validated.items() if now - at > VALIDATION_REUSE_SECONDS]:
+            del _validated[stale]
+        _validated[url] = (now, response)
+    return True
+
+def take_validated_response(url):
+    """The response validate_url(url) got in the last VALIDATION_REUSE_SECONDS, at most once"""
+    with _validated_lock:
+        at, response = _validated.pop(url, (None, None))
+    if response is None or time.monotonic() - at > VALIDATION_REUSE_SECONDS:
+        return None
+    metrics.inc("http_responses_reused")
+    return response
+
+def discard_validated_response(url):
+    """Drop the response validate_url(url) kept, when the page is served without fetching it"""
+    with _validated_lock:
+        _validated.pop(url, None)
+
+# Precompiled patterns for the single-pass parser
+POSITION_RE = re.compile(r'^(\d+)(T?)\.\s*')
+POINTS_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(T?)$')
+CATEGORY_RE = re.compile(r'^(.+?)\s*\((\d+)\s+boats?\)')
+
+class ResultRecord(NamedTuple):
+    """One boat's line from a regattanetwork results page"""
+    regatta_name: str
+    regatta_date: str
+    category: str
+    position: int
+    position_tied: bool
+    sail_number: str
+    boat_name: str
+    skipper: str
+    yacht_club: str
+    results: str
+    total_points: Optional[float]
+    points_tied: bool
+
+def parse_points(text):
+    """'12' -> (12, False), '12T' -> (12, True), '10.5' -> (10.5, False)"""
+    text = text.strip()
+    tied = text.endswith('T')
+    if tied:
+        text = text[:-1].rstrip()
+    if text.isdigit():
+        return int(text), tied
+    match = POINTS_RE.match(text)
+    if not match:
+        return None, False
+    return float(match.group(1)), tied
+
+def parse_line_fields(line):
+    """Split a result line into its typed fields, or None if it is not a result line.
+
+    Lines look like ``2T. 1234, Boat, Skipper, Club, 3,1,2; 6T``: an optionally
+    tied position, four identity fields, the race scores and, after the last
+    ``;``, the total (also optionally tied). Without a ``;`` the last comma
+    field is the total, or with a single race score, that score.
+    """
+    pos_match = POSITION_RE.match(line)
+    if not pos_match:
+        return None
+
+    data = line[pos_match.end():]
+    if ';' in data:
+        data, _, total = data.rpartition(';')
+    else:
+        total = ''
+
+    parts = [p.strip() for p in data.split(',', 4)]
+    while len(parts) < 5:
+        parts.append('')
+
+    results = parts[4]
+    if not total and results.count(',') >= 1:
+        results, _, total = results.rpartition(',')
+    elif not total:
+        total = results  # a single race: its score is also the total
+    total_points, points_tied = parse_points(total)
+
+    return (int(pos_match.group(1)), pos_match.group(2) == 'T', parts[0],
+            parts[1] or "No Name", parts[2], parts[3], results.strip(), total_points, points_tied)
 
 def parse_result_line(line, category_name):
     """Parse a single result line into a dictionary"""
-    try:
-        # Match the position number at the start of the line (including tied positions)
-        pos_match = re.match(r'^(\d+)\.?\s*', line)
-        if not pos_match:
-            print(f"No position number found in line: {line}")
-            return None
-            
-        position = pos_match.group(1)
-        # Remove the position and period from the start
-        data = line[pos_match.end():].strip()
-        
-        # Split the remaining data by commas and clean each part
-        parts = [p.strip() for p in data.split(',')]
-        
-        # Handle the case where we have fewer parts than expected
-        while len(parts) < 6:
-            parts.append('')
-        
-        # Extract total points - handle both formats "; X" and "; XT"
-        results_and_points = parts[-1].split(';')
-        results = parts[4] if len(parts) > 4 else ''
-        total_points = results_and_points[-1].strip() if len(results_and_points) > 1 else parts[-1]
-        
-        result = {
-            'Category': category_name,
-            'Position': position,
-            'Sail_Number': parts[0],
-            'Boat_Name': parts[1] if parts[1] else "No Name",
-            'Skipper': parts[2],
-            'Yacht_Club': parts[3],
-            'Results': results,
-            'Total_Points': total_points
-        }
-        
-        print(f"Successfully parsed: Position {position}, {result['Sail_Number']}, {result['Boat_Name']}")
-        return result
-        
-    except Exception as e:
-        print(f"Error parsing line '{line}': {str(e)}")
+    fields = parse_line_fields(line.strip())
+    if fields is None:
         return None
+    position, position_tied, sail, boat, skipper, club, results, total_points, points_tied = fields
+    return {
+        'Category': category_name,
+        'Position': position,
+        'Sail_Number': sail,
+        'Boat_Name': boat,
+        'Skipper': skipper,
+        'Yacht_Club': club,
+        'Results': results,
+        'Total_Points': total_points,
+        'Tied': position_tied or points_tied
+    }
 
-def scrape_regatta_results(url):
-    driver = setup_driver()
-    try:
-        print("Loading page...")
-        driver.get(url)
-        time.sleep(2)
-        
-        all_results = []
-        
-        # Get the entire page text
-        page_text = driver.find_element(By.TAG_NAME, "body").text
-        print("Got page text, length:", len(page_text))
-        
-        # Extract regatta name and date from the first few lines
-        lines = page_text.split('\n')
-        regatta_name = lines[0].strip() if len(lines) > 0 else "Unknown Regatta"
-        regatta_date = ""
-        
-        # Look for the date line (typically second line)
-        for line in lines[1:5]:  # Check first few lines
+def iter_results(page_text):
+    """Yield a ResultRecord for every result line, in a single pass over the text"""
+    regatta_name = None
+    regatta_date = ""
+    header_lines = 0
+    category = None
+    results_started = False
+
+    for raw_line in io.StringIO(page_text):
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        # The first non-empty line is the regatta name, the date follows a '|' shortly after
+        if regatta_name is None:
+            regatta_name = line
+            continue
+        if header_lines < 4 and not regatta_date and category is None:
+            header_lines += 1
             if '|' in line:
-                date_part = line.split('|')[1].strip()
-                regatta_date = date_part
-                break
-        
-        print(f"\nRegatta Name: {regatta_name}")
-        print(f"Regatta Date: {regatta_date}")
-        
-        # Split into sections by looking for category headers
-        sections = re.split(r'(\w+\s*\(\d+\s+boats\)\s*\(top\))', page_text)
-        print(f"\nFound {len(sections)} sections")
-        
-        for i in range(1, len(sections), 2):
-            if i+1 >= len(sections):
-                break
-                
-            category_header = sections[i]
-            category_content = sections[i+1]
-            
-            # Extract category name
-            category_match = re.match(r'(.*?)\s*\((\d+)\s+boats\)', category_header)
-            if not category_match:
-                print(f"Skipping unmatched header: {category_header}")
+                regatta_date = line.split('|')[1].strip()
                 continue
-                
-            category_name = category_match.group(1).strip()
-            num_boats = category_match.group(2)
-            print(f"\nProcessing category: {category_name} ({num_boats} boats)")
-            
-            # Split content into lines
-            lines = category_content.split('\n')
-            print(f"Found {len(lines)} lines in category")
-            
-            # Find the results section
+
+        # Result lines are by far the most common, so try them first
+        if results_started and line[0].isdigit():
+            fields = parse_line_fields(line)
+            if fields is not None:
+                yield ResultRecord(regatta_name, regatta_date, category, *fields)
+                continue
+
+        category_match = CATEGORY_RE.match(line)
+        if category_match:
+            category = category_match.group(1).strip()
             results_started = False
-            for line in lines:
-                line = line.strip()
-                
-                # Look for the header line
-                if 'Pos,Sail' in line:
-                    results_started = True
-                    print(f"Found header: {line}")
-                    continue
-                
-                # Process result lines
-                if results_started and re.match(r'^\d+\.', line):
-                    result = parse_result_line(line, category_name)
-                    if result:
-                        # Add regatta info to each result
-                        result['Regatta_Name'] = regatta_name
-                        result['Regatta_Date'] = regatta_date
-                        all_results.append(result)
-                    else:
-                        print(f"Failed to parse line: {line}")
-        
-        if all_results:
-            # Create DataFrame with regatta info first
-            columns = ['Regatta_Name', 'Regatta_Date', 'Category', 'Position', 'Sail_Number', 
-                      'Boat_Name', 'Skipper', 'Yacht_Club', 'Results', 'Total_Points']
-            df = pd.DataFrame(all_results, columns=columns)
-            print(f"\nSuccessfully processed {len(all_results)} total results")
+        elif category is not None and 'Pos,Sail' in line:
+            results_started = True
+
+RESULT_COLUMNS = ['Regatta_Name', 'Regatta_Date', 'Category', 'Position', 'Sail_Number',
+                  'Boat_Name', 'Skipper', 'Yacht_Club', 'Results', 'Total_Points']
+RECORD_COLUMN_NAMES = dict(zip(
+    ['regatta_name', 'regatta_date', 'category', 'position', 'sail_number',
+     'boat_name', 'skipper', 'yacht_club', 'results', 'total_points'],
+    RESULT_COLUMNS))
+
+# ✅ Compact typed columns: low-cardinality text as categoricals, nullable ints, float points
+RESULT_DTYPES = {
+    'Regatta_Name': 'category',
+    'Regatta_Date': 'category',
+    'Category': 'category',
+    'Position': 'Int16',
+    'Sail_Number': 'string',
+    'Boat_Name': 'string',
+    'Skipper': 'string',
+    'Yacht_Club': 'category',
+    'Results': 'string',
+    'Total_Points': 'Float32',
+    'Tied': 'bool',
+}
+
+# ✅ Alias table for club names (alias,canonical); matched case-insensitively
+CLUB_ALIASES_PATH = os.getenv("CLUB_ALIASES_PATH",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "club_aliases.csv"))
+
+def html_to_text(html):
+    """Visible text of an HTML page, one block per line"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript']):
+        tag.decompose()
+    return soup.get_text('\n')
+
+def fetch_page_http(url, cached=None):
+    """Plain HTTP GET on the shared pooled client, made conditional when a cached copy of the page exists"""
+    response = take_validated_response(url)
+    if response is not None:
+        return response
+    headers = get_cache().conditional_headers(cached)
+    with metrics.stage("http_fetch"):
+        response = http_client.get(url, headers=headers)
+    metrics.inc("page_bytes", len(response.content), source="http")
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+def fetch_page_text_browser(url):
+    """Render the page in a pooled headless Chrome and return the body text"""
+    from selenium.webdriver.common.by import By
+
+    with get_pool().lease() as driver:
+        print("Loading page...")
+        load_page(driver, url)
+        return driver.find_element(By.TAG_NAME, "body").text
+
+def has_result_sections(page_text):
+    """True if the text contains at least one '(N boats)' category header"""
+    return re.search(r'\(\d+\s+boats\)', page_text) is not None
+
+def parse_regatta_text(page_text):
+    """Parse regattanetwork result text into a DataFrame"""
+    with metrics.stage("parse"):
+        records = list(iter_results(page_text))
+    metrics.inc("rows_extracted", len(records))
+    if not records:
+        print("No results were found")
+        return pd.DataFrame()
+
+    df = pd.DataFrame.from_records(records, columns=ResultRecord._fields)
+    df['Tied'] = df['position_tied'] | df['points_tied']
+    df = apply_result_dtypes(df.rename(columns=RECORD_COLUMN_NAMES)[RESULT_COLUMNS + ['Tied']])
+    print(f"Parsed {len(df)} results in {df['Category'].nunique()} categories "
+          f"from {records[0].regatta_name} ({records[0].regatta_date})")
+    return df
+
+def scrape_regatta_results(url, raise_errors=False, revalidate=False, browser_fallback=True):
+    """Scrape a regatta from the page cache, plain HTTP, or the browser, in that order.
+
+    The path that served the page ('cache', 'revalidated', 'http' or
+    'browser') is recorded in ``df.attrs['fetch_path']`` and whether the
+    regatta is over in ``df.attrs['final']``. ``revalidate`` skips fresh
+    cache hits (a cached copy still makes the request conditional). A 404
+    raises LookupError without trying the browser; with ``browser_fallback``
+    off, an HTTP page without results is returned as an empty frame too.
+    Errors are logged and an empty DataFrame is returned unless
+    ``raise_errors`` is set.
+    """
+    cache = get_cache()
+    try:
+        cached = cache.get(url)
+        if cached and cached['fresh'] and not revalidate:
+            discard_validated_response(url)
+            df = parse_regatta_text(cached['text'])
+            df.attrs['fetch_path'] = 'cache'
+            df.attrs['final'] = is_regatta_final(cached['text'])
+            metrics.inc('regattas_served', path='cache')
+            print(f"Served from page cache: {url}")
             return df
-        else:
-            print("No results were found")
-            return pd.DataFrame()
-            
+
+        response = None
+        try:
+            response = fetch_page_http(url, cached)
+            if response.status_code == 304 and cached:
+                cache.mark_revalidated(url, cached)
+                df = parse_regatta_text(cached['text'])
+                df.attrs['fetch_path'] = 'revalidated'
+                df.attrs['final'] = is_regatta_final(cached['text'])
+                metrics.inc('regattas_served', path='revalidated')
+                print(f"Page unchanged (304), served from page cache: {url}")
+                return df
+
+            page_text = html_to_text(response.text)
+            if has_result_sections(page_text):
+                df = parse_regatta_text(page_text)
+                if not df.empty:
+                    cache.put(url, page_text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    df.attrs['fetch_path'] = 'http'
+                    df.attrs['final'] = is_regatta_final(page_text)
+                    metrics.inc('regattas_served', path='http')
+                    print(f"Served by HTTP fast path: {url}")
+                    return df
+            if not browser_fallback:
+                print(f"No results in the HTTP response: {url}")
+                df = pd.DataFrame()
+                df.attrs['fetch_path'] = 'http'
+                df.attrs['final'] = False
+                return df
+            print("No result sections in the HTTP response, falling back to the browser")
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in (404, 410):
+                raise LookupError(f"No regatta at {url} (HTTP {e.response.status_code})") from e
+            if not browser_fallback:
+                raise
+            print(f"HTTP fetch failed ({e}), falling back to the browser")
+        except requests.RequestException as e:
+            if not browser_fallback:
+                raise
+            print(f"HTTP fetch failed ({e}), falling back to the browser")
+
+        page_text = fetch_page_text_browser(url)
+        df = parse_regatta_text(page_text)
+        if not df.empty:
+            # Validators from the raw page still tell us when the rendered text is stale
+            headers = response.headers if response is not None else {}
+            cache.put(url, page_text, headers.get('ETag'), headers.get('Last-Modified'), source='browser')
+        df.attrs['fetch_path'] = 'browser'
+        df.attrs['final'] = is_regatta_final(page_text)
+        metrics.inc('regattas_served', path='browser')
+        print(f"Served by browser: {url}")
+        return df
+
     except Exception as e:
         print(f"Error during scraping: {str(e)}")
+        if raise_errors:
+            raise
         traceback.print_exc()
         return pd.DataFrame()
-    finally:
-        with open('page_source.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        print("Saved page source to 'page_source.html' for debugging")
-        driver.quit()
 
-def clean_results(df):
+def apply_result_dtypes(df):
+    """Cast result columns to RESULT_DTYPES (frames merged with pd.concat fall back to object)
+
+    '12T' style positions and points from older frames keep their number and
+    set Tied; a missing Tied value is False.
+    """
+    dtypes = {col: dtype for col, dtype in RESULT_DTYPES.items()
+              if col in df.columns and str(df[col].dtype) != dtype}
+    for col in ('Position', 'Total_Points'):
+        if col in dtypes and not pd.api.types.is_numeric_dtype(df[col].dtype):
+            text = df[col].astype('string').str.strip()
+            tied = text.str.endswith('T', na=False)
+            if tied.any():
+                df['Tied'] = tied | (df['Tied'].fillna(False).astype(bool) if 'Tied' in df.columns else False)
+                dtypes['Tied'] = 'bool'
+            df[col] = pd.to_numeric(text.str.removesuffix('T').str.rstrip(), errors='coerce')
+    if dtypes.get('Tied') == 'bool':
+        df['Tied'] = df['Tied'].fillna(False)  # astype(bool) would turn NaN into True
+    return df.astype(dtypes) if dtypes else df
+
+_club_aliases = None
+
+def load_club_aliases(path=None):
+    """{casefolded alias: canonical name} from the alias CSV (cached for the default path)"""
+    global _club_aliases
+    if path is None and _club_aliases is not None:
+        return _club_aliases
+    aliases = {}
+    try:
+        table = pd.read_csv(path or CLUB_ALIASES_PATH, dtype=str, keep_default_na=False)
+        aliases = dict(zip(table['alias'].str.strip().str.casefold(), table['canonical'].str.strip()))
+    except FileNotFoundError:
+        print(f"Club alias table not found: {path or CLUB_ALIASES_PATH}")
+    if path is None:
+        _club_aliases = aliases
+    return aliases
+
+def _clean_categorical(series, aliases=None):
+    """Strip (and alias) the categories only, then remap codes; duplicates merge into one category"""
+    categories = series.cat.categories.astype(str).str.strip()
+    if aliases:
+        canonical = categories.str.casefold().map(aliases)
+        categories = pd.Index(canonical.where(canonical.notna(), categories))
+    uniques = pd.Index(pd.unique(categories))
+    codes = uniques.get_indexer(categories)
+    old_codes = series.cat.codes.to_numpy()
+    new_codes = codes[old_codes]
+    new_codes[old_codes == -1] = -1
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=uniques), index=series.index, name=series.name)
+
+def clean_results(df, aliases=None):
+    """Type the columns, strip whitespace and map club aliases in one vectorized pass.
+
+    Categorical columns are cleaned through their (few) categories rather than
+    row by row; `aliases` defaults to the club alias table.
+    """
     if df.empty:
         return df
-    
-    # Remove leading/trailing whitespace
+
+    df = apply_result_dtypes(df)
+    club_aliases = load_club_aliases() if aliases is None else aliases
     for col in df.columns:
-        if df[col].dtype == "object":
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = _clean_categorical(df[col], club_aliases if col == 'Yacht_Club' else None)
+        elif pd.api.types.is_string_dtype(df[col].dtype):
             df[col] = df[col].str.strip()
-    
-    # Clean up Yacht Club names
-    club_mappings = {
-        'SSS': 'Sarasota Sailing Squadron',
-        'Sss': 'Sarasota Sailing Squadron',
-        'Sarasota Sailing Squa': 'Sarasota Sailing Squadron'
-    }
-    
-    if 'Yacht_Club' in df.columns:
-        df['Yacht_Club'] = df['Yacht_Club'].replace(club_mappings)
-    
+
     return df
 
-def export_results(df, format='csv', output_dir='output'):
+def export_results(df, format='csv', output_dir='output', basename=None):
+    """Export in one format or a list of formats, written concurrently.
+
+    Files are named per regatta (see exporter.output_basename); parquet and
+    arrow are written as datasets partitioned by regatta and category.
+    Returns {format: {"path", "seconds"} or {"error"}}.
+    """
     if df.empty:
         print(f"No data to export to {format}")
-        return
+        return {}
         
     # Get absolute path for output directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
     output_dir = os.path.join(current_dir, output_dir)
     
-    # Create output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"Created output directory: {output_dir}")
-        
-    try:
-        # Create full file paths
-        if format == 'csv':
-            output_path = os.path.join(output_dir, 'regatta_results.csv')
-            df.to_csv(output_path, index=False)
-            print(f"CSV file saved to: {output_path}")
-        elif format == 'excel':
-            output_path = os.path.join(output_dir, 'regatta_results.xlsx')
-            df.to_excel(output_path, index=False)
-            print(f"Excel file saved to: {output_path}")
-        elif format == 'json':
-            output_path = os.path.join(output_dir, 'regatta_results.json')
-            df.to_json(output_path, orient='records')
-            print(f"JSON file saved to: {output_path}")
-    except Exception as e:
-        print(f"Error saving {format} file: {str(e)}")
+    return export_formats(df, format, output_dir=output_dir, basename=basename)
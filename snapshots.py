@@ -0,0 +1,163 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import metrics
+
+# ✅ Snapshot storage for re-scraped regattas (override in environment variables)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".snapshots")
+
+# ✅ One entry per boat per fleet in a scrape_regatta_results frame
+ENTRY_KEY = ["Category", "Sail_Number", "Skipper"]
+
+
+def row_hashes(df, columns):
+    """64-bit hash per row of `columns` as hex strings (values compared as text, so dtypes don't matter)"""
+    if df.empty:
+        return pd.Series([], dtype=object, index=df.index)
+    hashed = pd.util.hash_pandas_object(df[columns].astype(str), index=False)
+    return hashed.map("{:016x}".format)
+
+
+class Delta:
+    """Rows added, changed and removed since the previous snapshot, plus what was skipped.
+
+    `removed` holds only the key columns of the rows that disappeared.
+    Nothing is recorded until SnapshotStore.commit(delta) is called, so a
+    failed downstream write is retried in full on the next scrape.
+    """
+
+    def __init__(self, added, changed, removed, unchanged_rows, skipped_bytes, states):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged_rows = unchanged_rows
+        self.skipped_bytes = skipped_bytes
+        self.states = states  # snapshot id -> new snapshot, written on commit
+
+    @property
+    def empty(self):
+        return self.added.empty and self.changed.empty and self.removed.empty
+
+    @property
+    def rows(self):
+        """Added and changed rows: what downstream writers need to (re)write"""
+        return pd.concat([self.added, self.changed]).sort_index()
+
+    def frame(self):
+        """All changes in one frame with a Change column ('added', 'changed' or 'removed')"""
+        parts = [part.assign(Change=change) for change, part in
+                 (("added", self.added), ("changed", self.changed), ("removed", self.removed)) if not part.empty]
+        return pd.concat(parts, ignore_index=True) if parts else self.added.assign(Change=pd.Series(dtype=str))
+
+    def summary(self):
+        return {"added": len(self.added), "changed": len(self.changed), "removed": len(self.removed),
+                "unchanged": self.unchanged_rows, "bytes_skipped": self.skipped_bytes}
+
+    def describe(self):
+        return (f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed; "
+                f"skipped {self.unchanged_rows} unchanged row(s) ({self.skipped_bytes:,} bytes)")
+
+
+class SnapshotStore:
+    """On-disk row hashes of the last scrape of each regatta, for computing deltas."""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, snapshot_id):
+        return os.path.join(self.directory, hashlib.sha256(snapshot_id.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, snapshot_id):
+        """{"key_columns", "rows": {key hash: [row hash, *key values]}} or None"""
+        try:
+            with open(self._path(snapshot_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def diff(self, snapshot_id, df, key_columns=ENTRY_KEY):
+        """Delta of `df` against the last committed snapshot `snapshot_id`."""
+        return self.diff_by(df, None, key_columns, lambda _: snapshot_id)
+
+    def diff_by(self, df, group_column, key_columns=ENTRY_KEY, snapshot_id=str):
+        """Delta of a multi-regatta frame, one snapshot per value of `group_column`.
+
+        `snapshot_id` maps a group value to its snapshot id. Rows with a
+        duplicate key keep the last one, like the database upsert.
+        """
+        key_columns = [c for c in key_columns if c in df.columns] or list(df.columns)
+        scope = key_columns if group_column is None else [group_column] + key_columns
+        keys = row_hashes(df, scope).to_numpy()
+        hashes = row_hashes(df, list(df.columns)).to_numpy()
+        latest = ~pd.Series(keys).duplicated(keep="last").to_numpy()
+        df, keys, hashes = df[latest], keys[latest], hashes[latest]
+
+        groups = {None: np.arange(len(df))} if group_column is None else \
+            df.groupby(group_column, sort=False, observed=True).indices
+        old_hashes = np.full(len(df), None, dtype=object)
+        removed, states = [], {}
+        for group, positions in groups.items():
+            sid = snapshot_id(group)
+            previous = (self.load(sid) or {}).get("rows", {})
+            old_hashes[positions] = [previous.get(key, [None])[0] for key in keys[positions]]
+
+            current = set(keys[positions])
+            group_values = [] if group_column is None else [group]
+            removed.extend(group_values + values[1:] for key, values in previous.items() if key not in current)
+            key_values = df.iloc[positions][key_columns].astype(str).to_numpy().tolist()
+            states[sid] = {"key_columns": key_columns, "saved_at": time.time(),
+                           "rows": {key: [row_hash] + values
+                                    for key, row_hash, values in zip(keys[positions], hashes[positions], key_values)}}
+
+        is_new = pd.isna(old_hashes)
+        is_unchanged = ~is_new & (old_hashes == hashes)
+        unchanged = df[is_unchanged]
+        skipped_bytes = len(unchanged.to_csv(index=False, header=False).encode("utf-8")) if len(unchanged) else 0
+        delta = Delta(df[is_new], df[~is_new & ~is_unchanged], pd.DataFrame(removed, columns=scope),
+                      len(unchanged), skipped_bytes, states)
+        metrics.inc("delta_rows_skipped", delta.unchanged_rows)
+        metrics.inc("delta_bytes_skipped", skipped_bytes)
+        return delta
+
+    def diff_csv(self, snapshot_id, csv_text, key_columns):
+        """diff() for CSV text; every value is compared as a string"""
+        df = pd.read_csv(io.StringIO(csv_text), dtype=str, keep_default_na=False, skipinitialspace=True,
+                         on_bad_lines="skip")
+        return self.diff(snapshot_id, df, key_columns)
+
+    def commit(self, delta):
+        """Record the scrape a delta was computed from as the new snapshot(s)."""
+        with self._lock:
+            for sid, state in delta.states.items():
+                path = self._path(sid)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, path)
+
+    def forget(self, snapshot_id):
+        """Drop a snapshot so the next scrape is written in full."""
+        try:
+            os.remove(self._path(snapshot_id))
+        except OSError:
+            pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshots():
+    """Return the process-wide snapshot store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore()
+        return _store
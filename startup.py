@@ -0,0 +1,155 @@
+"""Warm-up and readiness for the web entry points.
+
+main.py, scrape_race_results.py and asgi_app.py import only what routing
+needs. Selenium, pandas, BeautifulSoup, the OpenAI SDK, database engines
+and schema creation are all set up on first use. Each entry point registers
+named warm-up steps. warm_up() runs them ahead of the first real request,
+and /readyz reports their progress to the platform's health check. Optional
+steps (the OpenAI client) are reported but don't hold back readiness.
+
+    WARM_UP=probe    the first /readyz probe starts warm-up in the background (default)
+    WARM_UP=import   start warm-up in the background as soon as the app module is imported
+    WARM_UP=off      nothing is warmed; /readyz is always ready and every request initializes on first use
+
+A failed step is tried once per run; later probes retry it with exponential
+backoff (WARM_UP_RETRY_BACKOFF, doubling up to WARM_UP_RETRY_MAX seconds).
+
+/healthz is the liveness check: it never touches a dependency.
+"""
+import importlib
+import os
+import threading
+import time
+import metrics
+
+# ✅ Warm-up on start (override in environment variables)
+WARM_UP = os.getenv("WARM_UP", "probe")  # "probe", "import" or "off"
+WARM_UP_BROWSERS = int(os.getenv("WARM_UP_BROWSERS", "0"))  # headless Chrome sessions to start ahead of time
+WARM_UP_RETRY_BACKOFF = float(os.getenv("WARM_UP_RETRY_BACKOFF", "5"))  # seconds before a failed step is retried
+WARM_UP_RETRY_MAX = float(os.getenv("WARM_UP_RETRY_MAX", "300"))  # cap on the doubling retry delay
+
+
+def import_modules(*names):
+    """A warm-up step that imports `names` (heavy libraries or repo modules that pull them in)."""
+    def step():
+        for name in names:
+            importlib.import_module(name)
+    return step
+
+
+class WarmUp:
+    """Named warm-up steps and how each went."""
+
+    def __init__(self, retry_backoff=WARM_UP_RETRY_BACKOFF, retry_max=WARM_UP_RETRY_MAX):
+        self.retry_backoff = retry_backoff
+        self.retry_max = retry_max
+        self._steps = {}
+        self._status = {}
+        self._optional = set()
+        self._attempts = {}
+        self._retry_at = {}  # failed step -> monotonic time it may run again
+        self._lock = threading.Lock()
+        self.started = False
+
+    def register(self, name, step, optional=False):
+        """Add a step; the first registration of a name wins (entry points share steps).
+
+        An optional step is reported in status() but ready() does not wait for it.
+        """
+        with self._lock:
+            if name not in self._steps:
+                self._steps[name] = step
+                self._status[name] = {"state": "pending"}
+                if optional:
+                    self._optional.add(name)
+
+    def _due(self, name, now):
+        state = self._status[name]["state"]
+        return state == "pending" or (state == "error" and self._retry_at.get(name, 0) <= now)
+
+    def _claim(self):
+        """Mark every step that is pending, or failed and past its backoff, as running; returns them."""
+        now = time.monotonic()
+        with self._lock:
+            claimed = [name for name in self._status if self._due(name, now)]
+            for name in claimed:
+                self._status[name] = {"state": "running"}
+        return [(name, self._steps[name]) for name in claimed]
+
+    def run(self):
+        """Run each due step once (failed ones wait out their backoff); returns True if all are ready."""
+        self.started = True
+        for name, step in self._claim():
+            started = time.perf_counter()
+            try:
+                step()
+                status = {"state": "ready"}
+            except Exception as e:
+                status = {"state": "error", "error": str(e)}
+                print(f"⚠️ Warm-up step {name} failed: {e}")
+            status["seconds"] = round(time.perf_counter() - started, 3)
+            metrics.observe("warm_up_seconds", status["seconds"], step=name)
+            with self._lock:
+                if status["state"] == "error":
+                    attempts = self._attempts[name] = self._attempts.get(name, 0) + 1
+                    self._retry_at[name] = time.monotonic() + min(self.retry_backoff * 2 ** (attempts - 1),
+                                                                  self.retry_max)
+                    status["attempts"] = attempts
+                self._status[name] = status
+        return self.ready()
+
+    def start(self):
+        """run() on a background thread."""
+        self.started = True
+        threading.Thread(target=self.run, name="warm-up", daemon=True).start()
+
+    def retryable(self):
+        """True if a step is pending or has waited out its backoff (so a new run() would try it)."""
+        now = time.monotonic()
+        with self._lock:
+            return any(self._due(name, now) for name in self._status)
+
+    def ready(self):
+        with self._lock:
+            return all(status["state"] == "ready" for name, status in self._status.items()
+                       if name not in self._optional)
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            steps = {name: dict(status) for name, status in self._status.items()}
+            for name, status in steps.items():
+                if name in self._optional:
+                    status["optional"] = True
+                if status["state"] == "error":
+                    status["retry_in"] = round(max(0.0, self._retry_at[name] - now), 1)
+            return steps
+
+
+_warm_up = WarmUp()
+
+
+def register(name, step, optional=False):
+    _warm_up.register(name, step, optional)
+
+
+def warm_up(background=False):
+    """Run the registered steps now (e.g. from a gunicorn post_fork hook); True if all succeeded."""
+    if background:
+        _warm_up.start()
+        return False
+    return _warm_up.run()
+
+
+def on_import():
+    """Called at the bottom of each entry point: starts warm-up when WARM_UP=import."""
+    if WARM_UP == "import":
+        _warm_up.start()
+
+
+def readiness():
+    """(ready, payload) for /readyz; with WARM_UP=probe, probes start warm-up and retry failed steps (with backoff)."""
+    if WARM_UP == "probe" and (not _warm_up.started or _warm_up.retryable()):
+        _warm_up.start()
+    ready = WARM_UP == "off" or _warm_up.ready()
+    return ready, {"ready": ready, "warm_up": WARM_UP, "steps": _warm_up.status()}
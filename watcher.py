@@ -0,0 +1,277 @@
+"""Follow live regattas: poll each URL on an adaptive schedule until its results are final.
+
+    python watcher.py 29234 29235 --formats csv,json --publish
+    python watcher.py --file live_regattas.txt --min-interval 60 --max-interval 1800
+
+Polling tightens to --min-interval when new races are posted, backs off
+towards --max-interval while nothing changes and stops once a regatta is final.
+"""
+import argparse
+import heapq
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+import batch_crawler
+import metrics
+import scoring
+import scrape_regatta_results as scraper
+from snapshots import ENTRY_KEY, get_snapshots
+
+# ✅ Watch schedule (override in environment variables)
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", "60"))
+WATCH_MAX_INTERVAL = float(os.getenv("WATCH_MAX_INTERVAL", "1800"))
+WATCH_BACKOFF = float(os.getenv("WATCH_BACKOFF", "1.5"))  # interval multiplier per poll without changes
+WATCH_JITTER = float(os.getenv("WATCH_JITTER", "0.2"))  # +/- fraction of the interval
+WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "4"))  # polls in flight across all regattas
+WATCH_RATE_PER_HOST = float(os.getenv("WATCH_RATE_PER_HOST", "0.5"))  # requests per second per host
+WATCH_KEY = ["Regatta_Name"] + ENTRY_KEY
+
+
+def races_sailed(df):
+    """Races with at least one score, summed over fleets"""
+    if df.empty:
+        return 0
+    matrix = scoring.score_matrix(df["Results"])
+    scored = ~np.isnan(matrix.points) | (matrix.codes > 0)
+    return int(pd.DataFrame(scored).groupby(scoring.fleet_ids(df)).any().to_numpy().sum())
+
+
+class WatchTarget:
+    """One watched regatta and its polling state."""
+
+    def __init__(self, url, interval):
+        self.url = url
+        self.interval = interval
+        self.next_poll = time.monotonic()
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.races = 0
+        self.final = False
+        self.last_change = None
+        self.last_error = None
+
+    def to_dict(self):
+        return {"url": self.url, "interval": round(self.interval, 1), "polls": self.polls, "changes": self.changes,
+                "errors": self.errors, "races": self.races, "final": self.final, "last_change": self.last_change,
+                "last_error": self.last_error}
+
+
+class Watcher:
+    """Polls watched regattas on a shared scheduler.
+
+    At most `workers` polls run at once, requests to one host are spaced by
+    1/rate_per_host seconds, and each regatta's interval adapts to what the
+    last poll found. `on_change(target, df, delta)` receives the fresh frame
+    and its snapshots.Delta; the snapshot is committed once it returns, or,
+    if it returns a Future (a queued push), once that resolves. A failed
+    handler or push sees the same changes again on the next poll.
+    """
+
+    def __init__(self, on_change=None, workers=WATCH_WORKERS, rate_per_host=WATCH_RATE_PER_HOST,
+                 min_interval=WATCH_MIN_INTERVAL, max_interval=WATCH_MAX_INTERVAL, backoff=WATCH_BACKOFF,
+                 jitter=WATCH_JITTER, snapshots=None):
+        self.on_change = on_change
+        self.workers = workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.snapshots = snapshots or get_snapshots()
+        self.limiter = batch_crawler.HostRateLimiter(rate_per_host)
+        self.targets = {}
+        self._queue = []  # (next_poll, url) heap
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._in_flight = set()
+        self._host_locks = {}
+
+    def add(self, url):
+        """Start watching `url`, polled as soon as the scheduler runs."""
+        with self._lock:
+            if url in self.targets:
+                return self.targets[url]
+            target = self.targets[url] = WatchTarget(url, self.min_interval)
+            heapq.heappush(self._queue, (target.next_poll, url))
+        self._wake.set()
+        print(f"👀 Watching {url}")
+        return target
+
+    def remove(self, url):
+        with self._lock:
+            return self.targets.pop(url, None)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def next_interval(self, target, changed, races):
+        """Tighten to the minimum on new races, halve on other changes, back off otherwise."""
+        if races > target.races:
+            return self.min_interval
+        if changed:
+            return max(self.min_interval, target.interval / self.backoff)
+        return min(self.max_interval, target.interval * self.backoff)
+
+    def _schedule(self, target):
+        """Queue the next poll `interval` +/- jitter from now (caller holds the lock)."""
+        delay = target.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        target.next_poll = time.monotonic() + delay
+        heapq.heappush(self._queue, (target.next_poll, target.url))
+
+    def _host_lock(self, url):
+        with self._lock:
+            return self._host_locks.setdefault(urlparse(url).netloc, threading.Lock())
+
+    def _commit_published(self, future, delta, target):
+        """Done-callback of a queued push: commit the snapshot, or poll the regatta again if the push failed."""
+        if future.exception() is None:
+            self.snapshots.commit(delta)
+            return
+        print(f"❌ Publishing {target.url} failed, its changes will be picked up again: {future.exception()}")
+        with self._lock:
+            if target.final:  # ✅ keep a finished regatta watched until its changes are published
+                target.final = False
+                self._schedule(target)
+        self._wake.set()
+
+    def poll(self, target):
+        """Scrape one regatta, hand any changes to on_change and reschedule it."""
+        changed = False
+        races = target.races
+        try:
+            with self._host_lock(target.url):  # ✅ one request in flight per host
+                self.limiter.wait(target.url)
+                df = scraper.scrape_regatta_results(target.url, raise_errors=True, revalidate=True)
+            target.final = bool(df.attrs.get("final"))
+            if df.empty:
+                raise ValueError("no results on the page")
+            df = scraper.clean_results(df)
+            races = races_sailed(df)
+
+            delta = self.snapshots.diff(f"watch:{target.url}", df, WATCH_KEY)
+            changed = not delta.empty
+            if changed:
+                print(f"🔄 {target.url}: {delta.describe()}")
+                pending = self.on_change(target, df, delta) if self.on_change is not None else None
+                if pending is None:
+                    self.snapshots.commit(delta)
+                else:
+                    pending.add_done_callback(lambda f, delta=delta: self._commit_published(f, delta, target))
+                target.changes += 1
+                target.last_change = time.time()
+            target.last_error = None
+            metrics.inc("watch_polls", outcome="changed" if changed else "unchanged")
+        except Exception as e:
+            target.errors += 1
+            target.last_error = str(e)
+            target.final = False
+            metrics.inc("watch_polls", outcome="error")
+            print(f"❌ Poll of {target.url} failed: {e}")
+
+        target.polls += 1
+        target.interval = self.next_interval(target, changed, races)
+        target.races = max(target.races, races)
+        if target.final:
+            print(f"🏁 {target.url} is final after {target.polls} polls, no longer watching")
+        with self._lock:
+            self._in_flight.discard(target.url)
+            if not target.final:
+                self._schedule(target)
+        self._wake.set()
+
+    def run(self, until_final=True):
+        """Run the scheduler until stop(), or (with `until_final`) until every watched regatta is final."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not self._stop.is_set():
+                self._wake.clear()
+                due = []
+                with self._lock:
+                    now = time.monotonic()
+                    while self._queue and self._queue[0][0] <= now and len(self._in_flight) < self.workers:
+                        _, url = heapq.heappop(self._queue)
+                        target = self.targets.get(url)
+                        if target is None or target.final or url in self._in_flight:
+                            continue
+                        self._in_flight.add(url)
+                        due.append(target)
+                    saturated = len(self._in_flight) >= self.workers  # a finishing poll wakes us
+                    wait = self._queue[0][0] - now if self._queue and not saturated else None
+                    idle = not self._in_flight and not self._queue
+                for target in due:
+                    pool.submit(self.poll, target)
+                if until_final and idle and not due:
+                    break
+                self._wake.wait(timeout=None if wait is None else max(0.0, wait))
+
+    def status(self):
+        with self._lock:
+            return [target.to_dict() for target in self.targets.values()]
+
+
+def export_changes(formats, output_dir, publish):
+    """on_change handler: export each delta and optionally queue the full CSV for the results repo
+
+    With `publish` the handler returns the push Future, so the watcher commits
+    the snapshot only once the CSV is in the results repo.
+    """
+    from save_csv import push_to_github
+    from publisher import regatta_path
+
+    def on_change(target, df, delta):
+        exported = scraper.export_results(delta.frame(), formats, output_dir=output_dir, basename="changes")
+        failed = [fmt for fmt, result in exported.items() if "error" in result]
+        if failed:
+            raise RuntimeError(f"export failed for {', '.join(failed)}")
+        if publish:
+            return push_to_github(df.to_csv(index=False), regatta_path(target.url))
+        return None
+
+    return on_change
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('entries', nargs='*', help="Regatta ids or results URLs")
+    parser.add_argument('--file', help="File with one regatta_id or URL per line")
+    parser.add_argument('--min-interval', type=float, default=WATCH_MIN_INTERVAL)
+    parser.add_argument('--max-interval', type=float, default=WATCH_MAX_INTERVAL)
+    parser.add_argument('--workers', type=int, default=WATCH_WORKERS, help="Polls in flight across all regattas")
+    parser.add_argument('--rate', type=float, default=WATCH_RATE_PER_HOST, help="Max requests per second per host")
+    parser.add_argument('--formats', type=lambda value: value.split(','), default=['csv'],
+                        help="Formats to export each change in")
+    parser.add_argument('--output-dir', default='output')
+    parser.add_argument('--publish', action='store_true', help="Also push changed regattas to the results repo")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    entries = list(args.entries)
+    if args.file:
+        entries.extend(batch_crawler.read_url_file(args.file))
+    if not entries:
+        print("Nothing to watch: pass regatta ids/URLs or --file")
+        return
+
+    watcher = Watcher(export_changes(args.formats, args.output_dir, args.publish), workers=args.workers,
+                      rate_per_host=args.rate, min_interval=args.min_interval, max_interval=args.max_interval)
+    for entry in entries:
+        watcher.add(batch_crawler.regatta_url(entry))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    for status in watcher.status():
+        print(f"{status['url']}: {status['polls']} polls, {status['changes']} changes, {status['races']} races, "
+              f"{'final' if status['final'] else 'not final'}")
+
+
+if __name__ == "__main__":
+    main()